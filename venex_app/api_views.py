@@ -5,19 +5,24 @@ from rest_framework import status
 from decimal import Decimal, InvalidOperation as DecimalException
 from django.utils import timezone
 import logging
+import msgpack
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from .services.crypto_api_service import crypto_service, CryptoDataService
+from .services.market_snapshot import market_snapshot
 from .services.dashboard_service import DashboardService
 from .services.trading_service import ( TradingService, OrderMatchingEngine )
 from .services.currency_service import CurrencyConversionService
 from .services.email_service import EmailService
+from .services.portfolio_service import PortfolioService
+from .services.chart_encoding import CHART_ENCODINGS, encode_chart
 from django.views.decorators.http import require_GET
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from .models import CustomUser, Transaction, Order, Portfolio, Cryptocurrency
 from .serializers import (
     TransactionSerializer, OrderSerializer, PortfolioSerializer, 
@@ -1055,34 +1060,14 @@ def api_market_data(request):
     Used by JavaScript polling as fallback when WebSocket is unavailable
     """
     try:
-        # Update cryptocurrency data from external API
-        crypto_service.update_cryptocurrency_data()
-        
-        cryptocurrencies = Cryptocurrency.objects.filter(is_active=True).order_by('symbol')
-        serializer = CryptocurrencySerializer(cryptocurrencies, many=True)
-        
-        # Calculate market statistics
-        total_market_cap = sum(float(crypto.market_cap) for crypto in cryptocurrencies if crypto.market_cap)
-        total_volume = sum(float(crypto.volume_24h) for crypto in cryptocurrencies if crypto.volume_24h)
-        
-        # Calculate BTC dominance
-        btc_market_cap = 0
-        btc_crypto = cryptocurrencies.filter(symbol='BTC').first()
-        if btc_crypto and btc_crypto.market_cap:
-            btc_market_cap = float(btc_crypto.market_cap)
-        
-        btc_dominance = (btc_market_cap / total_market_cap * 100) if total_market_cap > 0 else 0
-        
+        # Served from the shared market snapshot rebuilt by the ingestion worker
+        snapshot = market_snapshot.get()
         return Response({
             'success': True,
-            'cryptocurrencies': serializer.data,
-            'market_stats': {
-                'active_cryptocurrencies': cryptocurrencies.count(),
-                'total_market_cap': total_market_cap,
-                'total_volume_24h': total_volume,
-                'btc_dominance': btc_dominance,
-                'timestamp': timezone.now().isoformat()
-            }
+            'version': snapshot['version'],
+            # The snapshot is in rank order; this endpoint has always listed by symbol
+            'cryptocurrencies': sorted(snapshot['data']['cryptocurrencies'], key=lambda crypto: crypto['symbol']),
+            'market_stats': snapshot['data']['market_stats']
         })
         
     except Exception as e:
@@ -1944,6 +1929,7 @@ def update_user_portfolio(user, cryptocurrency):
         portfolio.profit_loss = portfolio.current_value - total_invested
         portfolio.profit_loss_percentage = (portfolio.profit_loss / total_invested * 100) if total_invested > 0 else Decimal('0')
         portfolio.save()
+        PortfolioService.notify_holdings_changed(user.id)
         
     except Exception as e:
         logger.error(f"Error updating portfolio: {e}", exc_info=True)
@@ -2087,13 +2073,28 @@ def market_prices_history(request, symbol):
     """
     GET /api/market/prices/<symbol>/history/
     Returns price history for charting
+
+    ?encoding=compact returns delta/scaled-integer columns as JSON and
+    ?encoding=msgpack the same as application/x-msgpack (`format` is taken
+    by DRF's renderer override)
     """
     range_param = request.GET.get('range', '1d')
+    encoding = request.GET.get('encoding', 'json')
+    if encoding not in CHART_ENCODINGS:
+        return Response({'error': f"Invalid encoding. Use one of: {', '.join(CHART_ENCODINGS)}"}, status=400)
+    
+    # Optional ?points=N caps the series size (LTTB downsampling)
+    try:
+        max_points = int(request.GET.get('points', 0)) or None
+    except ValueError:
+        max_points = None
+    if max_points:
+        max_points = max(3, min(max_points, getattr(settings, 'CHART_MAX_POINTS_LIMIT', 5000)))
     
     try:
         from .services.crypto_api_service import crypto_service
        
-        history_data = crypto_service.get_price_history(symbol, range_param)
+        history_data = crypto_service.get_price_history(symbol, range_param, max_points=max_points)
         
         # Rest of your code remains the same...
         if isinstance(history_data, dict):
@@ -2111,12 +2112,20 @@ def market_prices_history(request, symbol):
         if hd.get('error'):
             return Response({'error': hd.get('error')}, status=400)
         
+        if encoding != 'json':
+            body = {'success': True, 'symbol': symbol, 'range': range_param, **encode_chart(hd)}
+            if encoding == 'msgpack':
+                return HttpResponse(msgpack.packb(body, use_bin_type=True), content_type='application/x-msgpack')
+            return Response(body)
+        
         return Response({
             'success': True,
             'symbol': symbol,
             'range': range_param,
             'prices': hd.get('prices', []),
             'timestamps': hd.get('timestamps', []),
+            'volumes': hd.get('volumes', []),
+            'points': hd.get('points', 0),
             'current_price': hd.get('current_price', 0),
             'price_change_24h': hd.get('price_change_24h', 0),
             'price_change_percentage_24h': hd.get('price_change_percentage_24h', 0)
@@ -2241,6 +2250,7 @@ def quick_trade(request):
                 
                 portfolio.save()
                 portfolio.update_portfolio_value(current_price)
+            PortfolioService.notify_holdings_changed(user.id)
                 
         except Exception as e:
             # Log portfolio update error but don't fail the trade
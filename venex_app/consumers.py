@@ -3,179 +3,219 @@ import json
 import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from .services.crypto_api_service import crypto_service
+from .services.async_crypto_api_service import async_crypto_service
+from .services.chart_encoding import render_chart, chart_frame
+from .services.price_broadcaster import price_group, price_snapshot_message
+from .services.price_snapshot import price_snapshot, EMPTY_PRICE
+from .services.market_snapshot import market_snapshot
+from .services.portfolio_valuation import PortfolioValuation
+from .services.ws_broadcast import BroadcastFrameMixin
+from .services.ws_outbound import OutboundQueueMixin
+from .services.ws_protocol import WireProtocolMixin
+from .choices import CRYPTO_CHOICES
 from .models import Cryptocurrency
+from django.conf import settings
 from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
-class PriceConsumer(AsyncWebsocketConsumer):
+class PriceConsumer(WireProtocolMixin, OutboundQueueMixin, BroadcastFrameMixin, AsyncWebsocketConsumer):
+    """
+    Live prices for a set of symbols
+
+    Each followed symbol is a channel-layer group in the connection's wire
+    format (price.BTC.json, price.BTC.msgpack, ... see format_group), so the
+    socket only receives updates for what it follows, encoded the way it
+    reads them; the broadcaster sends pre-encoded frames (broadcast_frame).
+    Clients send
+    {"type": "subscribe", "symbols": [...]} / {"type": "unsubscribe", ...};
+    the single-symbol {"type": "subscribe", "symbol": ...} form also switches
+    the chart to that symbol.
+
+    Prices are sequenced per symbol: a price_snapshot (full fields, seq N) on
+    subscribe, then price_delta frames with only the changed fields and seq
+    N+1, N+2, ... A slow socket may get several deltas merged into one, which
+    then carries base_seq (the seq it applies on top of) instead of seq - 1.
+    Clients ignore frames with seq <= the one they hold and send
+    {"type": "resync", "symbols": [...]} when they see a gap, which answers
+    with fresh snapshots.
+    """
+    valid_symbols = [choice[0] for choice in CRYPTO_CHOICES]
+
     async def connect(self):
-        self.room_group_name = 'price_updates'
         self.symbol = 'BTC'  # Default symbol
+        self.subscriptions = set()
         self.user = self.scope["user"] # type: ignore
 
-        # Join room group
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-
+        # Frames and chart payloads use the encoding picked by the client's subprotocol
         await self.accept()
+
+        # Follow the default symbol (groups are per wire format, so after accept)
+        await self.subscribe_symbols([self.symbol])
         
-        # Send initial data
+        # Send initial data; later prices arrive from the central broadcaster
         await self.send_current_price()
         await self.send_historical_data()
-        
-        # Start periodic updates
-        self.update_task = asyncio.create_task(self.periodic_updates())
 
     async def disconnect(self, close_code): # type: ignore
-        # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
-        
-        # Cancel periodic updates
-        if hasattr(self, 'update_task'):
-            self.update_task.cancel()
+        # Leave every symbol group
+        for symbol in list(getattr(self, 'subscriptions', ())):
+            await self.channel_layer.group_discard(self.format_group(price_group(symbol)), self.channel_name)
 
     async def receive(self, text_data=None, bytes_data=None):
         """Receive message from WebSocket with proper method signature"""
         try:
-            if text_data:
-                data = json.loads(text_data)
+            if text_data or bytes_data:
+                data = self.decode_message(text_data, bytes_data)
                 message_type = data.get('type')
                 
                 if message_type == 'subscribe':
-                    symbol = data.get('symbol', 'BTC').upper()
-                    await self.handle_subscription(symbol)
+                    if 'symbols' in data:
+                        await self.handle_subscription(data['symbols'])
+                    else:
+                        await self.handle_chart_subscription(str(data.get('symbol', 'BTC')).upper())
+                elif message_type == 'unsubscribe':
+                    await self.handle_unsubscription(data.get('symbols') or [data.get('symbol', '')])
+                elif message_type == 'resync':
+                    await self.handle_resync(data.get('symbols') or [data.get('symbol', self.symbol)])
                 elif message_type == 'ping':
-                    await self.send(text_data=json.dumps({'type': 'pong'}))
+                    await self.send_message({'type': 'pong'})
                 else:
                     logger.warning(f"Unknown message type: {message_type}")
                     
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
+        except ValueError:
+            await self.send_message({
                 'type': 'error',
-                'message': 'Invalid JSON format'
-            }))
+                'message': 'Invalid message format'
+            })
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error', 
                 'message': 'Internal server error'
-            }))
+            })
 
-    async def handle_subscription(self, symbol):
-        """Handle symbol subscription changes"""
-        valid_symbols = ['BTC', 'ETH', 'USDT', 'LTC', 'TRX']
-        
-        if symbol in valid_symbols:
+    async def handle_chart_subscription(self, symbol):
+        """Follow one symbol and switch the chart to it"""
+        if symbol in self.valid_symbols:
             self.symbol = symbol
+            await self.subscribe_symbols([symbol])
             await self.send_current_price()
             await self.send_historical_data()
-            
-            await self.send(text_data=json.dumps({
-                'type': 'subscription_update',
-                'symbol': symbol,
-                'message': f'Subscribed to {symbol} updates'
-            }))
+            await self.send_subscription_update(f'Subscribed to {symbol} updates')
         else:
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'message': f'Invalid symbol: {symbol}. Valid symbols: {", ".join(valid_symbols)}'
-            }))
-
-    async def send_current_price(self):
-        """Send current price for subscribed symbol"""
+            await self.send_invalid_symbols([symbol])
+
+    async def handle_subscription(self, symbols):
+        """Add symbols to the followed set and send their current prices"""
+        symbols, invalid = self.parse_symbols(symbols)
+        if invalid:
+            await self.send_invalid_symbols(invalid)
+        added = await self.subscribe_symbols(symbols)
+        for symbol in added:
+            await self.send_current_price(symbol)
+        if symbols:
+            await self.send_subscription_update(f'Subscribed to {", ".join(symbols)} updates')
+
+    async def handle_unsubscription(self, symbols):
+        """Stop following symbols"""
+        symbols, invalid = self.parse_symbols(symbols)
+        if invalid:
+            await self.send_invalid_symbols(invalid)
+        for symbol in symbols:
+            if symbol in self.subscriptions:
+                self.subscriptions.discard(symbol)
+                await self.channel_layer.group_discard(self.format_group(price_group(symbol)), self.channel_name)
+        if symbols:
+            await self.send_subscription_update(f'Unsubscribed from {", ".join(symbols)} updates')
+
+    async def handle_resync(self, symbols):
+        """Send fresh snapshots for followed symbols after the client saw a sequence gap"""
+        symbols, _ = self.parse_symbols(symbols)
+        for symbol in symbols:
+            if symbol in self.subscriptions:
+                await self.send_current_price(symbol)
+
+    def parse_symbols(self, symbols):
+        """Split a client symbol list into (valid, invalid), upper-cased and de-duplicated"""
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        valid, invalid = [], []
+        for symbol in symbols if isinstance(symbols, list) else []:
+            symbol = str(symbol).upper()
+            target = valid if symbol in self.valid_symbols else invalid
+            if symbol not in target:
+                target.append(symbol)
+        return valid, invalid
+
+    async def subscribe_symbols(self, symbols):
+        """Join the groups of symbols not yet followed; returns the newly added ones"""
+        added = [symbol for symbol in symbols if symbol not in self.subscriptions]
+        for symbol in added:
+            await self.channel_layer.group_add(self.format_group(price_group(symbol)), self.channel_name)
+            self.subscriptions.add(symbol)
+        return added
+
+    async def send_subscription_update(self, message):
+        await self.send_message({
+            'type': 'subscription_update',
+            'symbol': self.symbol,
+            'symbols': sorted(self.subscriptions),
+            'message': message
+        })
+
+    async def send_invalid_symbols(self, symbols):
+        await self.send_message({
+            'type': 'error',
+            'message': f'Invalid symbol: {", ".join(symbols)}. Valid symbols: {", ".join(self.valid_symbols)}'
+        })
+
+    async def send_current_price(self, symbol=None):
+        """Send a price_snapshot for a followed symbol (default: the chart symbol)"""
+        symbol = symbol or self.symbol
         try:
-            price_data = await self.get_current_price(self.symbol)
-            await self.send(text_data=json.dumps({
-                'type': 'price_update',
-                'symbol': self.symbol,
-                'data': price_data,
-                'timestamp': await self.get_current_timestamp()
-            }))
+            await price_snapshot.ready()
+            await self.send_message(price_snapshot_message(
+                symbol, price_snapshot.seq(symbol), self.get_current_price(symbol)
+            ), conflate_key=f'price:{symbol}')
         except Exception as e:
             logger.error(f"Error sending current price: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
-                'message': f'Failed to get price for {self.symbol}'
-            }))
+                'message': f'Failed to get price for {symbol}'
+            })
 
     async def send_historical_data(self):
         """Send historical data for chart"""
         try:
             historical_data = await self.get_historical_data(self.symbol)
-            await self.send(text_data=json.dumps({
+            if isinstance(historical_data, dict) and 'timestamps' in historical_data:
+                historical_data = render_chart(historical_data, self.chart_encoding)
+            await self.send(**chart_frame({
                 'type': 'historical_data',
                 'symbol': self.symbol,
                 'data': historical_data
-            }))
+            }, self.chart_encoding), conflate_key='chart')
         except Exception as e:
             logger.error(f"Error sending historical data: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': f'Failed to get historical data for {self.symbol}'
-            }))
-
-    async def periodic_updates(self):
-        """Send periodic price updates"""
-        while True:
-            try:
-                await asyncio.sleep(10)  # Update every 10 seconds
-                await self.send_current_price()
-                
-                # Also update the room group with latest prices
-                price_data = await self.get_current_price(self.symbol)
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'price_update',
-                        'symbol': self.symbol,
-                        'data': price_data,
-                        'timestamp': await self.get_current_timestamp()
-                    }
-                )
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in periodic updates: {e}")
-                await asyncio.sleep(5)  # Wait before retrying
+            })
 
-    @database_sync_to_async
     def get_current_price(self, symbol):
-        """Get current price from database"""
-        from .models import Cryptocurrency
+        """Get current price from the process-wide price snapshot"""
+        price_data = price_snapshot.get(symbol)
+        if price_data is None:
+            logger.warning(f"Cryptocurrency {symbol} not found in price snapshot")
+            return dict(EMPTY_PRICE)
+        return price_data
+
+    async def get_historical_data(self, symbol):
+        """Get 30 days of chart columns, downsampled to CHART_MAX_POINTS"""
         try:
-            crypto = Cryptocurrency.objects.get(symbol=symbol)
-            return {
-                'price': float(crypto.current_price),
-                'change_24h': float(crypto.price_change_24h),
-                'change_percentage_24h': float(crypto.price_change_percentage_24h),
-                'volume': float(crypto.volume_24h),
-                'market_cap': float(crypto.market_cap) if crypto.market_cap else 0,
-                'last_updated': crypto.last_updated.isoformat() if crypto.last_updated else None
-            }
-        except Cryptocurrency.DoesNotExist:
-            logger.warning(f"Cryptocurrency {symbol} not found in database")
-            return {
-                'price': 0, 
-                'change_24h': 0, 
-                'change_percentage_24h': 0, 
-                'volume': 0,
-                'market_cap': 0,
-                'last_updated': None
-            }
-
-    @database_sync_to_async
-    def get_historical_data(self, symbol):
-        """Get historical data for chart"""
-        try:
-            return crypto_service.get_historical_data(symbol, days=30)
+            return await async_crypto_service.get_price_history(symbol, '30d')
         except Exception as e:
             logger.error(f"Error getting historical data: {e}")
             return []
@@ -187,12 +227,9 @@ class PriceConsumer(AsyncWebsocketConsumer):
         return timezone.now().isoformat()
 
     async def price_update(self, event):
-        """Receive price update from room group"""
-        # This handles messages sent to the group
+        """Relay a price update from one of the followed symbol groups"""
         try:
-            # Only send if it's for our subscribed symbol or we want all updates
-            if event.get('symbol') == self.symbol:
-                await self.send(text_data=json.dumps(event))
+            await self.send_message(event, conflate_key=f"price:{event.get('symbol')}")
         except Exception as e:
             logger.error(f"Error in price_update handler: {e}")
 
@@ -200,7 +237,13 @@ class PriceConsumer(AsyncWebsocketConsumer):
 
 logger = logging.getLogger(__name__)
 
-class MarketConsumer(AsyncWebsocketConsumer):
+class MarketConsumer(WireProtocolMixin, OutboundQueueMixin, BroadcastFrameMixin, AsyncWebsocketConsumer):
+    """
+    Market overview: the market_data snapshot on connect, then the sequenced
+    price_snapshot/price_delta frames of every symbol (see PriceConsumer for
+    the seq and resync rules)
+    """
+
     async def connect(self):
         self.room_group_name = 'market_updates'
         
@@ -211,111 +254,118 @@ class MarketConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
+
+        # Join every symbol's price group in the negotiated wire format
+        self.price_groups = [self.format_group(price_group(symbol)) for symbol, _ in CRYPTO_CHOICES]
+        for group in self.price_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
         logger.info(f"Market WebSocket connected: {self.channel_name}")
         
         # Send initial market data
         await self.send_initial_market_data()
 
     async def disconnect(self, close_code): # type: ignore
-        # Leave market group
+        # Leave market and price groups
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        for group in getattr(self, 'price_groups', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
         logger.info(f"Market WebSocket disconnected: {self.channel_name}")
 
-    async def receive(self, text_data): # type: ignore
+    async def receive(self, text_data=None, bytes_data=None): # type: ignore
         try:
-            data = json.loads(text_data)
+            data = self.decode_message(text_data, bytes_data)
             message_type = data.get('type')
             
             if message_type == 'subscribe_chart':
                 symbol = data.get('symbol', 'BTC')
                 timeframe = data.get('timeframe', '1d')
                 await self.send_chart_data(symbol, timeframe)
+            elif message_type == 'resync':
+                await self.send_price_snapshots(data.get('symbols') or data.get('symbol', ''))
+            elif message_type == 'ping':
+                await self.send_message({'type': 'pong'})
                 
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': str(e)
-            }))
+            })
 
     async def market_update(self, event):
         """Receive market update from group"""
-        await self.send(text_data=json.dumps(event['data']))
+        await self.send_message(event['data'], conflate_key='market')
 
     async def price_update(self, event):
         """Receive price update from group"""
-        await self.send(text_data=json.dumps(event['data']))
+        symbol = event.get('symbol')
+        await self.send_message(event['data'], conflate_key=f'price:{symbol}' if symbol else None)
+
+    async def send_price_snapshots(self, symbols):
+        """Fresh price_snapshot frames after the client saw a sequence gap"""
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        requested = {str(symbol).upper() for symbol in symbols} if isinstance(symbols, list) else set()
+        await price_snapshot.ready()
+        for symbol in sorted(requested & {symbol for symbol, _ in CRYPTO_CHOICES}):
+            await self.send_message(price_snapshot_message(
+                symbol, price_snapshot.seq(symbol), price_snapshot.get(symbol) or dict(EMPTY_PRICE)
+            ), conflate_key=f'price:{symbol}')
 
     @database_sync_to_async
-    def get_market_data(self):
-        """Get current market data from database"""
-        from .models import Cryptocurrency
-        from .serializers import CryptocurrencySerializer
-        
-        cryptocurrencies = Cryptocurrency.objects.filter(is_active=True).order_by('rank')
-        serializer = CryptocurrencySerializer(cryptocurrencies, many=True)
-        
-        # Calculate market stats
-        total_market_cap = sum(float(crypto.market_cap) for crypto in cryptocurrencies)
-        total_volume = sum(float(crypto.volume_24h) for crypto in cryptocurrencies)
-        
-        # Calculate BTC dominance
-        btc = cryptocurrencies.filter(symbol='BTC').first()
-        btc_dominance = (float(btc.market_cap) / total_market_cap * 100) if btc and total_market_cap > 0 else 0
-        
-        return {
-            'type': 'market_data',
-            'data': {
-                'cryptocurrencies': serializer.data,
-                'market_stats': {
-                    'total_market_cap': total_market_cap,
-                    'total_volume_24h': total_volume,
-                    'btc_dominance': round(btc_dominance, 2),
-                    'active_cryptocurrencies': cryptocurrencies.count(),
-                    'timestamp': timezone.now().isoformat()
-                }
-            }
-        }
+    def get_market_frame(self):
+        """Shared market snapshot, pre-encoded as a market_data frame in this connection's wire format"""
+        return market_snapshot.frame(self.wire_format)
 
-    @database_sync_to_async
-    def get_chart_data(self, symbol, timeframe):
+    async def get_chart_data(self, symbol, timeframe):
         """Get chart data for specific symbol and timeframe"""
-        from .services.crypto_api_service import crypto_service
-        return crypto_service.get_price_history(symbol, timeframe)
+        return await async_crypto_service.get_price_history(symbol, timeframe)
 
     async def send_initial_market_data(self):
         """Send initial market data on connection"""
         try:
-            market_data = await self.get_market_data()
-            await self.send(text_data=json.dumps(market_data))
+            await self.broadcast_frame(await self.get_market_frame())
         except Exception as e:
             logger.error(f"Error sending initial market data: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': 'Failed to load market data'
-            }))
+            })
 
     async def send_chart_data(self, symbol, timeframe):
         """Send chart data for specific cryptocurrency"""
         try:
             chart_data = await self.get_chart_data(symbol, timeframe)
-            await self.send(text_data=json.dumps({
+            if isinstance(chart_data, dict) and 'timestamps' in chart_data:
+                chart_data = render_chart(chart_data, self.chart_encoding)
+            await self.send(**chart_frame({
                 'type': 'chart_data',
                 'symbol': symbol,
                 'timeframe': timeframe,
                 'data': chart_data
-            }))
+            }, self.chart_encoding), conflate_key=f'chart:{symbol}:{timeframe}')
         except Exception as e:
             logger.error(f"Error sending chart data for {symbol}: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': f'Failed to load chart data for {symbol}'
-            }))
+            })
+
+class PortfolioConsumer(WireProtocolMixin, OutboundQueueMixin, BroadcastFrameMixin, AsyncWebsocketConsumer):
+    """
+    Live portfolio valuation
+
+    Holdings (quantities, cost basis) are loaded once at connect and cached in
+    a PortfolioValuation. The socket joins the price groups of the held
+    symbols; ticks are applied in memory, bursts are debounced and only the
+    changed fields are pushed as portfolio_delta. Holdings are reloaded only
+    when a trade (portfolio.holdings_changed) or portfolio_update event says
+    they changed.
+    """
 
-class PortfolioConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"] # type: ignore
         if self.user.is_anonymous: # type: ignore
@@ -323,6 +373,10 @@ class PortfolioConsumer(AsyncWebsocketConsumer):
             return
             
         self.portfolio_group_name = f'portfolio_{self.user.id}' # type: ignore
+        self.valuation = PortfolioValuation(self.user.id) # type: ignore
+        self.price_groups = set()
+        self.revalue_task = None
+        self.debounce = getattr(settings, 'PORTFOLIO_REVALUE_DEBOUNCE', 0.5)
         
         # Join portfolio group
         await self.channel_layer.group_add(
@@ -337,76 +391,93 @@ class PortfolioConsumer(AsyncWebsocketConsumer):
         await self.send_initial_portfolio_data()
 
     async def disconnect(self, close_code): # type: ignore
-        # Leave portfolio group
+        if not hasattr(self, 'portfolio_group_name'):
+            return
+        if self.revalue_task:
+            self.revalue_task.cancel()
+        # Leave portfolio and price groups
         await self.channel_layer.group_discard(
             self.portfolio_group_name,
             self.channel_name
         )
+        for group in self.price_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
         logger.info(f"Portfolio WebSocket disconnected for user: {self.user.username}") # type: ignore
 
-    async def receive(self, text_data): # type: ignore
+    async def receive(self, text_data=None, bytes_data=None): # type: ignore
         try:
-            data = json.loads(text_data)
+            data = self.decode_message(text_data, bytes_data)
             message_type = data.get('type')
             
             if message_type == 'get_analytics':
                 timeframe = data.get('timeframe', '1M')
                 await self.send_analytics_data(timeframe)
+            elif message_type == 'ping':
+                await self.send_message({'type': 'pong'})
                 
         except Exception as e:
             logger.error(f"Error processing portfolio WebSocket message: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': str(e)
-            }))
+            })
 
     async def portfolio_update(self, event):
-        """Receive portfolio update from group"""
-        await self.send(text_data=json.dumps(event['data']))
+        """Receive portfolio update from group; holdings may have changed"""
+        await self.send_message(event['data'])
+        await self.send_updated_portfolio_data()
 
-    async def price_update(self, event):
-        """Handle price updates that affect portfolio"""
-        # Recalculate portfolio when prices change
+    async def portfolio_holdings_changed(self, event):
+        """A trade changed the user's holdings"""
         await self.send_updated_portfolio_data()
 
-    @database_sync_to_async
-    def get_portfolio_data(self):
-        """Get current portfolio data"""
-        from .services.portfolio_service import portfolio_service
-        
-        portfolio = portfolio_service.get_user_portfolio(self.user)
-        portfolio_service.calculate_portfolio_value(portfolio)
-        
-        holdings = portfolio.holdings.all().select_related('cryptocurrency')
-        holdings_data = []
-        
-        for holding in holdings:
-            crypto = holding.cryptocurrency
-            holdings_data.append({
-                'symbol': crypto.symbol,
-                'name': crypto.name,
-                'amount': float(holding.amount),
-                'current_price': float(crypto.current_price),
-                'value_usd': float(holding.current_value),
-                'allocation': float(holding.allocation_percentage),
-                'unrealized_pl': float(holding.unrealized_pl),
-                'unrealized_pl_percentage': float(holding.unrealized_pl_percentage),
-                '24h_change': float(crypto.price_change_percentage_24h)
-            })
-        
+    async def price_update(self, event):
+        """Apply a price tick from a held symbol's group"""
+        self.apply_price(event.get('symbol'), event.get('data'))
+
+    async def broadcast_frame(self, event):
+        """Price groups send pre-encoded price frames; apply their plain symbol/data instead of forwarding"""
+        if 'symbol' in event:
+            self.apply_price(event['symbol'], event.get('data'))
+            return
+        await super().broadcast_frame(event)
+
+    def apply_price(self, symbol, data):
+        """Record a tick and schedule one revaluation for the burst"""
+        if self.valuation.apply_price(symbol, data) and not self.revalue_task:
+            self.revalue_task = asyncio.ensure_future(self.send_portfolio_delta())
+
+    async def send_portfolio_delta(self):
+        """After the debounce window, push the fields the ticks changed"""
+        try:
+            await asyncio.sleep(self.debounce)
+            self.revalue_task = None
+            changes = self.valuation.changes()
+            if changes:
+                await self.send_message({'type': 'portfolio_delta', 'data': changes})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.revalue_task = None
+            logger.error(f"Error sending portfolio delta: {e}")
+
+    async def load_portfolio(self):
+        """(Re)load holdings, follow their price groups and return a full portfolio_data message"""
+        symbols = await database_sync_to_async(self.valuation.load_holdings)()
+        groups = {self.format_group(price_group(symbol)) for symbol in symbols}
+        for group in groups - self.price_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        for group in self.price_groups - groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.price_groups = groups
+
+        # Start from the process-wide snapshot; ticks keep it current
+        await price_snapshot.ready()
+        for symbol in symbols:
+            self.valuation.apply_price(symbol, price_snapshot.get(symbol))
         return {
             'type': 'portfolio_data',
-            'data': {
-                'portfolio': {
-                    'total_value': float(portfolio.total_value),
-                    'unrealized_pl': float(portfolio.unrealized_pl),
-                    'realized_pl': float(portfolio.realized_pl),
-                    'daily_change': float(portfolio.daily_change),
-                    'daily_change_percentage': float(portfolio.daily_change_percentage),
-                    'initial_investment': float(portfolio.initial_investment)
-                },
-                'holdings': holdings_data
-            }
+            'data': self.valuation.snapshot()
         }
 
     @database_sync_to_async
@@ -425,20 +496,20 @@ class PortfolioConsumer(AsyncWebsocketConsumer):
     async def send_initial_portfolio_data(self):
         """Send initial portfolio data on connection"""
         try:
-            portfolio_data = await self.get_portfolio_data()
-            await self.send(text_data=json.dumps(portfolio_data))
+            portfolio_data = await self.load_portfolio()
+            await self.send_message(portfolio_data)
         except Exception as e:
             logger.error(f"Error sending initial portfolio data: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': 'Failed to load portfolio data'
-            }))
+            })
 
     async def send_updated_portfolio_data(self):
-        """Send updated portfolio data"""
+        """Reload holdings and send the full portfolio data"""
         try:
-            portfolio_data = await self.get_portfolio_data()
-            await self.send(text_data=json.dumps(portfolio_data))
+            portfolio_data = await self.load_portfolio()
+            await self.send_message(portfolio_data)
         except Exception as e:
             logger.error(f"Error sending updated portfolio data: {e}")
 
@@ -446,16 +517,16 @@ class PortfolioConsumer(AsyncWebsocketConsumer):
         """Send analytics data"""
         try:
             analytics_data = await self.get_analytics_data(timeframe)
-            await self.send(text_data=json.dumps(analytics_data))
+            await self.send_message(analytics_data)
         except Exception as e:
             logger.error(f"Error sending analytics data: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': 'Failed to load analytics data'
-            }))
+            })
 
 
-class WithdrawalConsumer(AsyncWebsocketConsumer):
+class WithdrawalConsumer(WireProtocolMixin, OutboundQueueMixin, AsyncWebsocketConsumer):
     """WebSocket consumer for real-time withdrawal updates"""
     
     async def connect(self):
@@ -480,11 +551,11 @@ class WithdrawalConsumer(AsyncWebsocketConsumer):
         logger.info(f"Withdrawal WebSocket connected for user: {self.user.username}")  # type: ignore
         
         # Send connection confirmation
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'connection_established',
             'message': 'Connected to withdrawal updates',
             'timestamp': await self.get_current_timestamp()
-        }))
+        })
 
     async def disconnect(self, close_code):  # type: ignore
         """Handle WebSocket disconnection"""
@@ -499,48 +570,48 @@ class WithdrawalConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data=None, bytes_data=None):  # type: ignore
         """Receive message from WebSocket"""
         try:
-            if text_data:
-                data = json.loads(text_data)
+            if text_data or bytes_data:
+                data = self.decode_message(text_data, bytes_data)
                 message_type = data.get('type')
                 
                 if message_type == 'ping':
                     # Respond to ping with pong
-                    await self.send(text_data=json.dumps({
+                    await self.send_message({
                         'type': 'pong',
                         'timestamp': await self.get_current_timestamp()
-                    }))
+                    })
                 elif message_type == 'get_recent_withdrawals':
                     # Send recent withdrawals
                     await self.send_recent_withdrawals()
                 else:
                     logger.warning(f"Unknown message type: {message_type}")
                     
-        except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
+        except ValueError:
+            await self.send_message({
                 'type': 'error',
-                'message': 'Invalid JSON format'
-            }))
+                'message': 'Invalid message format'
+            })
         except Exception as e:
             logger.error(f"Error processing withdrawal WebSocket message: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': 'Internal server error'
-            }))
+            })
 
     # Event handlers called from channel layer
     async def withdrawal_status_update(self, event):
         """Handle withdrawal status update event"""
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'withdrawal_status_update',
             'withdrawal_id': event['withdrawal_id'],
             'status': event['status'],
             'message': event.get('message', ''),
             'timestamp': event.get('timestamp', await self.get_current_timestamp())
-        }))
+        })
 
     async def withdrawal_completed(self, event):
         """Handle withdrawal completed event"""
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'withdrawal_completed',
             'withdrawal_id': event['withdrawal_id'],
             'cryptocurrency': event['cryptocurrency'],
@@ -548,14 +619,14 @@ class WithdrawalConsumer(AsyncWebsocketConsumer):
             'transaction_hash': event.get('transaction_hash', ''),
             'message': event.get('message', 'Withdrawal completed successfully'),
             'timestamp': event.get('timestamp', await self.get_current_timestamp())
-        }))
+        })
         
         # Also send updated balance
         await self.send_balance_update()
 
     async def withdrawal_failed(self, event):
         """Handle withdrawal failed event"""
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'withdrawal_failed',
             'withdrawal_id': event['withdrawal_id'],
             'cryptocurrency': event['cryptocurrency'],
@@ -563,15 +634,15 @@ class WithdrawalConsumer(AsyncWebsocketConsumer):
             'reason': event.get('reason', 'Unknown error'),
             'message': event.get('message', 'Withdrawal failed'),
             'timestamp': event.get('timestamp', await self.get_current_timestamp())
-        }))
+        })
 
     async def balance_update(self, event):
         """Handle balance update event"""
-        await self.send(text_data=json.dumps({
+        await self.send_message({
             'type': 'balance_update',
             'balances': event['balances'],
             'timestamp': event.get('timestamp', await self.get_current_timestamp())
-        }))
+        })
 
     @database_sync_to_async
     def get_recent_withdrawals_data(self):
@@ -586,7 +657,7 @@ class WithdrawalConsumer(AsyncWebsocketConsumer):
         withdrawal_list = []
         for withdrawal in withdrawals:
             withdrawal_list.append({
-                'id': withdrawal.id,
+                'id': str(withdrawal.id),
                 'cryptocurrency': withdrawal.cryptocurrency,
                 'amount': float(withdrawal.amount),
                 'wallet_address': withdrawal.wallet_address or '',
@@ -619,26 +690,26 @@ class WithdrawalConsumer(AsyncWebsocketConsumer):
         """Send recent withdrawals to client"""
         try:
             withdrawals = await self.get_recent_withdrawals_data()
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'recent_withdrawals',
                 'withdrawals': withdrawals,
                 'timestamp': await self.get_current_timestamp()
-            }))
+            })
         except Exception as e:
             logger.error(f"Error sending recent withdrawals: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'error',
                 'message': 'Failed to load recent withdrawals'
-            }))
+            })
 
     async def send_balance_update(self):
         """Send updated balances to client"""
         try:
             balances = await self.get_user_balances()
-            await self.send(text_data=json.dumps({
+            await self.send_message({
                 'type': 'balance_update',
                 'balances': balances,
                 'timestamp': await self.get_current_timestamp()
-            }))
+            })
         except Exception as e:
             logger.error(f"Error sending balance update: {e}")
\ No newline at end of file
@@ -0,0 +1,58 @@
+# venex_app/management/commands/backfill_price_history.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from venex_app.models import Cryptocurrency
+from venex_app.services.backfill_service import PriceHistoryBackfill, to_millis
+from venex_app.services.retention_service import PriceRetentionService
+
+
+class Command(BaseCommand):
+    help = 'Bulk import historical prices from kline/market-chart dumps (JSON, JSONL, CSV) or Binance pages; resumable'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbol', help='Cryptocurrency symbol, e.g. BTC')
+        parser.add_argument('files', nargs='*', help='Dump files to import, in time order')
+        parser.add_argument('--binance', action='store_true', help='Page klines from the Binance API instead of files')
+        parser.add_argument('--start', help='Binance start (ISO date or epoch); default 1 year ago')
+        parser.add_argument('--end', help='Binance end (ISO date or epoch); default now')
+        parser.add_argument('--interval', default='1m', help='Binance kline interval')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per bulk insert/transaction')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: .backfill_<symbol>.json)')
+        parser.add_argument('--candles', action='store_true',
+                            help='Also build candles at the interval raw rows are compacted into')
+
+    def handle(self, *args, **options):
+        if not options['files'] and not options['binance']:
+            raise CommandError('Give dump files to import or --binance')
+
+        candle_interval = PriceRetentionService().compaction_interval() if options['candles'] else None
+        try:
+            backfill = PriceHistoryBackfill(
+                options['symbol'],
+                batch_size=options['batch_size'],
+                checkpoint_path=options['checkpoint'],
+                candle_interval=candle_interval
+            )
+        except Cryptocurrency.DoesNotExist:
+            raise CommandError(f"Unknown cryptocurrency {options['symbol']}")
+
+        for path in options['files']:
+            self.stdout.write(f'Importing {path}...')
+            try:
+                self._report(backfill.import_file(path))
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Failed to import {path}: {e}')
+
+        if options['binance']:
+            end_ms = to_millis(options['end']) if options['end'] else int(time.time() * 1000)
+            start_ms = to_millis(options['start']) if options['start'] else end_ms - 365 * 86400 * 1000
+            self.stdout.write(f"Paging Binance {options['interval']} klines for {backfill.crypto.symbol}...")
+            self._report(backfill.import_binance(start_ms, end_ms, interval=options['interval']))
+
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete; checkpoint saved to {backfill.checkpoint_path}'))
+
+    def _report(self, stats):
+        self.stdout.write(
+            f"{stats['written']:,} rows written ({stats['skipped']:,} already imported) in {stats['batches']} batches, "
+            f"{stats['elapsed']}s, {stats['rows_per_second']:,} rows/s"
+        )
@@ -0,0 +1,80 @@
+# venex_app/management/commands/benchmark_broadcast.py
+import time
+import asyncio
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from venex_app.consumers import PriceConsumer
+from venex_app.services.price_broadcaster import price_snapshot_message
+from venex_app.services.ws_broadcast import frame_event
+
+
+class _Subscriber(PriceConsumer):
+    """PriceConsumer whose socket writes are counted instead of sent"""
+
+    def __init__(self):
+        super().__init__()
+        self.frames = 0
+
+    async def send(self, text_data=None, bytes_data=None, close=False, conflate_key=None, message=None):
+        self.frames += 1
+
+
+class Command(BaseCommand):
+    help = 'Measure CPU per price broadcast with per-socket json.dumps versus serialize-once frames'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--rounds', type=int, default=20, help='Broadcasts timed per case')
+        parser.add_argument('--layer', action='store_true',
+                            help='Route through the configured channel layer instead of calling handlers directly '
+                                 '(use with channels_redis; the in-memory layer scans every channel per receive)')
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        self.stdout.write(f"{'subscribers':>12}{'path':>16}{'CPU ms/broadcast':>18}{'CPU us/socket':>15}")
+        for count in options['subscribers']:
+            subscribers = [_Subscriber() for _ in range(count)]
+            layer = await self._join(subscribers) if options['layer'] else None
+            for path in ('per-socket', 'serialize-once'):
+                cpu = await self._time(path, subscribers, layer, options['rounds'])
+                self.stdout.write(f'{count:>12,}{path:>16}{cpu * 1000:>18.2f}{cpu / count * 1e6:>15.2f}')
+            if layer:
+                for subscriber in subscribers:
+                    await layer.group_discard('benchmark.broadcast', subscriber.channel_name)
+
+    async def _join(self, subscribers):
+        layer = get_channel_layer()
+        for subscriber in subscribers:
+            subscriber.channel_layer = layer
+            subscriber.channel_name = await layer.new_channel()
+            await layer.group_add('benchmark.broadcast', subscriber.channel_name)
+        return layer
+
+    async def _time(self, path, subscribers, layer, rounds):
+        """Mean process CPU seconds per broadcast, producer serialization included"""
+        data = {
+            'price': 67123.45, 'change_24h': 812.3, 'change_percentage_24h': 1.22,
+            'volume': 28123456789.0, 'market_cap': 1321987654321.0, 'last_updated': timezone.now().isoformat()
+        }
+        total = 0.0
+        for _ in range(rounds):
+            started = time.process_time()
+            message = price_snapshot_message('BTC', 1, data)
+            if path == 'per-socket':
+                # Legacy shape: the event is the message and every consumer json.dumps() it
+                event, handler = message, 'price_update'
+            else:
+                event, handler = frame_event(message), 'broadcast_frame'
+
+            if layer:
+                await layer.group_send('benchmark.broadcast', event)
+                for subscriber in subscribers:
+                    await getattr(subscriber, handler)(await layer.receive(subscriber.channel_name))
+            else:
+                for subscriber in subscribers:
+                    await getattr(subscriber, handler)(event)
+            total += time.process_time() - started
+        return total / rounds
@@ -0,0 +1,122 @@
+# venex_app/management/commands/benchmark_price_history.py
+import time
+import uuid
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.utils import timezone
+from venex_app.models import Cryptocurrency, time_ordered_uuid
+
+
+def _bench_model(name, pk_default, indexes):
+    """Throwaway copy of PriceHistory's columns in its own table"""
+    meta = type('Meta', (), {
+        'app_label': 'venex_app',
+        'db_table': f'bench_{name}',
+        'managed': False,
+        'indexes': indexes,
+    })
+    return type(f'Bench{name.title().replace("_", "")}', (models.Model,), {
+        '__module__': __name__,
+        'Meta': meta,
+        'id': models.UUIDField(primary_key=True, default=pk_default),
+        'cryptocurrency': models.ForeignKey(Cryptocurrency, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'),
+        'price': models.DecimalField(max_digits=20, decimal_places=8),
+        'volume': models.DecimalField(max_digits=30, decimal_places=2),
+        'market_cap': models.DecimalField(max_digits=30, decimal_places=2, default=0),
+        'timestamp': models.DateTimeField(),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Compare insert and range-query throughput of the old and new price_history layouts on seeded tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000, help='Rows to seed per layout')
+        parser.add_argument('--coins', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--queries', type=int, default=200, help='Range queries to time per layout')
+        parser.add_argument('--range-days', type=int, default=7, help='Width of each range query')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark tables')
+
+    def handle(self, *args, **options):
+        layouts = [
+            # Before: random uuid4 keys, only the FK index on cryptocurrency
+            ('price_history_before', _bench_model('price_history_before', uuid.uuid4, [])),
+            # After: time-ordered keys and the (cryptocurrency, timestamp) index
+            ('price_history_after', _bench_model('price_history_after', time_ordered_uuid, [
+                models.Index(fields=['cryptocurrency', 'timestamp'], include=['price', 'volume'], name='bench_ph_crypto_ts_idx'),
+            ])),
+        ]
+        coins = [uuid.uuid4() for _ in range(options['coins'])]
+        # Seed spans one point per minute per coin, ending now
+        span = timedelta(minutes=options['rows'] // options['coins'])
+
+        results = []
+        for name, model in layouts:
+            with connection.schema_editor() as schema_editor:
+                schema_editor.create_model(model)
+            try:
+                insert_rate = self._seed(model, coins, span, options)
+                query_stats = self._query(model, coins, span, options)
+                results.append((name, insert_rate, query_stats))
+            finally:
+                if not options['keep']:
+                    with connection.schema_editor() as schema_editor:
+                        schema_editor.delete_model(model)
+
+        self.stdout.write(f"{'layout':<24}{'insert rows/s':>15}{'queries/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, insert_rate, (rate, p50, p95) in results:
+            self.stdout.write(f"{name:<24}{insert_rate:>15,.0f}{rate:>12,.1f}{p50:>10.2f}{p95:>10.2f}")
+
+    def _seed(self, model, coins, span, options):
+        """Insert rows in time order, as ingestion does; returns rows/second"""
+        end = timezone.now()
+        start = end - span
+        per_coin = options['rows'] // len(coins)
+        batch = []
+        inserted = 0
+        started = time.perf_counter()
+        for minute in range(per_coin):
+            moment = start + timedelta(minutes=minute)
+            for coin in coins:
+                batch.append(model(
+                    id=model._meta.pk.default(),
+                    cryptocurrency_id=coin,
+                    price=random.uniform(1, 70000),
+                    volume=random.uniform(0, 1e9),
+                    timestamp=moment
+                ))
+            if len(batch) >= options['batch_size']:
+                model.objects.bulk_create(batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            inserted += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{model._meta.db_table}: seeded {inserted:,} rows in {elapsed:.1f}s')
+        return inserted / elapsed
+
+    def _query(self, model, coins, span, options):
+        """Time chart-style range scans; returns (queries/s, p50 ms, p95 ms)"""
+        end = timezone.now()
+        width = timedelta(days=options['range_days'])
+        timings = []
+        for _ in range(options['queries']):
+            range_end = end - random.random() * max(span - width, timedelta(0))
+            started = time.perf_counter()
+            list(model.objects.filter(
+                cryptocurrency_id=random.choice(coins),
+                timestamp__gte=range_end - width,
+                timestamp__lt=range_end
+            ).order_by('timestamp').values_list('timestamp', 'price', 'volume'))
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        total = sum(timings) / 1000
+        return (
+            len(timings) / total if total else 0,
+            timings[len(timings) // 2],
+            timings[int(len(timings) * 0.95) - 1]
+        )
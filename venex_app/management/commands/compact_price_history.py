@@ -0,0 +1,29 @@
+# venex_app/management/commands/compact_price_history.py
+from django.core.management.base import BaseCommand
+from venex_app.services.retention_service import PriceRetentionService
+
+
+class Command(BaseCommand):
+    help = 'Compact old price history into candles and prune data past PRICE_HISTORY_RETENTION (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows per transaction (default: PRICE_HISTORY_COMPACTION_BATCH)')
+        parser.add_argument('--max-batches', type=int, help='Stop each phase after this many batches')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be compacted or pruned')
+
+    def handle(self, *args, **options):
+        service = PriceRetentionService(batch_size=options['batch_size'], pause=options['sleep'])
+        policies = ', '.join(
+            f"{series} {'forever' if days is None else f'{days}d'}" for series, days in service.policies.items()
+        )
+        self.stdout.write(f'Retention policy: {policies}')
+
+        stats = service.run(dry_run=options['dry_run'], max_batches=options['max_batches'])
+
+        pruned = ', '.join(f'{interval}: {count}' for interval, count in stats['candles_pruned'].items())
+        verb = 'Would compact' if options['dry_run'] else 'Compacted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['raw_compacted']} raw rows into {stats['candles_written']} candles; "
+            f"candles pruned ({pruned}) in {stats['batches']} batches"
+        ))
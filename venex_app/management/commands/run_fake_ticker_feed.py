@@ -0,0 +1,28 @@
+# venex_app/management/commands/run_fake_ticker_feed.py
+from aiohttp import web
+from django.core.management.base import BaseCommand
+from venex_app.services.fake_ticker_feed import FakeTickerFeed
+
+
+class Command(BaseCommand):
+    help = 'Serve a local fake exchange ticker WebSocket for testing and benchmarking run_price_stream'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9001)
+        parser.add_argument('--rate', type=float, default=1.0, help='Ticker rounds per second (0 = as fast as possible)')
+        parser.add_argument('--replay', help='JSONL capture to replay instead of a random walk')
+        parser.add_argument('--once', action='store_true', help='Close connections after one pass over the replay file')
+
+    def handle(self, *args, **options):
+        feed = FakeTickerFeed(
+            rate=options['rate'],
+            replay_path=options['replay'],
+            loop_replay=not options['once']
+        )
+        self.stdout.write(
+            f"Fake ticker feed on ws://{options['host']}:{options['port']}/stream "
+            f"({'replaying ' + options['replay'] if options['replay'] else 'random walk'}, rate {options['rate']}/s)"
+        )
+        web.run_app(feed.make_app(), host=options['host'], port=options['port'], print=None)
+        self.stdout.write(self.style.SUCCESS(f"Fake ticker feed stopped: {feed.stats}"))
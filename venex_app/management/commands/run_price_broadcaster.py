@@ -0,0 +1,29 @@
+# venex_app/management/commands/run_price_broadcaster.py
+import signal
+import asyncio
+from django.core.management.base import BaseCommand
+from venex_app.services.price_broadcaster import PriceBroadcaster
+
+
+class Command(BaseCommand):
+    help = 'Run the central price broadcaster that fans stored prices out to PriceConsumer connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Seconds between ticks (default: PRICE_BROADCAST_INTERVAL)')
+        parser.add_argument('--iterations', type=int, help='Stop after this many ticks')
+
+    def handle(self, *args, **options):
+        broadcaster = PriceBroadcaster(interval=options['interval'])
+        self.stdout.write(f'Broadcasting prices every {broadcaster.interval}s...')
+        asyncio.run(self._run(broadcaster, options['iterations']))
+        stats = broadcaster.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Price broadcaster stopped after {stats['ticks']} ticks: {stats['published']} updates published, "
+            f"{stats['standby_ticks']} ticks on standby"
+        ))
+
+    async def _run(self, broadcaster, iterations):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, broadcaster.stop)
+        await broadcaster.run(iterations=iterations)
@@ -0,0 +1,47 @@
+# venex_app/management/commands/run_price_ingestion.py
+import signal
+import asyncio
+from django.core.management.base import BaseCommand
+from venex_app.services.ingestion_service import PriceIngestionWorker
+from venex_app.services.price_broadcaster import PriceBroadcaster
+
+
+class Command(BaseCommand):
+    help = 'Run the scheduled price ingestion worker (owns all price provider traffic)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, help='Seconds between refreshes (default: CRYPTO_INGESTION_INTERVAL)')
+        parser.add_argument('--iterations', type=int, help='Stop after this many refreshes')
+        parser.add_argument('--broadcast', action='store_true',
+                            help='Also run the central price broadcaster in this process')
+
+    def handle(self, *args, **options):
+        worker = PriceIngestionWorker(interval=options['interval'])
+        self.stdout.write(f'Starting price ingestion every {worker.interval}s...')
+        broadcaster = PriceBroadcaster() if options['broadcast'] else None
+        asyncio.run(self._run(worker, options['iterations'], broadcaster))
+        self.stdout.write(
+            self.style.SUCCESS(f'Price ingestion stopped after {worker.ticks} refreshes ({worker.failures} failed)')
+        )
+
+    async def _run(self, worker, iterations, broadcaster=None):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            if broadcaster:
+                loop.add_signal_handler(sig, self._stop_all, worker, broadcaster)
+            else:
+                loop.add_signal_handler(sig, worker.stop)
+        if not broadcaster:
+            await worker.run(iterations=iterations)
+            return
+
+        broadcast_task = asyncio.ensure_future(broadcaster.run())
+        try:
+            await worker.run(iterations=iterations)
+        finally:
+            broadcaster.stop()
+            await broadcast_task
+
+    def _stop_all(self, worker, broadcaster):
+        worker.stop()
+        broadcaster.stop()
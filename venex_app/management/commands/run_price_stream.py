@@ -0,0 +1,39 @@
+# venex_app/management/commands/run_price_stream.py
+import signal
+import asyncio
+from django.core.management.base import BaseCommand
+from venex_app.services.stream_ingestion import TickerStreamIngestor
+
+
+class Command(BaseCommand):
+    help = 'Ingest prices from an exchange ticker WebSocket stream into the database; run_price_broadcaster publishes them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Stream base URL (default: CRYPTO_STREAM_URL), e.g. ws://127.0.0.1:9001/stream')
+        parser.add_argument('--flush-interval', type=float, help='Seconds between database flushes')
+        parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+        parser.add_argument('--max-messages', type=int, help='Stop after this many stream messages')
+        parser.add_argument('--record', help='Append raw stream messages to this JSONL file for replay')
+
+    def handle(self, *args, **options):
+        ingestor = TickerStreamIngestor(
+            url=options['url'],
+            flush_interval=options['flush_interval'],
+            record_path=options['record']
+        )
+        self.stdout.write(f'Streaming prices from {ingestor.stream_url()}')
+        asyncio.run(self._run(ingestor, options))
+
+        stats = ingestor.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Stream stopped after {stats.get('elapsed', 0)}s: {stats['messages']} messages "
+            f"({stats.get('messages_per_second', 0)}/s), {stats['ticks']} ticks, "
+            f"{stats['flushes']} flushes, {stats['rows_written']} rows written, {stats['suppressed']} unchanged ticks suppressed, "
+            f"{stats['reconnects']} reconnects"
+        ))
+
+    async def _run(self, ingestor, options):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, ingestor.stop)
+        await ingestor.run(duration=options['duration'], max_messages=options['max_messages'])
@@ -4,6 +4,9 @@ from venex_app.services.crypto_api_service import crypto_service
 
 class Command(BaseCommand):
     help = 'Update cryptocurrency prices from external APIs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timings', action='store_true', help='Print per-provider latency stats')
     
     def handle(self, *args, **options):
         self.stdout.write('Updating cryptocurrency prices...')
@@ -13,7 +16,18 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS('Successfully updated cryptocurrency prices')
             )
+            stats = crypto_service.last_refresh_stats
+            self.stdout.write(
+                f"{stats['changed']} of {stats['received']} symbols changed, {stats['suppressed']} suppressed"
+            )
         else:
             self.stdout.write(
                 self.style.ERROR('Failed to update cryptocurrency prices')
-            )
\ No newline at end of file
+            )
+
+        if options['timings']:
+            for name, stats in crypto_service.get_provider_timings().items():
+                self.stdout.write(
+                    f"{name}: last={stats['last_ms']}ms avg={stats['avg_ms']}ms "
+                    f"max={stats['max_ms']}ms calls={stats['calls']} failures={stats['failures']}"
+                )
\ No newline at end of file
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:55
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venex_app', '0010_admin_bank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCandle',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('interval', models.CharField(choices=[('1m', '1 Minute'), ('5m', '5 Minutes'), ('1h', '1 Hour'), ('1d', '1 Day')], max_length=3)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('high', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('low', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('close', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('volume', models.DecimalField(decimal_places=2, default=0.0, max_digits=30)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cryptocurrency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candles', to='venex_app.cryptocurrency')),
+            ],
+            options={
+                'db_table': 'price_candles',
+                'ordering': ['bucket_start'],
+                'unique_together': {('cryptocurrency', 'interval', 'bucket_start')},
+            },
+        ),
+    ]
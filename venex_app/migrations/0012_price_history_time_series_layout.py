@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:58
+
+import venex_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venex_app', '0011_pricecandle'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pricecandle',
+            name='id',
+            field=models.UUIDField(default=venex_app.models.time_ordered_uuid, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='pricehistory',
+            name='id',
+            field=models.UUIDField(default=venex_app.models.time_ordered_uuid, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['cryptocurrency', 'timestamp'], include=('price', 'volume'), name='price_history_crypto_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+import venex_app.models
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 5000
+
+
+def rekey_price_history(apps, schema_editor):
+    """
+    Replace random uuid4 keys with time-ordered ones derived from each row's
+    timestamp. Runs online in short batches: each batch copies its rows under
+    new keys and deletes the originals in one small transaction, so readers
+    always see every point exactly once and no long lock is held.
+    Already rekeyed rows (version 7) are skipped, so the migration can be
+    interrupted and re-run.
+    """
+    PriceHistory = apps.get_model('venex_app', 'PriceHistory')
+    db_alias = schema_editor.connection.alias
+    fields = ['cryptocurrency_id', 'price', 'volume', 'market_cap', 'timestamp', 'created_at']
+    # Copies keep their original created_at (historical model only)
+    PriceHistory._meta.get_field('created_at').auto_now_add = False
+    last = None
+    while True:
+        rows = PriceHistory.objects.using(db_alias).order_by('timestamp', 'id')
+        if last:
+            rows = rows.filter(
+                models.Q(timestamp__gt=last[0]) | models.Q(timestamp=last[0], id__gt=last[1])
+            )
+        rows = list(rows.values('id', *fields)[:BATCH_SIZE])
+        if not rows:
+            break
+        last = (rows[-1]['timestamp'], rows[-1]['id'])
+
+        stale = [row for row in rows if row['id'].version != 7]
+        if not stale:
+            continue
+        with transaction.atomic(using=db_alias):
+            PriceHistory.objects.using(db_alias).bulk_create([
+                PriceHistory(id=venex_app.models.time_ordered_uuid(row['timestamp']), **{field: row[field] for field in fields})
+                for row in stale
+            ])
+            PriceHistory.objects.using(db_alias).filter(id__in=[row['id'] for row in stale]).delete()
+
+
+class Migration(migrations.Migration):
+
+    # Each batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('venex_app', '0012_price_history_time_series_layout'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_price_history, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 from django.utils import timezone
+import os
+import time
 import uuid
+import hashlib
 from django.core.validators import MinValueValidator
 from .choices import *
 from datetime import timedelta
@@ -233,6 +236,21 @@ class UserActivity(models.Model):
 # ------------------------
 # Cryptocurrency Data
 # ------------------------
+def time_ordered_uuid(moment=None, seed=None):
+    """
+    UUIDv7-layout id: 48-bit Unix milliseconds followed by random bits, so
+    rows written in time order append to the primary key index instead of
+    landing on random pages. With a `seed` (bytes) the low bits are derived
+    from it, making the id deterministic for idempotent imports.
+    """
+    millis = int((moment.timestamp() if moment else time.time()) * 1000)
+    tail = hashlib.blake2b(seed, digest_size=10).digest() if seed is not None else os.urandom(10)
+    value = (millis & ((1 << 48) - 1)) << 80 | int.from_bytes(tail, 'big')
+    value = value & ~(0xF << 76) | (0x7 << 76)  # version 7
+    value = value & ~(0x3 << 62) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
 class Cryptocurrency(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     symbol = models.CharField(max_length=10, unique=True)
@@ -263,7 +281,7 @@ class Cryptocurrency(models.Model):
 # Price History
 # ------------------------
 class PriceHistory(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=time_ordered_uuid, editable=False)
     cryptocurrency = models.ForeignKey(Cryptocurrency, on_delete=models.CASCADE, related_name='price_history')
     price = models.DecimalField(max_digits=20, decimal_places=8)
     volume = models.DecimalField(max_digits=30, decimal_places=2)
@@ -274,11 +292,49 @@ class PriceHistory(models.Model):
     class Meta:
         db_table = 'price_history'
         ordering = ['-timestamp']
+        indexes = [
+            # Chart/range queries filter by coin and time; the included columns
+            # make them index-only where the backend supports it (PostgreSQL)
+            models.Index(
+                fields=['cryptocurrency', 'timestamp'],
+                include=['price', 'volume'],
+                name='price_history_crypto_ts_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.cryptocurrency.symbol} - ${self.price} at {self.timestamp}"
 
 
+class PriceCandle(models.Model):
+    INTERVAL_CHOICES = [
+        ('1m', '1 Minute'),
+        ('5m', '5 Minutes'),
+        ('1h', '1 Hour'),
+        ('1d', '1 Day'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=time_ordered_uuid, editable=False)
+    cryptocurrency = models.ForeignKey(Cryptocurrency, on_delete=models.CASCADE, related_name='candles')
+    interval = models.CharField(max_length=3, choices=INTERVAL_CHOICES)
+    bucket_start = models.DateTimeField()
+    open = models.DecimalField(max_digits=20, decimal_places=8)
+    high = models.DecimalField(max_digits=20, decimal_places=8)
+    low = models.DecimalField(max_digits=20, decimal_places=8)
+    close = models.DecimalField(max_digits=20, decimal_places=8)
+    # 24h rolling volume reported at the bucket's close
+    volume = models.DecimalField(max_digits=30, decimal_places=2, default=0.0) # type: ignore
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'price_candles'
+        unique_together = ['cryptocurrency', 'interval', 'bucket_start']
+        ordering = ['bucket_start']
+
+    def __str__(self):
+        return f"{self.cryptocurrency.symbol} {self.interval} candle at {self.bucket_start}"
+
+
 # ------------------------
 # Transactions
 # ------------------------
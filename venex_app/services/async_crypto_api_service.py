@@ -0,0 +1,259 @@
+# venex_app/services/async_crypto_api_service.py
+import time
+import asyncio
+import logging
+import functools
+import aiohttp
+from channels.db import database_sync_to_async
+from django.conf import settings
+from .crypto_api_service import crypto_service, historical_cache, COINGECKO_IDS, PRICE_HISTORY_RANGES
+from .candle_service import candle_service
+from .price_series import price_series_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCryptoDataService:
+    """
+    asyncio counterpart of CryptoDataService for Channels consumers
+
+    Requests go out on one pooled aiohttp session per event loop, so awaiting
+    a provider never ties up an executor thread. Parsing, the historical chart
+    cache, timing stats and circuit breakers are shared with the sync service.
+    """
+
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, sync_service=None):
+        self.sync_service = sync_service or crypto_service
+        self.provider_health = self.sync_service.provider_health
+        self.http_pool_size = getattr(settings, 'CRYPTO_HTTP_POOL_SIZE', 10)
+        self.http_retries = getattr(settings, 'CRYPTO_HTTP_RETRIES', 2)
+        self._session = None
+        self._session_loop = None
+
+    async def get_session(self):
+        """Shared keep-alive client session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            await self._detach_session()
+            connector = aiohttp.TCPConnector(limit=self.http_pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'Accept': 'application/json'}
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def _detach_session(self):
+        """Close the current session, on its own loop if that is not the running one"""
+        session, loop = self._session, self._session_loop
+        self._session = self._session_loop = None
+        if session is None or session.closed:
+            return
+        if loop is asyncio.get_running_loop():
+            await session.close()
+        elif loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            # The owning loop is gone, so nothing can await the close; drop the
+            # connector's transports synchronously instead of leaking them
+            connector = session.connector
+            session.detach()
+            if connector is not None:
+                connector._close()
+
+    async def close(self):
+        await self._detach_session()
+
+    async def _get_json(self, url, params=None, headers=None, timeout=10, retries=None):
+        """
+        GET a JSON document, retrying connection errors and 5xx with backoff
+
+        Args:
+            retries: retry budget, defaults to http_retries; fallback callers pass 0
+
+        Returns:
+            tuple: (status, parsed JSON or None, response headers)
+        """
+        session = await self.get_session()
+        retries = self.http_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                async with session.get(
+                    url, params=params, headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    if response.status in self.RETRY_STATUSES and attempt < retries:
+                        await asyncio.sleep(0.3 * (2 ** attempt))
+                        continue
+                    if response.status != 200:
+                        return response.status, None, response.headers
+                    return response.status, await response.json(content_type=None), response.headers
+            except aiohttp.ClientConnectionError:
+                if attempt >= retries:
+                    raise
+                await asyncio.sleep(0.3 * (2 ** attempt))
+        return None, None, {}
+
+    @staticmethod
+    async def _health(method, *args, **kwargs):
+        """Run a provider_health call (shared-cache round trips) off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args, **kwargs))
+
+    async def _timed_provider_call(self, provider, *args):
+        """Await a provider unless its circuit is open, recording latency and outcome"""
+        key = self.sync_service._provider_key(provider)
+        admitted = await self._health(self.provider_health.allow_request, key)
+        if not admitted:
+            logger.info(f"Skipping {provider.__name__}: circuit open")
+            return None
+
+        started = time.monotonic()
+        # A CancelledError (lost hedged race) propagates without counting as a failure
+        data = await provider(*args)
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.sync_service._record_provider_timing(provider.__name__, elapsed_ms, bool(data))
+        # Health state lives in Redis; write it off the event loop and don't wait
+        if data:
+            record = self.provider_health.record_success
+        else:
+            record = functools.partial(self.provider_health.record_failure, probe=admitted == self.provider_health.PROBE)
+        asyncio.get_running_loop().run_in_executor(None, record, key, elapsed_ms)
+        return data
+
+    async def get_price_history(self, symbol, range_param='1d', max_points=None):
+        """Get price history for different time ranges as downsampled chart columns"""
+        try:
+            days = PRICE_HISTORY_RANGES.get(range_param, 30)
+            series = await price_series_cache.aget(symbol.upper(), days, self.get_historical_data)
+            return series.chart_payload(days, max_points)
+        except Exception as e:
+            logger.error(f"Error getting price history for {symbol}: {e}")
+            return {'error': str(e)}
+
+    async def get_historical_data(self, symbol, days=30):
+        """Get historical price data, served from the shared two-tier cache when warm"""
+        symbol = symbol.upper()
+        ttl = self.sync_service._historical_cache_ttl(days)
+        return await historical_cache.aget_or_load(
+            f'{symbol}:{days}',
+            lambda: self._fetch_historical_data(symbol, days),
+            ttl,
+            ttl * getattr(settings, 'CRYPTO_HISTORY_STALE_FACTOR', 4)
+        )
+
+    async def _fetch_historical_data(self, symbol, days):
+        """Get historical price data from stored candles, with provider fallback"""
+        candles = await database_sync_to_async(candle_service.get_history)(symbol, days)
+        if candle_service.covers(candles, days):
+            return candles
+
+        # Same budget as the sync path: once the deadline has passed the
+        # stored data is served instead of trying the next provider
+        deadline = time.monotonic() + self.sync_service.history_deadline
+        for provider in (
+            self._get_historical_from_coingecko,
+            self._get_historical_from_cryptocompare,
+            self._get_historical_from_binance
+        ):
+            if time.monotonic() >= deadline:
+                logger.warning(f"Historical data deadline reached for {symbol}; serving stored data")
+                break
+            historical_data = await self._timed_provider_call(provider, symbol, days)
+            if historical_data:
+                return historical_data
+
+        # Final fallback to whatever is stored
+        if candles:
+            return candles
+        return await database_sync_to_async(self.sync_service._get_historical_from_database)(symbol, days)
+
+    async def _get_historical_from_coingecko(self, symbol, days):
+        """CoinGecko implementation without interval parameter"""
+        try:
+            coin_id = COINGECKO_IDS.get(symbol.upper())
+            if not coin_id:
+                return None
+
+            status, data, headers = await self._get_json(
+                f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart",
+                params={'vs_currency': 'usd', 'days': days},
+                headers=self._coingecko_headers(),
+                **self._fallback_request()
+            )
+            if status != 200:
+                logger.warning(f"CoinGecko historical data error: {status}")
+                if status == 429:
+                    await self._health(self.provider_health.trip, 'coingecko', self._retry_after(headers))
+                return None
+
+            return [
+                {'timestamp': timestamp / 1000, 'price': price, 'volume': 0}
+                for timestamp, price in data.get('prices', [])
+            ]
+        except Exception as e:
+            logger.error(f"CoinGecko historical data error for {symbol}: {e}")
+            return None
+
+    async def _get_historical_from_cryptocompare(self, symbol, days):
+        """CryptoCompare fallback implementation"""
+        try:
+            status, data, _ = await self._get_json(
+                "https://min-api.cryptocompare.com/data/v2/histoday",
+                params={'fsym': symbol, 'tsym': 'USD', 'limit': min(days, 2000)},
+                **self._fallback_request()
+            )
+            if status == 200:
+                return [
+                    {'timestamp': item['time'], 'price': item['close'], 'volume': item['volumeto']}
+                    for item in data.get('Data', {}).get('Data', [])
+                ]
+        except Exception as e:
+            logger.error(f"CryptoCompare historical data error for {symbol}: {e}")
+        return None
+
+    async def _get_historical_from_binance(self, symbol, days):
+        """Binance fallback implementation"""
+        try:
+            if symbol == 'USDT':
+                return None  # Binance doesn't have USDT charts
+
+            interval = '1d' if days > 7 else '1h'
+            status, data, _ = await self._get_json(
+                "https://api.binance.com/api/v3/klines",
+                params={
+                    'symbol': f'{symbol}USDT',
+                    'interval': interval,
+                    'limit': min(days * (24 if interval == '1h' else 1), 1000)
+                },
+                **self._fallback_request()
+            )
+            if status == 200:
+                return [
+                    {'timestamp': kline[0] / 1000, 'price': float(kline[4]), 'volume': float(kline[5])}
+                    for kline in data
+                ]
+        except Exception as e:
+            logger.error(f"Binance historical data error for {symbol}: {e}")
+        return None
+
+    def _fallback_request(self):
+        """History providers are fallbacks: one short attempt each, like the sync fallback_session"""
+        return {'timeout': self.sync_service.fallback_timeout, 'retries': 0}
+
+    def _coingecko_headers(self):
+        headers = {}
+        if self.sync_service.coingecko_api_key:
+            headers['x-cg-demo-api-key'] = self.sync_service.coingecko_api_key
+        return headers
+
+    def _retry_after(self, headers):
+        try:
+            return int(headers.get('Retry-After', ''))
+        except (TypeError, ValueError):
+            return None
+
+
+# Global instance
+async_crypto_service = AsyncCryptoDataService()
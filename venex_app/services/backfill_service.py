@@ -0,0 +1,262 @@
+# venex_app/services/backfill_service.py
+import os
+import csv
+import json
+import time
+import logging
+from datetime import datetime, timezone as dt_timezone
+from django.db import transaction
+from ..models import Cryptocurrency, PriceHistory, time_ordered_uuid
+from .candle_service import candle_service
+from .crypto_api_service import crypto_service
+
+logger = logging.getLogger(__name__)
+
+BINANCE_KLINES_URL = 'https://api.binance.com/api/v3/klines'
+BINANCE_KLINES_LIMIT = 1000
+
+
+def to_millis(value):
+    """Epoch seconds/milliseconds/microseconds or an ISO 8601 string -> epoch milliseconds"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=dt_timezone.utc)
+        return int(moment.timestamp() * 1000)
+    if number > 1e14:
+        # Newer Binance dumps use microseconds
+        return int(number / 1000)
+    return int(number if number > 1e11 else number * 1000)
+
+
+def _kline_point(kline):
+    # [open_time, open, high, low, close, volume, close_time, ...]; the kline
+    # volume is per interval in the base asset, not the 24h USD figure stored
+    # with each point, so it is dropped like the CoinGecko import does
+    return to_millis(kline[0]), kline[4], 0, 0
+
+
+def iter_json_points(path):
+    """
+    Points from a JSON dump: Binance klines (list of lists), CoinGecko
+    market_chart ({'prices', 'total_volumes', 'market_caps'}) or, for
+    .jsonl/.ndjson files, one kline or {'timestamp', 'price', ...} per line
+    """
+    if path.endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield _record_point(json.loads(line))
+        return
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'prices' in data:
+        volumes = dict((int(ms), volume) for ms, volume in data.get('total_volumes', []))
+        market_caps = dict((int(ms), cap) for ms, cap in data.get('market_caps', []))
+        for ms, price in data['prices']:
+            yield int(ms), price, volumes.get(int(ms), 0), market_caps.get(int(ms), 0)
+        return
+    for record in data:
+        yield _record_point(record)
+
+
+def _record_point(record):
+    if isinstance(record, (list, tuple)):
+        return _kline_point(record)
+    timestamp = record.get('timestamp', record.get('time', record.get('open_time')))
+    price = record.get('price', record.get('close'))
+    return to_millis(timestamp), price, record.get('volume', 0) or 0, record.get('market_cap', 0) or 0
+
+
+def iter_csv_points(path):
+    """
+    Points from a CSV dump: headerless Binance kline exports, or files with a
+    header naming timestamp/open_time/time/date, price/close, volume, market_cap
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        try:
+            float(first[0])
+        except ValueError:
+            header = [column.strip().lower() for column in first]
+
+            def column(*names):
+                for name in names:
+                    if name in header:
+                        return header.index(name)
+                return None
+
+            ts_col = column('timestamp', 'open_time', 'time', 'date')
+            price_col = column('price', 'close')
+            volume_col = column('volume', 'total_volume')
+            cap_col = column('market_cap')
+            if ts_col is None or price_col is None:
+                raise ValueError(f'{path}: CSV header needs a timestamp and a price/close column')
+            for row in reader:
+                if not row:
+                    continue
+                yield (
+                    to_millis(row[ts_col]),
+                    row[price_col],
+                    row[volume_col] if volume_col is not None else 0,
+                    row[cap_col] if cap_col is not None else 0
+                )
+            return
+
+        yield _kline_point(first)
+        for row in reader:
+            if row:
+                yield _kline_point(row)
+
+
+class PriceHistoryBackfill:
+    """
+    Bulk historical import into PriceHistory
+
+    Points are inserted in large bulk_create batches with deterministic
+    time-ordered ids, so re-importing a range is idempotent (duplicates are
+    ignored by primary key). After every committed batch the last imported
+    timestamp per source is written to a checkpoint file; a rerun skips
+    everything up to it.
+    """
+
+    def __init__(self, symbol, batch_size=10000, checkpoint_path=None, candle_interval=None):
+        self.crypto = Cryptocurrency.objects.get(symbol=symbol.upper())
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path or f'.backfill_{self.crypto.symbol.lower()}.json'
+        self.candle_interval = candle_interval
+        self.checkpoints = self._load_checkpoints()
+
+    def import_file(self, path):
+        """Import a local JSON/JSONL/CSV dump"""
+        reader = iter_csv_points if path.lower().endswith('.csv') else iter_json_points
+        return self.run(f'file:{os.path.abspath(path)}', reader(path))
+
+    def import_binance(self, start_ms, end_ms=None, interval='1m', pause=0.2):
+        """Page through Binance klines for the symbol"""
+        source = f'binance:{self.crypto.symbol}:{interval}'
+        resume_from = self.checkpoints.get(source)
+        if resume_from is not None:
+            start_ms = max(start_ms, resume_from + 1)
+        return self.run(source, self._binance_pages(start_ms, end_ms or int(time.time() * 1000), interval, pause))
+
+    def run(self, source, points):
+        """
+        Insert points (ms, price, volume, market_cap) for one source
+
+        Returns:
+            dict: read/written/skipped counts, batches and rows per second
+        """
+        resume_from = self.checkpoints.get(source)
+        if resume_from is not None:
+            logger.info(f"Resuming {source} after {resume_from}")
+
+        stats = {'read': 0, 'written': 0, 'skipped': 0, 'batches': 0}
+        started = time.perf_counter()
+        batch = []
+        for ms, price, volume, market_cap in points:
+            stats['read'] += 1
+            if resume_from is not None and ms <= resume_from:
+                stats['skipped'] += 1
+                continue
+            batch.append((ms, price, volume, market_cap))
+            if len(batch) >= self.batch_size:
+                stats['written'] += self._flush(source, batch)
+                stats['batches'] += 1
+                batch = []
+        if batch:
+            stats['written'] += self._flush(source, batch)
+            stats['batches'] += 1
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        stats['elapsed'] = round(elapsed, 2)
+        stats['rows_per_second'] = round(stats['written'] / elapsed)
+        logger.info(f"Backfill of {source} finished: {stats}")
+        return stats
+
+    def _flush(self, source, batch):
+        crypto_id = self.crypto.id
+        rows = []
+        candle_points = []
+        for ms, price, volume, market_cap in batch:
+            moment = datetime.fromtimestamp(ms / 1000, tz=dt_timezone.utc)
+            rows.append(PriceHistory(
+                id=time_ordered_uuid(moment, seed=f'{crypto_id}:{ms}'.encode()),
+                cryptocurrency_id=crypto_id,
+                price=price,
+                volume=volume or 0,
+                market_cap=market_cap or 0,
+                timestamp=moment
+            ))
+            if self.candle_interval:
+                candle_points.append((crypto_id, moment, price, volume))
+
+        with transaction.atomic():
+            before = self._stored_count(rows)
+            PriceHistory.objects.bulk_create(rows, ignore_conflicts=True)
+            # ignore_conflicts hides which rows were duplicates; count them instead
+            written = self._stored_count(rows) - before
+            if candle_points:
+                # Batches go forward in time, so a bucket split across two
+                # batches gets this batch's points merged in after the last one's
+                candle_service.build_candles(self.candle_interval, candle_points, merge_existing=True)
+
+        last_ms = max(ms for ms, _, _, _ in batch)
+        self.checkpoints[source] = max(last_ms, self.checkpoints.get(source, last_ms))
+        self._save_checkpoints()
+        logger.info(f"Backfilled {written} new {self.crypto.symbol} rows ({len(rows)} read) up to {rows[-1].timestamp}")
+        return written
+
+    def _stored_count(self, rows):
+        return PriceHistory.objects.filter(
+            cryptocurrency_id=self.crypto.id,
+            timestamp__gte=min(row.timestamp for row in rows),
+            timestamp__lte=max(row.timestamp for row in rows)
+        ).count()
+
+    def _binance_pages(self, start_ms, end_ms, interval, pause):
+        session = crypto_service.session
+        pair = f'{self.crypto.symbol}USDT'
+        while start_ms <= end_ms:
+            response = session.get(BINANCE_KLINES_URL, params={
+                'symbol': pair,
+                'interval': interval,
+                'startTime': start_ms,
+                'endTime': end_ms,
+                'limit': BINANCE_KLINES_LIMIT
+            }, headers=crypto_service._binance_headers(), timeout=30)
+            if response.status_code in (418, 429):
+                wait = crypto_service._retry_after(response) or 60
+                logger.warning(f"Binance rate limit during backfill; sleeping {wait}s")
+                time.sleep(wait)
+                continue
+            response.raise_for_status()
+            klines = response.json()
+            if not klines:
+                return
+            for kline in klines:
+                yield _kline_point(kline)
+            start_ms = int(klines[-1][0]) + 1
+            if pause:
+                time.sleep(pause)
+
+    def _load_checkpoints(self):
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_checkpoints(self):
+        # Write-then-rename so an interrupted run never leaves a torn file
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoints, f)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,208 @@
+# venex_app/services/cache_service.py
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db import connection
+from .single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+class TwoTierCache:
+    """
+    In-process LRU in front of the shared Django cache (Redis)
+
+    Every entry carries a fresh-until and a stale-until time. Fresh hits are
+    returned directly, stale hits are returned immediately while a background
+    thread reloads the value (stale-while-revalidate), misses load inline.
+    """
+
+    def __init__(self, prefix, max_entries=256):
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def get_or_load(self, key, loader, ttl, stale_ttl=0):
+        """
+        Get a cached value, calling `loader()` on a miss
+
+        Args:
+            key (str): Cache key, unique within this cache's prefix
+            loader (callable): Returns the value; falsy values are not cached
+            ttl (int): Seconds the value is served as fresh
+            stale_ttl (int): Extra seconds the value is served while refreshing
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = time.time()
+        entry = self._get_local(key)
+        if entry is None:
+            entry = self._get_shared(key)
+            if entry is not None and entry[2] > now:
+                self._set_local(key, entry)
+            else:
+                entry = None
+
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                return value
+            if now < stale_until:
+                self._refresh_in_background(key, loader, ttl, stale_ttl)
+                return value
+
+        return self._load(key, loader, ttl, stale_ttl)
+
+    async def aget_or_load(self, key, loader, ttl, stale_ttl=0):
+        """
+        Async variant of get_or_load for event-loop callers
+
+        `loader` is a coroutine function. Local hits never leave the event loop;
+        stale hits are refreshed in a task and shared-tier writes don't block.
+        """
+        now = time.time()
+        entry = self._get_local(key)
+        if entry is None:
+            try:
+                entry = await cache.aget(self._shared_key(key))
+            except Exception as e:
+                logger.warning(f"Shared cache read failed for {key}: {e}")
+                entry = None
+            if entry is not None and entry[2] > now:
+                self._set_local(key, entry)
+            else:
+                entry = None
+
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                return value
+            if now < stale_until:
+                with self._lock:
+                    refreshing = key in self._refreshing
+                    self._refreshing.add(key)
+                if not refreshing:
+                    asyncio.ensure_future(self._arefresh(key, loader, ttl, stale_ttl))
+                return value
+
+        return await self._aload(key, loader, ttl, stale_ttl)
+
+    async def _aload(self, key, loader, ttl, stale_ttl):
+        # Coalesce misses across workers: one loads, the rest reuse its value
+        loaded = []
+
+        async def load():
+            loaded.append(True)
+            return await loader()
+
+        value = await single_flight.arun(self._shared_key(key), load)
+        # Only the caller that ran the loader stores: a follower's value is
+        # already stored by the leader, or is the previous (stale) result
+        if value and loaded:
+            now = time.time()
+            entry = (value, now + ttl, now + ttl + stale_ttl)
+            self._set_local(key, entry)
+            asyncio.ensure_future(self._aset_shared(key, entry, int(ttl + stale_ttl)))
+        return value
+
+    async def _arefresh(self, key, loader, ttl, stale_ttl):
+        try:
+            await self._aload(key, loader, ttl, stale_ttl)
+        except Exception as e:
+            logger.error(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _aset_shared(self, key, entry, timeout):
+        try:
+            await cache.aset(self._shared_key(key), entry, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {e}")
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        """Store a value in both tiers"""
+        now = time.time()
+        entry = (value, now + ttl, now + ttl + stale_ttl)
+        self._set_local(key, entry)
+        try:
+            cache.set(self._shared_key(key), entry, timeout=int(ttl + stale_ttl))
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {e}")
+
+    def delete(self, key):
+        """Drop a value from both tiers"""
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            cache.delete(self._shared_key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {key}: {e}")
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _load(self, key, loader, ttl, stale_ttl):
+        # Coalesce misses across workers: one loads, the rest reuse its value
+        loaded = []
+
+        def load():
+            loaded.append(True)
+            return loader()
+
+        value = single_flight.run(self._shared_key(key), load)
+        # Only the caller that ran the loader stores: a follower's value is
+        # already stored by the leader, or is the previous (stale) result
+        if value and loaded:
+            self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def _refresh_in_background(self, key, loader, ttl, stale_ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key, loader, ttl, stale_ttl)
+            except Exception as e:
+                logger.error(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                # Loaders may touch the ORM; don't leak this thread's connection
+                connection.close()
+
+        threading.Thread(target=refresh, name=f'cache-refresh-{key}', daemon=True).start()
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+            return entry
+
+    def _set_local(self, key, entry):
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, key):
+        try:
+            return cache.get(self._shared_key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {key}: {e}")
+            return None
+
+    def _shared_key(self, key):
+        return f'{self.prefix}:{key}'
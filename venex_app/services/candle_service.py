@@ -0,0 +1,283 @@
+# venex_app/services/candle_service.py
+import logging
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from ..models import PriceCandle
+
+logger = logging.getLogger(__name__)
+
+# Candle intervals in seconds, finest first; each one rolls up into the next
+CANDLE_INTERVALS = {
+    '1m': 60,
+    '5m': 300,
+    '1h': 3600,
+    '1d': 86400,
+}
+
+
+class CandleService:
+    """
+    Incremental OHLCV candle store
+
+    Ingested ticks are merged into their 1m candle, and every touched candle is
+    merged into the bucket above it (1m -> 5m -> 1h -> 1d), so coarse candles
+    are maintained from finer ones without rescanning raw rows. Each batch
+    costs one select and one upsert regardless of size. Chart reads are a
+    range scan on the (cryptocurrency, interval, bucket_start) unique index.
+    """
+
+    def __init__(self):
+        self.range_intervals = getattr(settings, 'CANDLE_RANGE_INTERVALS', {1: '5m', 7: '1h', 30: '1h', 90: '1h'})
+        self.min_coverage = getattr(settings, 'CANDLE_MIN_COVERAGE', 0.9)
+
+    @staticmethod
+    def bucket_start(moment, interval):
+        """Start of the `interval` bucket containing `moment` (aware datetime)"""
+        seconds = CANDLE_INTERVALS[interval]
+        epoch = int(moment.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % seconds, tz=dt_timezone.utc)
+
+    def ingest_ticks(self, ticks):
+        """
+        Merge ticks into the candle store
+
+        Args:
+            ticks (list): (cryptocurrency_id, timestamp, price, volume) tuples
+
+        Returns:
+            int: Number of candle rows written
+        """
+        ticks = sorted(ticks, key=lambda tick: tick[1])
+        if not ticks:
+            return 0
+        sources = [
+            (crypto_id, moment, self._candle(price, price, price, price, volume))
+            for crypto_id, moment, price, volume in ticks
+        ]
+        return self.merge_candles('1m', sources)
+
+    def merge_candles(self, interval, sources):
+        """
+        Merge finer candles (or ticks as one-point candles) into `interval`
+        and every coarser interval
+
+        Args:
+            interval (str): Finest interval to merge into
+            sources (list): (cryptocurrency_id, time, candle dict) in time order
+
+        Returns:
+            int: Number of candle rows written
+        """
+        chain = list(CANDLE_INTERVALS)
+        chain = chain[chain.index(interval):]
+        existing = self._load_existing(sources, chain)
+
+        merged = {}
+        for level in chain:
+            touched = {}
+            for crypto_id, moment, candle in sources:
+                key = (crypto_id, level, self.bucket_start(moment, level))
+                current = touched.get(key) or existing.get(key)
+                touched[key] = self._merge(current, candle)
+            merged.update(touched)
+            # The touched candles are the sources for the next interval up
+            sources = [(key[0], key[2], candle) for key, candle in touched.items()]
+
+        return self._upsert(merged)
+
+    def build_candles(self, interval, points, skip_existing=True, merge_existing=False):
+        """
+        Build `interval` candles from stored price points (e.g. old raw rows)
+        and roll the coarser intervals up from their children
+
+        Unlike ingest_ticks, points may predate candles already stored for the
+        same coarse bucket: coarse candles are rebuilt from their children
+        instead of merged, so ordering stays correct.
+
+        Args:
+            interval (str): Interval to build from the points
+            points (list): (cryptocurrency_id, timestamp, price, volume) tuples
+            skip_existing (bool): Leave buckets that already have a candle alone;
+                their points were merged when they were ingested
+            merge_existing (bool): Merge into buckets that already have a
+                candle, as the later points (e.g. the next batch of a forward
+                backfill); takes precedence over skip_existing
+
+        Returns:
+            int: Number of candle rows written
+        """
+        points = sorted(points, key=lambda point: point[1])
+        buckets = {}
+        for crypto_id, moment, price, volume in points:
+            key = (crypto_id, interval, self.bucket_start(moment, interval))
+            tick = self._candle(price, price, price, price, volume)
+            buckets[key] = self._merge(buckets.get(key), tick)
+
+        if (skip_existing or merge_existing) and buckets:
+            rows = PriceCandle.objects.filter(
+                cryptocurrency_id__in={key[0] for key in buckets},
+                interval=interval,
+                bucket_start__in={key[2] for key in buckets}
+            ).values_list('cryptocurrency_id', 'interval', 'bucket_start', 'open', 'high', 'low', 'close', 'volume')
+            existing = {
+                (crypto_id, level, bucket): self._candle(open_, high, low, close, volume)
+                for crypto_id, level, bucket, open_, high, low, close, volume in rows
+            }
+            if merge_existing:
+                buckets = {
+                    key: self._merge(existing[key], candle) if key in existing else candle
+                    for key, candle in buckets.items()
+                }
+            else:
+                buckets = {key: candle for key, candle in buckets.items() if key not in existing}
+        if not buckets:
+            return 0
+
+        written = self._upsert(buckets)
+        return written + self.rollup(interval, {(key[0], key[2]) for key in buckets})
+
+    def rollup(self, interval, keys):
+        """
+        Rebuild the candles above `interval` that contain the given
+        (cryptocurrency_id, bucket_start) candles, one interval at a time
+
+        Returns:
+            int: Number of candle rows written
+        """
+        chain = list(CANDLE_INTERVALS)
+        written = 0
+        for child, level in zip(chain[chain.index(interval):], chain[chain.index(interval) + 1:]):
+            parents = {(crypto_id, self.bucket_start(bucket, level)) for crypto_id, bucket in keys}
+            if not parents:
+                break
+            starts = [bucket for _, bucket in parents]
+            children = PriceCandle.objects.filter(
+                cryptocurrency_id__in={crypto_id for crypto_id, _ in parents},
+                interval=child,
+                bucket_start__gte=min(starts),
+                bucket_start__lt=max(starts) + timezone.timedelta(seconds=CANDLE_INTERVALS[level])
+            ).order_by('bucket_start').values_list('cryptocurrency_id', 'bucket_start', 'open', 'high', 'low', 'close', 'volume')
+
+            rebuilt = {}
+            for crypto_id, bucket, open_, high, low, close, volume in children:
+                parent = (crypto_id, self.bucket_start(bucket, level))
+                if parent not in parents:
+                    continue
+                key = (crypto_id, level, parent[1])
+                rebuilt[key] = self._merge(rebuilt.get(key), self._candle(open_, high, low, close, volume))
+            written += self._upsert(rebuilt)
+            keys = parents
+        return written
+
+    def get_history(self, symbol, days):
+        """
+        Candle closes for the last `days` days in the historical-data shape
+        (timestamp, price, volume) plus open/high/low
+
+        Returns:
+            list: Points in time order, empty if no candles are stored
+        """
+        interval = self.interval_for_range(days)
+        start = timezone.now() - timezone.timedelta(days=days)
+        candles = PriceCandle.objects.filter(
+            cryptocurrency__symbol=symbol.upper(),
+            interval=interval,
+            bucket_start__gte=start
+        ).order_by('bucket_start').values_list('bucket_start', 'open', 'high', 'low', 'close', 'volume')
+
+        return [
+            {
+                'timestamp': bucket.timestamp(),
+                'price': float(close),
+                'open': float(open_),
+                'high': float(high),
+                'low': float(low),
+                'volume': float(volume)
+            }
+            for bucket, open_, high, low, close, volume in candles
+        ]
+
+    def interval_for_range(self, days):
+        """Finest interval that keeps a chart of `days` days reasonably sized"""
+        for max_days, interval in sorted(self.range_intervals.items()):
+            if days <= max_days:
+                return interval
+        return '1d'
+
+    def covers(self, history, days):
+        """
+        Whether stored candles span enough of the requested range to serve it
+        and are still being ingested: the newest bucket must have started
+        within two intervals (the open bucket plus one of ingest lag)
+        """
+        if not history:
+            return False
+        now = timezone.now().timestamp()
+        if now - history[-1]['timestamp'] > 2 * CANDLE_INTERVALS[self.interval_for_range(days)]:
+            return False
+        missing = max(0, history[0]['timestamp'] - (now - days * 86400))
+        return missing <= (1 - self.min_coverage) * days * 86400
+
+    def _upsert(self, candles):
+        rows = [
+            PriceCandle(
+                cryptocurrency_id=crypto_id,
+                interval=level,
+                bucket_start=bucket,
+                **candle
+            )
+            for (crypto_id, level, bucket), candle in candles.items()
+        ]
+        if not rows:
+            return 0
+        upsert_options = {
+            'update_conflicts': True,
+            'update_fields': ['open', 'high', 'low', 'close', 'volume', 'updated_at'],
+        }
+        if connections[PriceCandle.objects.db].features.supports_update_conflicts_with_target:
+            upsert_options['unique_fields'] = ['cryptocurrency', 'interval', 'bucket_start']
+        PriceCandle.objects.bulk_create(rows, **upsert_options)
+        return len(rows)
+
+    def _load_existing(self, sources, chain):
+        crypto_ids = {crypto_id for crypto_id, _, _ in sources}
+        buckets = {
+            self.bucket_start(moment, level)
+            for _, moment, _ in sources for level in chain
+        }
+        rows = PriceCandle.objects.filter(
+            cryptocurrency_id__in=crypto_ids,
+            interval__in=chain,
+            bucket_start__in=buckets
+        ).values_list('cryptocurrency_id', 'interval', 'bucket_start', 'open', 'high', 'low', 'close', 'volume')
+        return {
+            (crypto_id, level, bucket): self._candle(open_, high, low, close, volume)
+            for crypto_id, level, bucket, open_, high, low, close, volume in rows
+        }
+
+    def _candle(self, open_, high, low, close, volume):
+        return {
+            'open': Decimal(str(open_)),
+            'high': Decimal(str(high)),
+            'low': Decimal(str(low)),
+            'close': Decimal(str(close)),
+            'volume': Decimal(str(volume or 0)),
+        }
+
+    def _merge(self, current, candle):
+        if current is None:
+            return dict(candle)
+        return {
+            'open': current['open'],
+            'high': max(current['high'], candle['high']),
+            'low': min(current['low'], candle['low']),
+            'close': candle['close'],
+            'volume': candle['volume'],
+        }
+
+
+# Global instance
+candle_service = CandleService()
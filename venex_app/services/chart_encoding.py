@@ -0,0 +1,108 @@
+# venex_app/services/chart_encoding.py
+import json
+import math
+import msgpack
+import numpy as np
+
+# Chart payload encodings: plain JSON columns (default), compact JSON, msgpack
+CHART_ENCODINGS = ('json', 'compact', 'msgpack')
+
+# WebSocket subprotocols that opt a connection into an encoding
+CHART_SUBPROTOCOLS = {
+    'venex.chart.msgpack': 'msgpack',
+    'venex.chart.compact': 'compact',
+}
+
+# 2: volumes scaled by 10**vscale like prices (1 rounded them to whole units)
+COMPACT_VERSION = 2
+
+# Chart metadata carried through unchanged
+_META_KEYS = ('points', 'current_price', 'price_change_24h', 'price_change_percentage_24h')
+
+
+def price_decimals(prices):
+    """Decimal places that keep ~8 significant digits for the largest price (or volume)"""
+    peak = float(np.max(np.abs(prices))) if len(prices) else 0
+    if peak <= 0:
+        return 2
+    return int(min(10, max(0, 7 - math.floor(math.log10(peak)))))
+
+
+def encode_chart(payload):
+    """
+    Compact form of a chart payload (timestamps/prices/volumes columns)
+
+    Timestamps become integer seconds stored as a start plus deltas, prices
+    become integers scaled by 10**scale stored the same way, and volumes
+    become integers scaled by their own 10**vscale. Small integers are far
+    shorter than repeated floats in JSON and pack into 1-3 bytes each in
+    msgpack.
+    """
+    timestamps = np.rint(np.asarray(payload.get('timestamps', []), dtype=np.float64)).astype(np.int64)
+    prices = np.asarray(payload.get('prices', []), dtype=np.float64)
+    volumes = np.asarray(payload.get('volumes', []), dtype=np.float64)
+    scale = price_decimals(prices)
+    scaled = np.rint(prices * 10 ** scale).astype(np.int64)
+    volume_scale = price_decimals(volumes)
+
+    compact = {
+        'enc': 'compact',
+        'v': COMPACT_VERSION,
+        'n': len(timestamps),
+        't0': int(timestamps[0]) if len(timestamps) else 0,
+        'dt': np.diff(timestamps).tolist(),
+        'scale': scale,
+        'p0': int(scaled[0]) if len(scaled) else 0,
+        'dp': np.diff(scaled).tolist(),
+        'vscale': volume_scale,
+        'vol': np.rint(volumes * 10 ** volume_scale).astype(np.int64).tolist(),
+    }
+    for key in _META_KEYS:
+        if key in payload:
+            compact[key] = payload[key]
+    return compact
+
+
+def decode_chart(compact):
+    """Inverse of encode_chart (to the precision kept by the encoding)"""
+    if not compact['n']:
+        timestamps, prices = [], []
+    else:
+        timestamps = np.cumsum([compact['t0']] + list(compact['dt'])).tolist()
+        prices = (np.cumsum([compact['p0']] + list(compact['dp'])) / 10 ** compact['scale']).tolist()
+    decoded = {
+        'timestamps': timestamps,
+        'prices': prices,
+        'volumes': (np.asarray(compact.get('vol', []), dtype=np.float64) / 10 ** compact.get('vscale', 0)).tolist(),
+    }
+    for key in _META_KEYS:
+        if key in compact:
+            decoded[key] = compact[key]
+    return decoded
+
+
+def render_chart(payload, encoding):
+    """Chart data in the requested encoding: the payload itself for 'json', else its compact form"""
+    return payload if encoding == 'json' else encode_chart(payload)
+
+
+def negotiate_chart_encoding(subprotocols):
+    """
+    Pick the chart encoding from the client's offered WebSocket subprotocols
+
+    Returns:
+        tuple: (encoding, subprotocol to accept or None)
+    """
+    for subprotocol in subprotocols or []:
+        if subprotocol in CHART_SUBPROTOCOLS:
+            return CHART_SUBPROTOCOLS[subprotocol], subprotocol
+    return 'json', None
+
+
+def chart_frame(message, encoding):
+    """Keyword arguments for consumer.send(): msgpack as a binary frame, otherwise JSON text"""
+    if encoding == 'msgpack':
+        return {'bytes_data': msgpack.packb(message, use_bin_type=True)}
+    if encoding == 'compact':
+        return {'text_data': json.dumps(message, separators=(',', ':'))}
+    return {'text_data': json.dumps(message)}
@@ -1,16 +1,58 @@
 # venex_app/services/crypto_api_service.py
 from decimal import Decimal
 import os
+import json
+import time
+import threading
 import requests
 import logging
+from datetime import datetime, timezone as dt_timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from django.utils import timezone
-from django.db import transaction
+from django.db import transaction, connections
+from django.db.models import Exists, OuterRef
 from django.conf import settings
 from ..models import Cryptocurrency, PriceHistory
 from ..choices import CRYPTO_CHOICES
+from .cache_service import TwoTierCache
+from .provider_health import provider_health
+from .price_pipeline import PriceChangeFilter, CRYPTO_FIELD_MAP
+from .single_flight import single_flight
+from .candle_service import candle_service
+from .price_series import price_series_cache
+from .price_snapshot import PriceSnapshot
+from .market_snapshot import market_snapshot
 
 logger = logging.getLogger(__name__)
 
+# Symbol -> CoinGecko coin id
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'USDT': 'tether',
+    'LTC': 'litecoin',
+    'TRX': 'tron'
+}
+
+CRYPTO_REQUIRED_KEYS = ('price', 'change_24h', 'change_percentage_24h')
+
+# Chart range parameter -> days
+PRICE_HISTORY_RANGES = {
+    '1d': 1,
+    '7d': 7,
+    '30d': 30,
+    '90d': 90,
+    '1y': 365
+}
+
+# Chart data shared by consumers and API views: in-process LRU over Redis
+historical_cache = TwoTierCache(
+    'crypto_history',
+    max_entries=getattr(settings, 'CRYPTO_HISTORY_CACHE_SIZE', 256)
+)
+
 class CryptoDataService:
     """
     Service for fetching and updating cryptocurrency data from external APIs
@@ -29,6 +71,58 @@ class CryptoDataService:
         self.coingecko_api_key = os.getenv('COINGECKO_API_KEY', '')
         self.binance_api_key = os.getenv('BINANCE_API_KEY', '')
         self.binance_secret_key = os.getenv('BINANCE_SECRET_KEY', '')
+
+        # Hedged provider fetch: fallbacks start after `hedge_delay` seconds
+        # instead of waiting for the previous provider to time out
+        self.hedging_enabled = getattr(settings, 'CRYPTO_PROVIDER_HEDGING', True)
+        self.hedge_delay = getattr(settings, 'CRYPTO_PROVIDER_HEDGE_DELAY', 1.5)
+        self.provider_timings = {}
+        self._timings_lock = threading.Lock()
+
+        # Pooled keep-alive HTTP session shared by every provider call
+        self.http_pool_size = getattr(settings, 'CRYPTO_HTTP_POOL_SIZE', 10)
+        self.http_retries = getattr(settings, 'CRYPTO_HTTP_RETRIES', 2)
+        self.binance_bulk = getattr(settings, 'CRYPTO_BINANCE_BULK_TICKER', True)
+        self.session = self._build_session()
+        # Fallback chains try the next provider instead of retrying a dead one
+        self.fallback_session = self._build_session(retries=0)
+        self.fallback_timeout = getattr(settings, 'CRYPTO_HTTP_FALLBACK_TIMEOUT', 5)
+        self.history_deadline = getattr(settings, 'CRYPTO_HISTORY_DEADLINE', 10)
+
+        # Circuit breaker / health score per upstream API, shared via Redis
+        self.provider_health = provider_health
+
+        # Change detection: only symbols that actually moved are written/published
+        self.change_filter = PriceChangeFilter()
+        self.last_refresh_stats = {'received': 0, 'changed': 0, 'suppressed': 0}
+
+    def _build_session(self, retries=None):
+        """
+        Build a keep-alive session so provider calls reuse TCP/TLS connections.
+        Transient 5xx responses and connection errors are retried with backoff
+        (`retries` times, default CRYPTO_HTTP_RETRIES); 429 is not retried here
+        so rate limits surface to the caller.
+        """
+        retries = self.http_retries if retries is None else retries
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=0.3,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.http_pool_size,
+            pool_maxsize=self.http_pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Accept': 'application/json'})
+        return session
     
     @staticmethod
     def get_market_overview(self): # type: ignore
@@ -94,22 +188,15 @@ class CryptoDataService:
             logger.error(f"Error calculating market dominance: {e}")
             return {}
     
-    def get_price_history(self, symbol, range_param='1d'):
+    def get_price_history(self, symbol, range_param='1d', max_points=None):
         """
-        Get price history for different time ranges
+        Get price history for different time ranges as chart columns
+        (timestamps/prices/volumes), downsampled to at most `max_points`
         """
         try:
-            # Map range parameter to days
-            range_mapping = {
-                '1d': 1,
-                '7d': 7,
-                '30d': 30,
-                '90d': 90,
-                '1y': 365
-            }
-            
-            days = range_mapping.get(range_param, 30)
-            return self.get_historical_data(symbol, days)
+            days = PRICE_HISTORY_RANGES.get(range_param, 30)
+            series = price_series_cache.get(symbol.upper(), days, self.get_historical_data)
+            return series.chart_payload(days, max_points)
             
         except Exception as e:
             logger.error(f"Error getting price history for {symbol}: {e}")
@@ -132,15 +219,7 @@ class CryptoDataService:
         """Fetch data from CoinGecko API with API key"""
         try:
             # Map symbols to CoinGecko IDs
-            coin_mapping = {
-                'BTC': 'bitcoin',
-                'ETH': 'ethereum', 
-                'USDT': 'tether',
-                'LTC': 'litecoin',
-                'TRX': 'tron'
-            }
-            
-            coin_ids = [coin_mapping.get(symbol.upper(), symbol.lower()) for symbol in symbols]
+            coin_ids = [COINGECKO_IDS.get(symbol.upper(), symbol.lower()) for symbol in symbols]
             coin_ids = [coin_id for coin_id in coin_ids if coin_id]
             
             url = "https://api.coingecko.com/api/v3/coins/markets"
@@ -158,7 +237,7 @@ class CryptoDataService:
             if self.coingecko_api_key:
                 headers['x-cg-demo-api-key'] = self.coingecko_api_key
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self.session.get(url, params=params, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -166,6 +245,7 @@ class CryptoDataService:
                 return self._parse_coingecko_data(data)
             elif response.status_code == 429:
                 logger.warning("CoinGecko API rate limit reached")
+                self.provider_health.trip('coingecko', self._retry_after(response))
             else:
                 logger.error(f"CoinGecko API error: {response.status_code}")
                 
@@ -177,43 +257,103 @@ class CryptoDataService:
     
     def _fetch_from_binance(self, symbols):
         """Fetch data from Binance API"""
+        if self.binance_bulk:
+            data, status = self._fetch_from_binance_bulk(symbols)
+            if status != 'unavailable':
+                # Rate-limited or failed: one request per symbol would only add load
+                return data
         try:
             data = {}
             for symbol in symbols:
                 if symbol == 'USDT':
                     # USDT is stablecoin, hardcode values
-                    data[symbol] = {
-                        'price': 1.0,
-                        'change_24h': 0.0,
-                        'change_percentage_24h': 0.0,
-                        'volume': 0,
-                        'market_cap': 0
-                    }
+                    data[symbol] = self._usdt_ticker()
                     continue
                     
                 url = "https://api.binance.com/api/v3/ticker/24hr"
                 params = {'symbol': f'{symbol}USDT'}
                 
-                headers = {}
-                if self.binance_api_key:
-                    headers['X-MBX-APIKEY'] = self.binance_api_key
-                
-                response = requests.get(url, params=params, headers=headers, timeout=5)
+                response = self.session.get(url, params=params, headers=self._binance_headers(), timeout=5)
+                if response.status_code in (418, 429):
+                    logger.warning("Binance API rate limit reached")
+                    self.provider_health.trip('binance', self._retry_after(response))
+                    return None
                 if response.status_code == 200:
-                    ticker_data = response.json()
-                    data[symbol] = {
-                        'price': float(ticker_data.get('lastPrice', 0)),
-                        'change_24h': float(ticker_data.get('priceChange', 0)),
-                        'change_percentage_24h': float(ticker_data.get('priceChangePercent', 0)),
-                        'volume': float(ticker_data.get('volume', 0)),
-                        'market_cap': 0  # Binance doesn't provide market cap
-                    }
+                    data[symbol] = self._parse_binance_ticker(response.json())
                 else:
                     logger.warning(f"Binance API error for {symbol}: {response.status_code}")
             return data
         except Exception as e:
             logger.error(f"Binance API error: {e}")
         return None
+
+    def _fetch_from_binance_bulk(self, symbols):
+        """
+        Fetch all Binance tickers in a single request using the `symbols` parameter
+
+        Returns:
+            tuple: (data or None, status) with status 'ok', 'rate_limited',
+                'unavailable' (the endpoint refused the bulk request) or 'failed'
+        """
+        try:
+            pairs = [f'{symbol}USDT' for symbol in symbols if symbol != 'USDT']
+            data = {}
+            if pairs:
+                url = "https://api.binance.com/api/v3/ticker/24hr"
+                params = {'symbols': json.dumps(pairs, separators=(',', ':'))}
+
+                response = self.session.get(url, params=params, headers=self._binance_headers(), timeout=5)
+                if response.status_code in (418, 429):
+                    logger.warning("Binance API rate limit reached")
+                    self.provider_health.trip('binance', self._retry_after(response))
+                    return None, 'rate_limited'
+                if response.status_code != 200:
+                    logger.warning(f"Binance bulk ticker error: {response.status_code}")
+                    return None, 'unavailable'
+
+                for ticker_data in response.json():
+                    pair = ticker_data.get('symbol', '')
+                    if pair.endswith('USDT'):
+                        data[pair[:-len('USDT')]] = self._parse_binance_ticker(ticker_data)
+
+            if 'USDT' in symbols:
+                data['USDT'] = self._usdt_ticker()
+            return data, 'ok'
+        except Exception as e:
+            logger.error(f"Binance bulk ticker error: {e}")
+        return None, 'failed'
+
+    def _retry_after(self, response):
+        """Seconds from a Retry-After header, if the provider sent one"""
+        try:
+            return int(response.headers.get('Retry-After', ''))
+        except (TypeError, ValueError):
+            return None
+
+    def _binance_headers(self):
+        headers = {}
+        if self.binance_api_key:
+            headers['X-MBX-APIKEY'] = self.binance_api_key
+        return headers
+
+    def _parse_binance_ticker(self, ticker_data):
+        """Parse a Binance 24hr ticker entry"""
+        return {
+            'price': float(ticker_data.get('lastPrice', 0)),
+            'change_24h': float(ticker_data.get('priceChange', 0)),
+            'change_percentage_24h': float(ticker_data.get('priceChangePercent', 0)),
+            'volume': float(ticker_data.get('volume', 0)),
+            'market_cap': 0  # Binance doesn't provide market cap
+        }
+
+    def _usdt_ticker(self):
+        return {
+            'price': 1.0,
+            'change_24h': 0.0,
+            'change_percentage_24h': 0.0,
+            'volume': 0,
+            'market_cap': 0
+        }
     
     def _fetch_from_cryptocompare(self, symbols):
         """Fetch data from CryptoCompare API (free tier)"""
@@ -225,7 +365,7 @@ class CryptoDataService:
                 # No API key needed for basic free tier
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.fallback_session.get(url, params=params, timeout=self.fallback_timeout)
             if response.status_code == 200:
                 data = response.json()
                 return self._parse_cryptocompare_data(data)
@@ -273,35 +413,53 @@ class CryptoDataService:
     
     ## crypto_api_service.py for getting historical data for charting displays
     def get_historical_data(self, symbol, days=30):
-        """Get historical price data with multiple provider fallback"""
-        
-        # Try CoinGecko first
-        cg_data = self._get_historical_from_coingecko(symbol, days)
-        if cg_data:
-            return cg_data
-        
-        # Try CryptoCompare as fallback
-        cc_data = self._get_historical_from_cryptocompare(symbol, days)
-        if cc_data:
-            return cc_data
+        """Get historical price data, served from the two-tier cache when warm"""
+        symbol = symbol.upper()
+        ttl = self._historical_cache_ttl(days)
+        return historical_cache.get_or_load(
+            f'{symbol}:{days}',
+            lambda: self._fetch_historical_data(symbol, days),
+            ttl,
+            ttl * getattr(settings, 'CRYPTO_HISTORY_STALE_FACTOR', 4)
+        )
+
+    def _historical_cache_ttl(self, days):
+        """Fresh TTL in seconds; wider ranges have coarser points and change slower"""
+        ttls = getattr(settings, 'CRYPTO_HISTORY_CACHE_TTLS', {1: 60, 7: 300, 30: 900, 90: 1800})
+        for max_days, ttl in sorted(ttls.items()):
+            if days <= max_days:
+                return ttl
+        return getattr(settings, 'CRYPTO_HISTORY_CACHE_MAX_TTL', 3600)
+
+    def _fetch_historical_data(self, symbol, days):
+        """Get historical price data from stored candles, with provider fallback"""
+        candles = candle_service.get_history(symbol, days)
+        if candle_service.covers(candles, days):
+            return candles
         
-        # Try Binance as third option
-        binance_data = self._get_historical_from_binance(symbol, days)
-        if binance_data:
-            return binance_data
+        # CoinGecko first, then CryptoCompare, then Binance; providers with an
+        # open circuit are skipped without a request, and once the deadline
+        # has passed the stored data is served instead of trying the next one
+        deadline = time.monotonic() + self.history_deadline
+        for provider in (
+            self._get_historical_from_coingecko,
+            self._get_historical_from_cryptocompare,
+            self._get_historical_from_binance
+        ):
+            if time.monotonic() >= deadline:
+                logger.warning(f"Historical data deadline reached for {symbol}; serving stored data")
+                break
+            historical_data = self._timed_provider_call(provider, symbol, days)
+            if historical_data:
+                return historical_data
         
-        # Final fallback to database
-        return self._get_historical_from_database(symbol, days)
+        # Final fallback to whatever is stored
+        return candles or self._get_historical_from_database(symbol, days)
 
     def _get_historical_from_coingecko(self, symbol, days):
         """CoinGecko implementation without interval parameter"""
         try:
-            coin_mapping = {
-                'BTC': 'bitcoin', 'ETH': 'ethereum', 'USDT': 'tether',
-                'LTC': 'litecoin', 'TRX': 'tron'
-            }
-            
-            coin_id = coin_mapping.get(symbol.upper())
+            coin_id = COINGECKO_IDS.get(symbol.upper())
             if not coin_id:
                 return None
             
@@ -315,7 +473,7 @@ class CryptoDataService:
             if self.coingecko_api_key:
                 headers['x-cg-demo-api-key'] = self.coingecko_api_key
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self.fallback_session.get(url, params=params, headers=headers, timeout=self.fallback_timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -334,6 +492,8 @@ class CryptoDataService:
                 return historical_data
             else:
                 logger.warning(f"CoinGecko historical data error: {response.status_code}")
+                if response.status_code == 429:
+                    self.provider_health.trip('coingecko', self._retry_after(response))
                 return None
             
         except Exception as e:
@@ -350,7 +510,7 @@ class CryptoDataService:
                 'limit': min(days, 2000)  # CryptoCompare limit
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.fallback_session.get(url, params=params, timeout=self.fallback_timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -385,7 +545,7 @@ class CryptoDataService:
                 'limit': min(days * (24 if interval == '1h' else 1), 1000)
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.fallback_session.get(url, params=params, timeout=self.fallback_timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -432,78 +592,260 @@ class CryptoDataService:
         except Cryptocurrency.DoesNotExist:
             return []
     
-    @transaction.atomic
+    def _provider_key(self, provider):
+        """Circuit breaker key: the upstream API, shared by its fetch and history calls"""
+        return provider.__name__.rsplit('_', 1)[-1]
+
+    def _timed_provider_call(self, provider, *args):
+        """
+        Call a provider unless its circuit is open, recording latency and outcome
+        for the timing stats and the shared health score
+        """
+        key = self._provider_key(provider)
+        admitted = self.provider_health.allow_request(key)
+        if not admitted:
+            logger.info(f"Skipping {provider.__name__}: circuit open")
+            return None
+
+        started = time.monotonic()
+        data = None
+        try:
+            data = provider(*args)
+            return data
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self._record_provider_timing(provider.__name__, elapsed_ms, bool(data))
+            if data:
+                self.provider_health.record_success(key, elapsed_ms)
+            else:
+                self.provider_health.record_failure(key, elapsed_ms, probe=admitted == self.provider_health.PROBE)
+
+    def _record_provider_timing(self, name, elapsed_ms, success):
+        with self._timings_lock:
+            stats = self.provider_timings.setdefault(name, {
+                'calls': 0,
+                'failures': 0,
+                'last_ms': 0.0,
+                'avg_ms': 0.0,
+                'max_ms': 0.0,
+                'last_success': None,
+            })
+            stats['calls'] += 1
+            if not success:
+                stats['failures'] += 1
+            stats['last_ms'] = round(elapsed_ms, 1)
+            stats['avg_ms'] = round(stats['avg_ms'] + (elapsed_ms - stats['avg_ms']) / stats['calls'], 1)
+            stats['max_ms'] = round(max(stats['max_ms'], elapsed_ms), 1)
+            stats['last_success'] = success
+
+    def get_provider_timings(self):
+        """
+        Per-provider call timings, used to tune CRYPTO_PROVIDER_HEDGE_DELAY
+
+        Returns:
+            dict: provider name -> calls, failures, last/avg/max latency in ms
+        """
+        with self._timings_lock:
+            return {name: dict(stats) for name, stats in self.provider_timings.items()}
+
+    def _fetch_sequential(self, symbols, providers):
+        """Try providers in order until one returns data"""
+        for provider in providers:
+            crypto_data = self._timed_provider_call(provider, symbols)
+            if crypto_data:
+                return provider.__name__, crypto_data
+        return None, None
+
+    def _fetch_hedged(self, symbols, providers):
+        """
+        Race the providers: the primary starts immediately and each fallback is
+        started `hedge_delay` seconds later (or as soon as an earlier provider
+        fails). The first provider returning data wins; the rest are abandoned.
+
+        Requests already in flight cannot be interrupted, so abandoned providers
+        finish in the background and only contribute to the timing stats.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix='crypto-provider')
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                if next_index < len(providers):
+                    provider = providers[next_index]
+                    next_index += 1
+                    pending[executor.submit(self._timed_provider_call, provider, symbols)] = provider
+                if not pending:
+                    return None, None
+
+                timeout = self.hedge_delay if next_index < len(providers) else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    provider = pending.pop(future)
+                    try:
+                        crypto_data = future.result()
+                    except Exception as e:
+                        logger.error(f"Provider {provider.__name__} raised: {e}")
+                        continue
+                    if crypto_data:
+                        return provider.__name__, crypto_data
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch_crypto_data(self, symbols):
+        """Fetch market data for symbols from the first healthy provider"""
+        # Healthiest provider first: by recent success rate, then p95 latency
+        providers = self.provider_health.rank(self.providers, key=self._provider_key)
+        if self.hedging_enabled and len(providers) > 1:
+            provider_name, crypto_data = self._fetch_hedged(symbols, providers)
+        else:
+            provider_name, crypto_data = self._fetch_sequential(symbols, providers)
+
+        if crypto_data:
+            logger.info(f"Successfully fetched data from {provider_name}")
+        return crypto_data
+
     def update_cryptocurrency_data(self):
-        """Update all cryptocurrency data in database with enhanced error handling"""
+        """
+        Update all cryptocurrency data in database with enhanced error handling
+
+        Concurrent refreshes from any worker are coalesced: one runs against
+        the providers, the others wait for and return its result.
+        """
+        return single_flight.run('crypto_prices', self._refresh_crypto_data, default=False)
+
+    def _refresh_crypto_data(self):
         symbols = [choice[0] for choice in CRYPTO_CHOICES]
-        crypto_data = None
-        
-        # Try providers in order until we get data
-        for provider in self.providers:
-            crypto_data = provider(symbols)
-            if crypto_data:
-                logger.info(f"Successfully fetched data from {provider.__name__}")
-                break
+        crypto_data = self.fetch_crypto_data(symbols)
         
         if not crypto_data:
             logger.error("All cryptocurrency API providers failed")
             return False
         
-        updated_count = 0
-        for symbol, data in crypto_data.items():
-            try:
-                crypto, created = Cryptocurrency.objects.get_or_create(
-                    symbol=symbol,
-                    defaults={
-                        'name': self._get_coin_name(symbol),
-                        'current_price': data['price'],
-                        'price_change_24h': data['change_24h'],
-                        'price_change_percentage_24h': data['change_percentage_24h'],
-                        'market_cap': data.get('market_cap', 0),
-                        'volume_24h': data.get('volume', 0),
-                        'circulating_supply': data.get('circulating_supply', 0),
-                        'total_supply': data.get('total_supply', 0),
-                        'max_supply': data.get('max_supply'),
-                        'rank': data.get('rank', 0)
-                    }
-                )
-                
-                if not created:
-                    # Update existing cryptocurrency
-                    crypto.current_price = data['price']
-                    crypto.price_change_24h = data['change_24h']
-                    crypto.price_change_percentage_24h = data['change_percentage_24h']
-                    crypto.market_cap = data.get('market_cap', crypto.market_cap)
-                    crypto.volume_24h = data.get('volume', crypto.volume_24h)
-                    crypto.circulating_supply = data.get('circulating_supply', crypto.circulating_supply)
-                    crypto.total_supply = data.get('total_supply', crypto.total_supply)
-                    crypto.max_supply = data.get('max_supply', crypto.max_supply)
-                    crypto.rank = data.get('rank', crypto.rank)
-                    crypto.save()
-                
-                # Create price history entry (limit to avoid database bloat)
-                recent_entries = PriceHistory.objects.filter(
-                    cryptocurrency=crypto,
-                    timestamp__gte=timezone.now() - timezone.timedelta(hours=1)
-                ).count()
-                
-                if recent_entries == 0:  # Only save if no recent entry
-                    PriceHistory.objects.create(
-                        cryptocurrency=crypto,
-                        price=data['price'],
-                        volume=data.get('volume', 0),
-                        market_cap=data.get('market_cap', 0),
-                        timestamp=timezone.now()
-                    )
-                
-                updated_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error updating {symbol}: {e}")
-                continue
-        
-        logger.info(f"Updated {updated_count} cryptocurrencies")
+        try:
+            changed = self.ingest_crypto_data(crypto_data)
+        except Exception as e:
+            logger.error(f"Error saving cryptocurrency data: {e}")
+            return False
+
+        stats = self.last_refresh_stats
+        logger.info(f"Updated {len(changed)} cryptocurrencies ({stats['suppressed']} unchanged, suppressed)")
         return True
+
+    def ingest_crypto_data(self, crypto_data):
+        """
+        Normalisation pipeline for a parsed provider payload: drop symbols
+        without a price, keep only those that changed beyond the configured
+        epsilons, then persist.
+
+        Returns:
+            dict: The changed symbols that were written (and should be published)
+        """
+        crypto_data = {
+            symbol: data for symbol, data in crypto_data.items()
+            if data.get('price') is not None
+        }
+        changed = self.change_filter.detect(crypto_data)
+        self.save_crypto_data(crypto_data, changed=changed)
+        self.change_filter.commit(changed)
+        if changed:
+            PriceSnapshot.invalidate_on_commit()
+            market_snapshot.refresh_on_commit()
+        self.last_refresh_stats = dict(self.change_filter.last_stats)
+        return changed
+
+    @transaction.atomic
+    def save_crypto_data(self, crypto_data, changed=None):
+        """
+        Persist a parsed provider payload with a constant number of queries:
+        one upsert for the changed Cryptocurrency rows, one query to find the
+        symbols without a PriceHistory entry in the last hour, one bulk insert
+        for those. The hourly history sample covers unchanged symbols too.
+
+        Optional fields missing from the payload (e.g. supply from Binance)
+        keep their stored values, like the old per-row update did.
+
+        Returns:
+            int: Number of Cryptocurrency rows written
+        """
+        now = timezone.now()
+        crypto_data = {
+            symbol: data for symbol, data in crypto_data.items()
+            if data.get('price') is not None
+        }
+        if not crypto_data:
+            return 0
+        to_write = crypto_data if changed is None else {
+            symbol: data for symbol, data in crypto_data.items() if symbol in changed
+        }
+
+        rows = [
+            Cryptocurrency(
+                symbol=symbol,
+                name=self._get_coin_name(symbol),
+                last_updated=now,
+                **{
+                    field: self._field_value(field, data.get(key))
+                    for key, field in CRYPTO_FIELD_MAP.items()
+                }
+            )
+            for symbol, data in to_write.items()
+        ]
+
+        if rows:
+            update_fields = [
+                field for key, field in CRYPTO_FIELD_MAP.items()
+                if key in CRYPTO_REQUIRED_KEYS or all(key in data for data in to_write.values())
+            ]
+            update_fields.append('last_updated')
+
+            upsert_options = {'update_conflicts': True, 'update_fields': update_fields}
+            if connections[Cryptocurrency.objects.db].features.supports_update_conflicts_with_target:
+                upsert_options['unique_fields'] = ['symbol']
+            Cryptocurrency.objects.bulk_create(rows, **upsert_options)
+
+        # Limit price history to one entry per coin per hour to avoid database bloat
+        recent_history = PriceHistory.objects.filter(
+            cryptocurrency=OuterRef('pk'),
+            timestamp__gte=now - timezone.timedelta(hours=1)
+        )
+        cryptos = Cryptocurrency.objects.filter(
+            symbol__in=list(crypto_data)
+        ).annotate(
+            has_recent_history=Exists(recent_history)
+        ).only('id', 'symbol')
+
+        history_rows = []
+        ticks = []
+        for crypto in cryptos:
+            data = crypto_data[crypto.symbol]
+            tick_time = now
+            if data.get('event_time'):
+                tick_time = datetime.fromtimestamp(data['event_time'] / 1000, tz=dt_timezone.utc)
+            ticks.append((crypto.id, tick_time, data['price'], data.get('volume')))
+            if crypto.has_recent_history:
+                continue
+            history_rows.append(PriceHistory(
+                cryptocurrency_id=crypto.id,
+                price=data['price'],
+                volume=data.get('volume') or 0,
+                market_cap=data.get('market_cap') or 0,
+                timestamp=now
+            ))
+        if history_rows:
+            PriceHistory.objects.bulk_create(history_rows)
+
+        # Every tick, changed or not, extends the OHLCV candles
+        candle_service.ingest_ticks(ticks)
+
+        return len(rows)
+
+    def _field_value(self, field, value):
+        """Providers send None for unknown numbers; only max_supply is nullable"""
+        if value is None and field != 'max_supply':
+            return 0
+        return value
     
     def _get_coin_name(self, symbol):
         """Get full coin name from symbol"""
@@ -9,6 +9,7 @@ from decimal import Decimal
 from django.core.cache import cache
 from django.conf import settings
 from datetime import timedelta
+from .single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +49,10 @@ class CurrencyConversionService:
     CACHE_TIMEOUT = 600
     CACHE_KEY = 'exchange_rates_usd'
     
+    # Last successfully fetched rates, served when a refresh fails or is slow
+    LAST_KNOWN_CACHE_KEY = 'exchange_rates_usd_last_known'
+    LAST_KNOWN_TIMEOUT = 7 * 24 * 3600
+    
     @classmethod
     def get_exchange_rates(cls):
         """
@@ -63,7 +68,27 @@ class CurrencyConversionService:
             logger.info("Using cached exchange rates")
             return cached_rates
         
-        # Fetch from API
+        # Only one worker fetches; concurrent callers reuse its result
+        rates = single_flight.run(cls.CACHE_KEY, cls._fetch_exchange_rates)
+        if rates:
+            return rates
+        
+        last_known = cache.get(cls.LAST_KNOWN_CACHE_KEY)
+        if last_known:
+            logger.warning("Using last known exchange rates")
+            return last_known
+        
+        logger.warning("Using fallback exchange rates")
+        return cls.FALLBACK_RATES
+    
+    @classmethod
+    def _fetch_exchange_rates(cls):
+        """
+        Fetch exchange rates from the API and cache them
+        
+        Returns:
+            dict: Exchange rates, or None if the API failed
+        """
         try:
             logger.info(f"Fetching exchange rates from {cls.EXCHANGE_RATE_API}")
             response = requests.get(cls.EXCHANGE_RATE_API, timeout=5)
@@ -73,8 +98,8 @@ class CurrencyConversionService:
             rates = data.get('rates', {})
             
             if not rates:
-                logger.warning("No rates returned from API, using fallback rates")
-                return cls.FALLBACK_RATES
+                logger.warning("No rates returned from API")
+                return None
             
             # Convert to Decimal for precision
             decimal_rates = {
@@ -87,17 +112,17 @@ class CurrencyConversionService:
             
             # Cache the rates
             cache.set(cls.CACHE_KEY, decimal_rates, cls.CACHE_TIMEOUT)
+            cache.set(cls.LAST_KNOWN_CACHE_KEY, decimal_rates, cls.LAST_KNOWN_TIMEOUT)
             logger.info(f"Cached {len(decimal_rates)} exchange rates for {cls.CACHE_TIMEOUT} seconds")
             
             return decimal_rates
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch exchange rates: {e}")
-            logger.warning("Using fallback exchange rates")
-            return cls.FALLBACK_RATES
+            return None
         except Exception as e:
             logger.error(f"Unexpected error fetching exchange rates: {e}")
-            return cls.FALLBACK_RATES
+            return None
     
     @classmethod
     def get_exchange_rate(cls, from_currency='USD', to_currency='USD'):
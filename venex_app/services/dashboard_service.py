@@ -14,10 +14,6 @@ class DashboardService:
         Calculate user's portfolio value with real-time crypto prices
         """
         try:
-            # Ensure crypto data is fresh
-            from .crypto_api_service import crypto_service
-            crypto_service.update_cryptocurrency_data()
-            
             # Get all portfolio entries for the user
             portfolios = Portfolio.objects.filter(user=user)
             
@@ -0,0 +1,111 @@
+# venex_app/services/fake_ticker_feed.py
+import json
+import time
+import random
+import asyncio
+import logging
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger(__name__)
+
+# Rough starting prices for the random walk when no seed prices are given
+DEFAULT_SEED_PRICES = {
+    'BTC': 65000.0,
+    'ETH': 3200.0,
+    'LTC': 80.0,
+    'TRX': 0.12,
+}
+
+
+class FakeTickerFeed:
+    """
+    Local stand-in for an exchange ticker WebSocket
+
+    Serves the Binance combined-stream format on /stream?streams=..., either by
+    replaying a recorded JSONL capture (run_price_stream --record) or by
+    generating a random walk, so streaming ingestion can be tested and
+    benchmarked offline.
+    """
+
+    def __init__(self, rate=1.0, seed_prices=None, replay_path=None, loop_replay=True):
+        self.rate = rate
+        self.seed_prices = dict(seed_prices or DEFAULT_SEED_PRICES)
+        self.replay_path = replay_path
+        self.loop_replay = loop_replay
+        self.stats = {'connections': 0, 'messages_sent': 0}
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get('/stream', self.handle_stream)
+        app.router.add_get('/ws', self.handle_stream)
+        return app
+
+    async def handle_stream(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.stats['connections'] += 1
+
+        streams = request.query.get('streams', '')
+        pairs = [stream.split('@')[0].upper() for stream in streams.split('/') if stream]
+        logger.info(f"Fake feed client connected for {pairs or 'all pairs'}")
+
+        sender = asyncio.ensure_future(
+            self._replay(ws, pairs) if self.replay_path else self._random_walk(ws, pairs)
+        )
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            sender.cancel()
+        return ws
+
+    async def _random_walk(self, ws, pairs):
+        pairs = pairs or [f'{symbol}USDT' for symbol in self.seed_prices]
+        state = {}
+        for pair in pairs:
+            open_price = self.seed_prices.get(pair[:-len('USDT')], 1.0)
+            state[pair] = {'open': open_price, 'last': open_price, 'volume': 0.0}
+
+        interval = 1.0 / self.rate if self.rate > 0 else 0
+        while not ws.closed:
+            for pair, ticker in state.items():
+                ticker['last'] = max(ticker['last'] * (1 + random.gauss(0, 0.0005)), 1e-8)
+                ticker['volume'] += abs(random.gauss(0, 1))
+                await self._send(ws, pair, self._ticker_event(pair, ticker))
+            await asyncio.sleep(interval)
+
+    async def _replay(self, ws, pairs):
+        interval = 1.0 / self.rate if self.rate > 0 else 0
+        wanted = {f'{pair.lower()}@ticker' for pair in pairs}
+        while not ws.closed:
+            with open(self.replay_path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if wanted and json.loads(line).get('stream') not in wanted:
+                        continue
+                    await ws.send_str(line)
+                    self.stats['messages_sent'] += 1
+                    await asyncio.sleep(interval)
+            if not self.loop_replay:
+                await ws.close()
+                return
+
+    async def _send(self, ws, pair, event):
+        await ws.send_str(json.dumps({'stream': f'{pair.lower()}@ticker', 'data': event}))
+        self.stats['messages_sent'] += 1
+
+    def _ticker_event(self, pair, ticker):
+        change = ticker['last'] - ticker['open']
+        return {
+            'e': '24hrTicker',
+            'E': int(time.time() * 1000),
+            's': pair,
+            'p': f"{change:.8f}",
+            'P': f"{change / ticker['open'] * 100:.3f}",
+            'c': f"{ticker['last']:.8f}",
+            'o': f"{ticker['open']:.8f}",
+            'v': f"{ticker['volume']:.8f}",
+        }
@@ -0,0 +1,69 @@
+# venex_app/services/ingestion_service.py
+import time
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from .crypto_api_service import crypto_service
+
+logger = logging.getLogger(__name__)
+
+
+class PriceIngestionWorker:
+    """
+    Scheduled price ingestion
+
+    This worker is the only code path that talks to the price providers.
+    Request handlers and consumers read the Cryptocurrency table (and caches)
+    it keeps fresh, so their latency no longer depends on the providers.
+    """
+
+    def __init__(self, interval=None, service=None):
+        self.interval = interval or getattr(settings, 'CRYPTO_INGESTION_INTERVAL', 30)
+        self.service = service or crypto_service
+        self.ticks = 0
+        self.failures = 0
+        self._stopping = asyncio.Event()
+
+    def ingest_once(self):
+        """Run one provider refresh and persist it; returns True on success"""
+        close_old_connections()
+        try:
+            return self.service.update_cryptocurrency_data()
+        finally:
+            close_old_connections()
+
+    async def run(self, iterations=None):
+        """
+        Refresh prices every `interval` seconds until stopped
+
+        Args:
+            iterations (int): Stop after this many ticks (default: run forever)
+        """
+        logger.info(f"Price ingestion worker started (interval {self.interval}s)")
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                success = await sync_to_async(self.ingest_once)()
+            except Exception as e:
+                logger.error(f"Price ingestion tick failed: {e}")
+                success = False
+
+            self.ticks += 1
+            if not success:
+                self.failures += 1
+            elapsed = time.monotonic() - started
+            logger.info(f"Price ingestion tick {self.ticks} {'ok' if success else 'failed'} in {elapsed:.2f}s")
+
+            if iterations and self.ticks >= iterations:
+                break
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(0, self.interval - elapsed))
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info(f"Price ingestion worker stopped after {self.ticks} ticks ({self.failures} failed)")
+
+    def stop(self):
+        self._stopping.set()
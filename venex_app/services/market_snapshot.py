@@ -0,0 +1,138 @@
+# venex_app/services/market_snapshot.py
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from ..models import Cryptocurrency
+from ..serializers import CryptocurrencySerializer
+from .single_flight import single_flight
+from .ws_broadcast import frame_event
+from .ws_protocol import WIRE_FORMATS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'market_snapshot'
+VERSION_KEY = 'market_snapshot:version'
+
+
+def frame_key(wire_format):
+    """Cache key of the pre-encoded market_data frame in one wire format"""
+    return f'{SNAPSHOT_KEY}:frame:{wire_format}'
+
+
+def market_stats(cryptocurrencies):
+    """Totals, BTC dominance and count over serialized cryptocurrencies, in one pass"""
+    total_market_cap = total_volume = btc_market_cap = 0.0
+    for crypto in cryptocurrencies:
+        market_cap = float(crypto['market_cap'] or 0)
+        total_market_cap += market_cap
+        total_volume += float(crypto['volume_24h'] or 0)
+        if crypto['symbol'] == 'BTC':
+            btc_market_cap = market_cap
+    btc_dominance = btc_market_cap / total_market_cap * 100 if total_market_cap > 0 else 0
+    return {
+        'total_market_cap': total_market_cap,
+        'total_volume_24h': total_volume,
+        'btc_dominance': round(btc_dominance, 2),
+        'active_cryptocurrencies': len(cryptocurrencies),
+        'timestamp': timezone.now().isoformat()
+    }
+
+
+class MarketSnapshot:
+    """
+    Market overview (crypto list + market_stats) shared by every reader
+
+    Ingestion rebuilds it once per tick that changed prices (one query, one
+    serializer pass) and stores it in the shared cache with a version number,
+    plus the market_data WebSocket frame pre-encoded per wire format under
+    its own key. MarketConsumer connects read only their format's frame and
+    forward it as-is; the market REST endpoint and page read the data. A
+    missing snapshot (cold cache, expired after `ttl` without ingestion) is
+    rebuilt by a single worker.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or getattr(settings, 'MARKET_SNAPSHOT_TTL', 300)
+
+    def get(self):
+        """
+        Current snapshot, building it if the cache has none
+
+        Returns:
+            dict: {'version', 'data': {'cryptocurrencies', 'market_stats'}}
+        """
+        try:
+            snapshot = cache.get(SNAPSHOT_KEY)
+        except Exception as e:
+            logger.warning(f"Market snapshot read failed: {e}")
+            snapshot = None
+        if snapshot is None:
+            snapshot = self._rebuild()
+        return {'version': snapshot['version'], 'data': snapshot['data']}
+
+    def frame(self, wire_format='json'):
+        """market_data frame event in one wire format, building the snapshot if the cache has none"""
+        try:
+            event = cache.get(frame_key(wire_format))
+        except Exception as e:
+            logger.warning(f"Market snapshot frame read failed: {e}")
+            event = None
+        return event or self._rebuild()['frames'][wire_format]
+
+    def data(self):
+        """{'cryptocurrencies': [...], 'market_stats': {...}} of the current snapshot"""
+        return self.get()['data']
+
+    def build(self, version):
+        """Snapshot from the database in one query, with its frame in every wire format"""
+        cryptocurrencies = Cryptocurrency.objects.filter(is_active=True).order_by('rank')
+        crypto_list = [dict(row) for row in CryptocurrencySerializer(cryptocurrencies, many=True).data]
+        data = {'cryptocurrencies': crypto_list, 'market_stats': market_stats(crypto_list)}
+        message = {'type': 'market_data', 'version': version, 'data': data}
+        return {
+            'version': version,
+            'data': data,
+            'frames': {
+                wire_format: frame_event(message, key='market', wire_format=wire_format)
+                for wire_format in WIRE_FORMATS
+            },
+        }
+
+    def refresh(self):
+        """Rebuild under a new version and store it for every worker"""
+        snapshot = self.build(self._next_version())
+        entries = {frame_key(wire_format): event for wire_format, event in snapshot['frames'].items()}
+        entries[SNAPSHOT_KEY] = {'version': snapshot['version'], 'data': snapshot['data']}
+        try:
+            cache.set_many(entries, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Market snapshot store failed: {e}")
+        logger.debug(f"Market snapshot v{snapshot['version']}: {len(snapshot['data']['cryptocurrencies'])} cryptocurrencies")
+        return snapshot
+
+    def _rebuild(self):
+        return single_flight.run(SNAPSHOT_KEY, self.refresh) or self.build(version=0)
+
+    def refresh_on_commit(self):
+        """Rebuild once the current transaction's price writes are committed"""
+        def rebuild():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Market snapshot rebuild failed: {e}")
+        transaction.on_commit(rebuild)
+
+    @staticmethod
+    def _next_version():
+        try:
+            cache.add(VERSION_KEY, 0, timeout=None)
+            return cache.incr(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Market snapshot version bump failed: {e}")
+            return 0
+
+
+# Global instance
+market_snapshot = MarketSnapshot()
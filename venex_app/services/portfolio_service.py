@@ -3,11 +3,29 @@ import logging
 from decimal import Decimal
 from django.utils import timezone
 from django.db import transaction
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from ..models import Portfolio, PortfolioHolding, PortfolioHistory, Cryptocurrency, Transaction
 
 logger = logging.getLogger(__name__)
 
+HOLDINGS_CHANGED_EVENT = 'portfolio.holdings_changed'
+
+
 class PortfolioService:
+    @staticmethod
+    def notify_holdings_changed(user_id):
+        """Tell the user's PortfolioConsumers to reload holdings once the trade is committed"""
+        def send():
+            channel_layer = get_channel_layer()
+            if not channel_layer:
+                return
+            try:
+                async_to_sync(channel_layer.group_send)(f'portfolio_{user_id}', {'type': HOLDINGS_CHANGED_EVENT})
+            except Exception as e:
+                logger.warning(f"Failed to notify portfolio change for user {user_id}: {e}")
+        transaction.on_commit(send)
+
     @staticmethod
     def get_user_portfolio(user):
         """Get all portfolio entries for user"""
@@ -116,6 +134,7 @@ class PortfolioService:
                 portfolio.save()
             
             holding.save()
+            PortfolioService.notify_holdings_changed(user.id)
              
             # Recalculate portfolio value
             PortfolioService.calculate_portfolio_value(portfolio)
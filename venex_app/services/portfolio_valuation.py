@@ -0,0 +1,141 @@
+# venex_app/services/portfolio_valuation.py
+from ..choices import CRYPTO_CHOICES
+from ..models import Portfolio
+
+CRYPTO_NAMES = dict(CRYPTO_CHOICES)
+
+# Values are compared after rounding, so float noise is not pushed as a change
+_PRECISION = 8
+
+
+def _percent(part, whole):
+    return part / whole * 100 if whole else 0.0
+
+
+class PortfolioValuation:
+    """
+    In-memory holdings of one user, revalued from prices without queries
+
+    Quantities and cost basis are loaded once (load_holdings); apply_price()
+    records ticks and revalue()/changes() produce the portfolio figures and
+    what moved since the last push.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.holdings = {}
+        self.prices = {}
+        self._sent = None
+
+    def load_holdings(self):
+        """Quantities and cost basis from the database, in one query; returns the held symbols"""
+        rows = Portfolio.objects.filter(user_id=self.user_id, total_quantity__gt=0).values(
+            'cryptocurrency', 'total_quantity', 'average_buy_price', 'total_invested'
+        )
+        self.holdings = {
+            row['cryptocurrency']: {
+                'amount': float(row['total_quantity']),
+                'average_buy_price': float(row['average_buy_price']),
+                'total_invested': float(row['total_invested']),
+            }
+            for row in rows
+        }
+        self._sent = None
+        return set(self.holdings)
+
+    def apply_price(self, symbol, data):
+        """Record a full or partial (delta) tick; returns True if it affects a held symbol"""
+        if symbol not in self.holdings or not data:
+            return False
+        price = self.prices.setdefault(symbol, {})
+        for field in ('price', 'change_percentage_24h'):
+            if field in data:
+                price[field] = float(data[field] or 0)
+        return True
+
+    def revalue(self):
+        """Portfolio totals and per-holding figures at the recorded prices"""
+        holdings = {}
+        total_value = total_invested = daily_change = 0.0
+        for symbol, holding in self.holdings.items():
+            # Until a price is known, value the holding at cost
+            price = self.prices.get(symbol, {}).get('price') or holding['average_buy_price']
+            change_pct = self.prices.get(symbol, {}).get('change_percentage_24h', 0.0)
+            value = holding['amount'] * price
+            unrealized_pl = value - holding['total_invested']
+            holdings[symbol] = {
+                'symbol': symbol,
+                'name': CRYPTO_NAMES.get(symbol, symbol),
+                'amount': holding['amount'],
+                'average_buy_price': holding['average_buy_price'],
+                'current_price': price,
+                'value_usd': value,
+                'unrealized_pl': unrealized_pl,
+                'unrealized_pl_percentage': _percent(unrealized_pl, holding['total_invested']),
+                '24h_change': change_pct,
+            }
+            total_value += value
+            total_invested += holding['total_invested']
+            if change_pct > -100:
+                daily_change += value - value / (1 + change_pct / 100)
+
+        for holding in holdings.values():
+            holding['allocation'] = _percent(holding['value_usd'], total_value)
+
+        unrealized_pl = total_value - total_invested
+        return {
+            'portfolio': {
+                'total_value': total_value,
+                'unrealized_pl': unrealized_pl,
+                'unrealized_pl_percentage': _percent(unrealized_pl, total_invested),
+                # Part of the portfolio_data contract; no realized P/L is
+                # stored per user yet (Portfolio rows only keep cost basis)
+                'realized_pl': 0.0,
+                'daily_change': daily_change,
+                'daily_change_percentage': _percent(daily_change, total_value - daily_change),
+                'initial_investment': total_invested,
+            },
+            'holdings': holdings,
+        }
+
+    def snapshot(self):
+        """Full valuation (holdings as a list), remembered as the last push"""
+        state = self._rounded(self.revalue())
+        self._sent = state
+        return {'portfolio': state['portfolio'], 'holdings': list(state['holdings'].values())}
+
+    def changes(self):
+        """
+        Fields that changed since the last push, or None if nothing did
+
+        Returns:
+            dict: {'portfolio': {field: value}, 'holdings': {symbol: {field: value}}}
+        """
+        state = self._rounded(self.revalue())
+        previous = self._sent or {'portfolio': {}, 'holdings': {}}
+        portfolio = {
+            key: value for key, value in state['portfolio'].items()
+            if previous['portfolio'].get(key) != value
+        }
+        holdings = {}
+        for symbol, holding in state['holdings'].items():
+            before = previous['holdings'].get(symbol, {})
+            changed = {key: value for key, value in holding.items() if before.get(key) != value}
+            if changed:
+                holdings[symbol] = changed
+        self._sent = state
+        if not portfolio and not holdings:
+            return None
+        return {'portfolio': portfolio, 'holdings': holdings}
+
+    @staticmethod
+    def _rounded(state):
+        def rounded(values):
+            return {
+                key: round(value, _PRECISION) if isinstance(value, float) else value
+                for key, value in values.items()
+            }
+        return {
+            'portfolio': rounded(state['portfolio']),
+            'holdings': {symbol: rounded(holding) for symbol, holding in state['holdings'].items()},
+        }
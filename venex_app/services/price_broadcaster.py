@@ -0,0 +1,221 @@
+# venex_app/services/price_broadcaster.py
+import time
+import uuid
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+from ..models import Cryptocurrency
+from .price_snapshot import (
+    PRICE_FIELDS, SNAPSHOT_GROUP, INVALIDATE_EVENT, BROADCAST_STATE_KEY, PriceSnapshot, price_data
+)
+from .ws_broadcast import broadcast, sequenced_fields
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = 'price_broadcaster:leader'
+
+
+def price_group(symbol):
+    """Channel-layer group of the sockets following one symbol, e.g. price.BTC"""
+    return f'price.{symbol.upper()}'
+
+
+def price_snapshot_message(symbol, seq, data, timestamp=None):
+    """Full price fields of `symbol` as of sequence number `seq`"""
+    return {
+        'type': 'price_snapshot',
+        'symbol': symbol,
+        'seq': seq,
+        'data': data,
+        'timestamp': timestamp or timezone.now().isoformat()
+    }
+
+
+def price_delta_message(symbol, seq, changes):
+    """The fields of `symbol` that changed since `seq - 1`"""
+    return {
+        'type': 'price_delta',
+        'symbol': symbol,
+        'seq': seq,
+        'data': changes
+    }
+
+
+async def broadcast_price(message, channel_layer=None):
+    """
+    Send a price_snapshot/price_delta message to its symbol's group
+
+    Frames conflate per symbol; the message also travels as plain event
+    fields (symbol, seq, data) for consumers that apply prices rather than
+    forward them, and for merging queued frames (see OutboundQueue).
+    """
+    symbol = message['symbol']
+    await broadcast(
+        price_group(symbol), message, channel_layer=channel_layer, key=f'price:{symbol}',
+        fields=sequenced_fields(message)
+    )
+
+
+class PriceBroadcaster:
+    """
+    Central price fan-out
+
+    One broadcaster per deployment reads the Cryptocurrency snapshot once per
+    tick and sends one pre-encoded frame per changed symbol to that symbol's
+    group, so only sockets following the symbol receive it; consumers only
+    forward. A leader lease in the shared cache keeps a second broadcaster
+    (e.g. on another host) on standby instead of sending duplicates.
+
+    Frames are sequenced per symbol: the first one after (re)gaining the lease
+    is a price_snapshot, later ones are price_delta frames carrying only the
+    changed fields. Every process's PriceSnapshot receives the full state with
+    its sequence number, so consumers can answer subscribe/resync with a
+    snapshot that lines up with the deltas. Ingestion's invalidation message
+    wakes the broadcaster early, so stream ticks go out without waiting for
+    the next interval.
+    """
+
+    def __init__(self, interval=None, lease=None):
+        self.interval = interval or getattr(settings, 'PRICE_BROADCAST_INTERVAL', 2)
+        self.lease = lease or getattr(settings, 'PRICE_BROADCAST_LEASE', 15)
+        self.channel_layer = get_channel_layer()
+        self.token = uuid.uuid4().hex
+        self._last_seen = {}
+        self._sent = {}
+        self._states = None
+        self._stopping = asyncio.Event()
+        self._wake = asyncio.Event()
+        self.stats = {'ticks': 0, 'published': 0, 'standby_ticks': 0}
+
+    def snapshot(self):
+        """Current price fields of every active cryptocurrency, in one query"""
+        close_old_connections()
+        return list(Cryptocurrency.objects.filter(is_active=True).values(*PRICE_FIELDS))
+
+    async def is_leader(self):
+        """Take or renew the broadcaster lease"""
+        try:
+            if await cache.aadd(LEADER_KEY, self.token, timeout=self.lease):
+                logger.info("Price broadcaster acquired leadership")
+                return True
+            if await cache.aget(LEADER_KEY) == self.token:
+                await cache.atouch(LEADER_KEY, timeout=self.lease)
+                return True
+            return False
+        except Exception as e:
+            # Without the shared cache, broadcasting beats staying silent
+            logger.warning(f"Price broadcaster lease check failed: {e}")
+            return True
+
+    async def tick(self):
+        """Publish every symbol whose snapshot changed; returns the number published"""
+        if self._states is None:
+            # Continue the previous leader's sequence numbers
+            self._states = await cache.aget(BROADCAST_STATE_KEY) or {}
+        rows = await sync_to_async(self.snapshot)()
+        timestamp = timezone.now().isoformat()
+        updates = {}
+        for row in rows:
+            symbol = row['symbol']
+            if self._last_seen.get(symbol) == row['last_updated']:
+                continue
+            self._last_seen[symbol] = row['last_updated']
+            data = price_data(row)
+            previous = self._sent.get(symbol)
+            changes = data if previous is None else {
+                field: value for field, value in data.items() if previous.get(field) != value
+            }
+            if not changes:
+                continue
+
+            seq = self._states.get(symbol, {}).get('seq', 0) + 1
+            if previous is None:
+                message = price_snapshot_message(symbol, seq, data, timestamp)
+            else:
+                message = price_delta_message(symbol, seq, changes)
+            await broadcast_price(message, channel_layer=self.channel_layer)
+            self._sent[symbol] = data
+            updates[symbol] = self._states[symbol] = {'seq': seq, 'data': data}
+
+        if updates:
+            await cache.aset(BROADCAST_STATE_KEY, self._states, timeout=None)
+            await PriceSnapshot.publish(updates, channel_layer=self.channel_layer)
+        self.stats['published'] += len(updates)
+        return len(updates)
+
+    async def listen(self):
+        """Wake the broadcast loop whenever ingestion invalidates the price snapshot"""
+        channel = await self.channel_layer.new_channel()
+        try:
+            while True:
+                # Re-join now and then: channels_redis expires group membership
+                await self.channel_layer.group_add(SNAPSHOT_GROUP, channel)
+                try:
+                    message = await asyncio.wait_for(self.channel_layer.receive(channel), timeout=3600)
+                except asyncio.TimeoutError:
+                    continue
+                if message.get('type') == INVALIDATE_EVENT:
+                    self._wake.set()
+        finally:
+            await self.channel_layer.group_discard(SNAPSHOT_GROUP, channel)
+
+    async def run(self, iterations=None):
+        """
+        Broadcast every `interval` seconds until stopped
+
+        Args:
+            iterations (int): Stop after this many ticks (default: run forever)
+        """
+        if not self.channel_layer:
+            logger.error("No channel layer configured; price broadcaster not started")
+            return
+        logger.info(f"Price broadcaster started (interval {self.interval}s)")
+        listener = asyncio.ensure_future(self.listen())
+        try:
+            while not self._stopping.is_set():
+                started = time.monotonic()
+                self._wake.clear()
+                if await self.is_leader():
+                    try:
+                        await self.tick()
+                    except Exception as e:
+                        logger.error(f"Price broadcast tick failed: {e}")
+                else:
+                    # Standby: forget what was sent so a takeover starts with snapshots
+                    # and continues the leader's sequence numbers
+                    self._last_seen.clear()
+                    self._sent.clear()
+                    self._states = None
+                    self.stats['standby_ticks'] += 1
+                self.stats['ticks'] += 1
+
+                if iterations and self.stats['ticks'] >= iterations:
+                    break
+                await self._sleep(max(0, self.interval - (time.monotonic() - started)))
+        finally:
+            listener.cancel()
+            await self.release()
+            logger.info(f"Price broadcaster stopped: {self.stats}")
+
+    async def release(self):
+        """Give up the lease so a standby broadcaster can take over at once"""
+        try:
+            if await cache.aget(LEADER_KEY) == self.token:
+                await cache.adelete(LEADER_KEY)
+        except Exception as e:
+            logger.warning(f"Price broadcaster lease release failed: {e}")
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    async def _sleep(self, timeout):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,113 @@
+# venex_app/services/price_pipeline.py
+import logging
+import threading
+from django.conf import settings
+from ..models import Cryptocurrency
+
+logger = logging.getLogger(__name__)
+
+# Provider payload key -> Cryptocurrency field
+CRYPTO_FIELD_MAP = {
+    'price': 'current_price',
+    'change_24h': 'price_change_24h',
+    'change_percentage_24h': 'price_change_percentage_24h',
+    'market_cap': 'market_cap',
+    'volume': 'volume_24h',
+    'circulating_supply': 'circulating_supply',
+    'total_supply': 'total_supply',
+    'max_supply': 'max_supply',
+    'rank': 'rank',
+}
+
+DEFAULT_EPSILONS = {
+    'price': {'relative': 0.00001},
+    'change_24h': {'relative': 0.001},
+    'change_percentage_24h': {'absolute': 0.01},
+    'market_cap': {'relative': 0.0001},
+    'volume': {'relative': 0.001},
+}
+
+
+class PriceChangeFilter:
+    """
+    Change-detection stage between provider parsing and persistence
+
+    Compares incoming ticks with the last known snapshot and keeps only the
+    symbols where some field moved more than its epsilon. A field changed if
+    |new - old| > max(absolute, relative * |old|); fields without an epsilon
+    count any change. The snapshot is seeded from the database on first use
+    and only advanced by `commit()` once the changed rows have been written.
+    """
+
+    def __init__(self, epsilons=None):
+        self.epsilons = epsilons or getattr(settings, 'CRYPTO_CHANGE_EPSILON', DEFAULT_EPSILONS)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.last_stats = {'received': 0, 'changed': 0, 'suppressed': 0}
+        self.totals = {'received': 0, 'changed': 0, 'suppressed': 0}
+
+    def detect(self, crypto_data):
+        """
+        Split a provider payload into changed symbols
+
+        Returns:
+            dict: The subset of `crypto_data` that should be written and published
+        """
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._load_snapshot()
+            snapshot = self._snapshot
+
+        changed = {
+            symbol: data for symbol, data in crypto_data.items()
+            if symbol not in snapshot or self._has_changed(snapshot[symbol], data)
+        }
+
+        stats = {
+            'received': len(crypto_data),
+            'changed': len(changed),
+            'suppressed': len(crypto_data) - len(changed),
+        }
+        self.last_stats = stats
+        for key, value in stats.items():
+            self.totals[key] += value
+        return changed
+
+    def commit(self, changed):
+        """Record written values as the new snapshot"""
+        with self._lock:
+            if self._snapshot is None:
+                return
+            for symbol, data in changed.items():
+                entry = self._snapshot.setdefault(symbol, {})
+                entry.update({key: value for key, value in data.items() if key in CRYPTO_FIELD_MAP})
+
+    def reset(self):
+        """Forget the snapshot; the next detect() reloads it from the database"""
+        with self._lock:
+            self._snapshot = None
+
+    def _has_changed(self, previous, data):
+        for key, value in data.items():
+            if key not in CRYPTO_FIELD_MAP:
+                continue
+            old = previous.get(key)
+            if value is None or old is None:
+                if value != old:
+                    return True
+                continue
+
+            new_value, old_value = float(value), float(old)
+            epsilon = self.epsilons.get(key, {})
+            threshold = max(epsilon.get('absolute', 0), epsilon.get('relative', 0) * abs(old_value))
+            if abs(new_value - old_value) > threshold:
+                return True
+        return False
+
+    def _load_snapshot(self):
+        snapshot = {}
+        rows = Cryptocurrency.objects.values('symbol', *CRYPTO_FIELD_MAP.values())
+        for row in rows:
+            snapshot[row['symbol']] = {key: row[field] for key, field in CRYPTO_FIELD_MAP.items()}
+        logger.info(f"Change filter seeded with {len(snapshot)} symbols")
+        return snapshot
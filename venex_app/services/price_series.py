@@ -0,0 +1,186 @@
+# venex_app/services/price_series.py
+import time
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from django.conf import settings
+from .candle_service import candle_service
+
+logger = logging.getLogger(__name__)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average. Bucket averages and per-bucket areas are computed with numpy;
+    only the walk over buckets is sequential.
+
+    Returns:
+        ndarray: Indices of the points to keep, in order
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets over the interior points 1..n-2
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = anchor = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[anchor], y[anchor]
+        areas = np.abs(
+            (ax - next_x[bucket]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[bucket] - ay)
+        )
+        anchor = lo + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+    selected[-1] = n - 1
+    return selected
+
+
+class PriceSeries:
+    """Contiguous float64 timestamp/price/volume columns for one symbol, in time order"""
+
+    __slots__ = ('timestamps', 'prices', 'volumes')
+
+    def __init__(self, timestamps, prices, volumes):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+
+    @classmethod
+    def from_points(cls, points):
+        """Build from historical-data dicts (timestamp in seconds, price, volume)"""
+        count = len(points)
+        timestamps = np.fromiter((point['timestamp'] for point in points), dtype=np.float64, count=count)
+        prices = np.fromiter((point['price'] for point in points), dtype=np.float64, count=count)
+        volumes = np.fromiter((point.get('volume') or 0 for point in points), dtype=np.float64, count=count)
+        if count and np.any(np.diff(timestamps) < 0):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, prices, volumes = timestamps[order], prices[order], volumes[order]
+        return cls(timestamps, prices, volumes)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def slice(self, start=None, end=None):
+        """Points with start <= timestamp < end, as views on the same arrays"""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, start, side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, end, side='left'))
+        return PriceSeries(self.timestamps[lo:hi], self.prices[lo:hi], self.volumes[lo:hi])
+
+    def downsample(self, max_points):
+        """At most `max_points` points chosen by LTTB on the price curve"""
+        if not max_points or len(self) <= max_points:
+            return self
+        keep = lttb_indices(self.timestamps, self.prices, max_points)
+        return PriceSeries(self.timestamps[keep], self.prices[keep], self.volumes[keep])
+
+    def price_at(self, moment):
+        """Last price at or before `moment`, or the first price if none"""
+        index = int(np.searchsorted(self.timestamps, moment, side='right')) - 1
+        return float(self.prices[max(index, 0)])
+
+    def chart_payload(self, days, max_points=None):
+        """
+        Column-oriented chart data for the last `days` days
+
+        Returns:
+            dict: timestamps/prices/volumes lists plus current price and 24h change
+        """
+        now = time.time()
+        view = self.slice(now - days * 86400).downsample(max_points or getattr(settings, 'CHART_MAX_POINTS', 500))
+        if not len(self):
+            return {'timestamps': [], 'prices': [], 'volumes': [], 'points': 0,
+                    'current_price': 0, 'price_change_24h': 0, 'price_change_percentage_24h': 0}
+
+        current_price = float(self.prices[-1])
+        previous_price = self.price_at(now - 86400)
+        change = current_price - previous_price
+        return {
+            'timestamps': view.timestamps.tolist(),
+            'prices': view.prices.tolist(),
+            'volumes': view.volumes.tolist(),
+            'points': len(view),
+            'current_price': current_price,
+            'price_change_24h': change,
+            'price_change_percentage_24h': change / previous_price * 100 if previous_price else 0
+        }
+
+
+class PriceSeriesCache:
+    """
+    In-process memo of PriceSeries built from cached historical data
+
+    Freshness and stale-while-revalidate belong to `historical_cache` (the
+    loader's TwoTierCache); this only remembers the columns built from the
+    points list it last returned. The list is the cache entry itself, so the
+    series is rebuilt exactly when the entry is reloaded or refetched, and
+    a hit costs one identity check on top of the two-tier lookup.
+
+    One series is kept per symbol and candle resolution, loaded for the widest
+    range served at that resolution (e.g. 90 days of hourly points), and any
+    narrower range is a searchsorted slice of it.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or getattr(settings, 'PRICE_SERIES_CACHE_SIZE', 64)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def source_days(self, days):
+        """Range to load so every range at the same resolution can be sliced from it"""
+        interval = candle_service.interval_for_range(days)
+        widest = [max_days for max_days, value in candle_service.range_intervals.items() if value == interval]
+        return max([days] + widest)
+
+    def get(self, symbol, days, loader):
+        """
+        Series covering at least `days` days
+
+        Args:
+            loader (callable): loader(symbol, days) -> historical-data dicts,
+                served from historical_cache
+        """
+        key = (symbol, self.source_days(days))
+        return self._series(key, loader(symbol, key[1]))
+
+    async def aget(self, symbol, days, loader):
+        """Async variant of get(); `loader` is a coroutine function"""
+        key = (symbol, self.source_days(days))
+        return self._series(key, await loader(symbol, key[1]))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _series(self, key, points):
+        if not points:
+            return PriceSeries.from_points([])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is points:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        series = PriceSeries.from_points(points)
+        with self._lock:
+            self._entries[key] = (points, series)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return series
+
+
+# Global instance
+price_series_cache = PriceSeriesCache()
@@ -0,0 +1,194 @@
+# venex_app/services/price_snapshot.py
+import time
+import asyncio
+import logging
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from ..models import Cryptocurrency
+
+logger = logging.getLogger(__name__)
+
+# Channel-layer group every process's snapshot listener joins
+SNAPSHOT_GROUP = 'price_snapshot'
+INVALIDATE_EVENT = 'price_snapshot.invalidate'
+UPDATE_EVENT = 'price_snapshot.update'
+# Latest {symbol: {'seq', 'data'}} the price broadcaster has sent, kept in the shared cache
+BROADCAST_STATE_KEY = 'price_broadcaster:state'
+
+PRICE_FIELDS = (
+    'symbol', 'current_price', 'price_change_24h', 'price_change_percentage_24h',
+    'volume_24h', 'market_cap', 'last_updated'
+)
+
+EMPTY_PRICE = {
+    'price': 0,
+    'change_24h': 0,
+    'change_percentage_24h': 0,
+    'volume': 0,
+    'market_cap': 0,
+    'last_updated': None
+}
+
+
+def price_data(row):
+    """Client-facing price fields from a Cryptocurrency values() row"""
+    return {
+        'price': float(row['current_price']),
+        'change_24h': float(row['price_change_24h']),
+        'change_percentage_24h': float(row['price_change_percentage_24h']),
+        'volume': float(row['volume_24h']),
+        'market_cap': float(row['market_cap']) if row['market_cap'] else 0,
+        'last_updated': row['last_updated'].isoformat() if row['last_updated'] else None
+    }
+
+
+class PriceSnapshot:
+    """
+    Process-wide in-memory copy of every active symbol's current price
+
+    Consumers read it synchronously (no thread hop, no SQL). Ingestion sends
+    one invalidation message on the channel layer after it writes prices;
+    a listener task in each ASGI process reloads the snapshot with a single
+    query. The snapshot also reloads when older than `max_age`, in case an
+    invalidation was lost.
+
+    The price broadcaster publishes the state behind each sequenced frame
+    (PriceSnapshot.publish); applying it keeps the per-symbol sequence
+    numbers consumers hand out with snapshots in step with the deltas.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age or getattr(settings, 'PRICE_SNAPSHOT_MAX_AGE', 60)
+        self.version = 0
+        self.loaded_at = None
+        self._prices = {}
+        self._seqs = {}
+        self._loop = None
+        self._lock = None
+        self._listener = None
+
+    def get(self, symbol):
+        """Price fields for `symbol`, or None if it is not in the snapshot"""
+        return self._prices.get(symbol)
+
+    def seq(self, symbol):
+        """Sequence number of the last broadcast frame reflected in the snapshot (0 if none yet)"""
+        return self._seqs.get(symbol, 0)
+
+    def all(self):
+        return dict(self._prices)
+
+    def apply(self, updates):
+        """Merge broadcaster updates {symbol: {'seq', 'data'}}, ignoring any older than what is held"""
+        prices = dict(self._prices)
+        for symbol, update in updates.items():
+            if update['seq'] >= self._seqs.get(symbol, 0):
+                prices[symbol] = update['data']
+                self._seqs[symbol] = update['seq']
+        self._prices = prices
+
+    def load(self):
+        """
+        Replace the snapshot from the database in one query, then overlay the
+        broadcaster's last sequenced states so snapshots line up with deltas
+        """
+        close_old_connections()
+        rows = Cryptocurrency.objects.filter(is_active=True).values(*PRICE_FIELDS)
+        self._prices = {row['symbol']: price_data(row) for row in rows}
+        try:
+            self.apply(cache.get(BROADCAST_STATE_KEY) or {})
+        except Exception as e:
+            logger.warning(f"Price snapshot could not read broadcaster state: {e}")
+        self.loaded_at = time.monotonic()
+        self.version += 1
+        return self._prices
+
+    def is_fresh(self):
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.max_age
+
+    async def ready(self):
+        """Make sure this process listens for invalidations and holds a fresh snapshot"""
+        self._bind_loop()
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen())
+        if not self.is_fresh():
+            await self.refresh()
+
+    async def refresh(self, force=False):
+        """
+        Reload from the database
+
+        Callers racing for a stale snapshot share one reload; `force` (used on
+        invalidation) reloads even if another reload finished meanwhile, as
+        that one may have read the rows before the new prices were committed.
+        """
+        self._bind_loop()
+        version = self.version
+        async with self._lock:
+            if force or self.version == version:
+                await sync_to_async(self.load)()
+
+    def _bind_loop(self):
+        # Locks and tasks belong to one event loop; start over on a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._listener = None
+
+    async def _listen(self):
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            logger.warning("No channel layer configured; price snapshot relies on max_age reloads")
+            return
+        while True:
+            try:
+                channel = await channel_layer.new_channel()
+                logger.info(f"Price snapshot listening for invalidations on {channel}")
+                while True:
+                    # Re-join now and then: channels_redis expires group membership
+                    await channel_layer.group_add(SNAPSHOT_GROUP, channel)
+                    try:
+                        message = await asyncio.wait_for(channel_layer.receive(channel), timeout=3600)
+                    except asyncio.TimeoutError:
+                        continue
+                    if message.get('type') == INVALIDATE_EVENT:
+                        await self.refresh(force=True)
+                    elif message.get('type') == UPDATE_EVENT:
+                        self.apply(message['prices'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Price snapshot listener failed: {e}")
+                await asyncio.sleep(5)
+
+    @staticmethod
+    async def invalidate(channel_layer=None):
+        """Tell every process to reload its snapshot"""
+        channel_layer = channel_layer or get_channel_layer()
+        if channel_layer:
+            await channel_layer.group_send(SNAPSHOT_GROUP, {'type': INVALIDATE_EVENT})
+
+    @staticmethod
+    async def publish(updates, channel_layer=None):
+        """Send sequenced price states to every process's snapshot"""
+        channel_layer = channel_layer or get_channel_layer()
+        if channel_layer:
+            await channel_layer.group_send(SNAPSHOT_GROUP, {'type': UPDATE_EVENT, 'prices': updates})
+
+    @classmethod
+    def invalidate_on_commit(cls):
+        """Sync variant for ingestion code; sends once the price writes are committed"""
+        def send():
+            try:
+                async_to_sync(cls.invalidate)()
+            except Exception as e:
+                logger.warning(f"Price snapshot invalidation failed: {e}")
+        transaction.on_commit(send)
+
+
+# Global instance
+price_snapshot = PriceSnapshot()
@@ -0,0 +1,184 @@
+# venex_app/services/provider_health.py
+import time
+import logging
+import threading
+from django.core.cache import cache
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHealth:
+    """
+    Circuit breaker and health score per external data provider
+
+    State lives in the shared Django cache so every worker sees the same open
+    circuits. Reads are memoised in-process for a second so an open circuit is
+    skipped without a Redis round trip on the hot path.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    # allow_request() result for the single half-open trial call (truthy)
+    PROBE = 'probe'
+
+    def __init__(self, prefix='provider_health'):
+        self.prefix = prefix
+        self.failure_threshold = getattr(settings, 'CRYPTO_CIRCUIT_FAILURE_THRESHOLD', 3)
+        self.base_backoff = getattr(settings, 'CRYPTO_CIRCUIT_BASE_BACKOFF', 30)
+        self.max_backoff = getattr(settings, 'CRYPTO_CIRCUIT_MAX_BACKOFF', 600)
+        self.sample_window = getattr(settings, 'CRYPTO_CIRCUIT_SAMPLE_WINDOW', 50)
+        self.sample_max_age = getattr(settings, 'CRYPTO_CIRCUIT_SAMPLE_MAX_AGE', 600)
+        self.probe_timeout = getattr(settings, 'CRYPTO_CIRCUIT_PROBE_TIMEOUT', 30)
+        self.local_ttl = 1.0
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def allow_request(self, name):
+        """
+        Whether a call to the provider may go out now
+
+        Closed circuits always allow. Open circuits reject until their backoff
+        expires; after that exactly one worker gets a half-open probe, returned
+        as PROBE so its outcome can be recorded with `probe=True`.
+        """
+        state = self._get_state(name)
+        if state['state'] == self.CLOSED:
+            return True
+        if time.time() < state['open_until']:
+            return False
+        try:
+            return self.PROBE if cache.add(self._key(name, 'probe'), 1, timeout=self.probe_timeout) else False
+        except Exception as e:
+            logger.warning(f"Circuit probe lock failed for {name}: {e}")
+            return self.PROBE
+
+    def record_success(self, name, latency_ms):
+        state = self._get_state(name, fresh=True)
+        self._add_sample(state, True, latency_ms)
+        if state['state'] == self.OPEN:
+            logger.info(f"Circuit for {name} closed after successful probe")
+            self._delete_probe(name)
+        state.update({'state': self.CLOSED, 'failures': 0, 'backoff': 0, 'open_until': 0})
+        self._save_state(name, state)
+
+    def record_failure(self, name, latency_ms, probe=False):
+        """
+        Count a failed call; `probe` if it was admitted as the half-open probe
+
+        A call during which the circuit was opened (typically trip() on its
+        own 429 with the provider's Retry-After) is only sampled: that open
+        already accounts for it, and its backoff is left alone.
+        """
+        state = self._get_state(name, fresh=True)
+        self._add_sample(state, False, latency_ms)
+        started = time.time() - latency_ms / 1000
+        opened_during_call = state['state'] == self.OPEN and state.get('opened_at', 0) >= started
+        if state['state'] == self.OPEN:
+            if probe and not opened_during_call:
+                # Failed half-open probe: back off twice as long
+                state['failures'] += 1
+                self._open(name, state, min(state['backoff'] * 2, self.max_backoff))
+        else:
+            state['failures'] += 1
+            if state['failures'] >= self.failure_threshold:
+                self._open(name, state, self.base_backoff)
+        if probe:
+            self._delete_probe(name)
+        self._save_state(name, state)
+
+    def trip(self, name, retry_after=None):
+        """Open the circuit immediately, e.g. on a 429 from the provider"""
+        state = self._get_state(name, fresh=True)
+        backoff = retry_after or max(state['backoff'] * 2, self.base_backoff)
+        self._open(name, state, min(backoff, self.max_backoff))
+        self._save_state(name, state)
+
+    def rank(self, providers, key=lambda provider: provider):
+        """
+        Order providers by health: open circuits last, then by success rate
+        (in 10% steps so near-equal providers compare on latency) and p95 latency
+        """
+        def score(provider):
+            state = self._get_state(key(provider))
+            is_open = state['state'] == self.OPEN
+            success_rate, p95 = self._stats(state)
+            return (is_open, -round(success_rate, 1), p95)
+
+        return sorted(providers, key=score)
+
+    def get_stats(self, name):
+        """Circuit state, success rate and p95 latency for a provider"""
+        state = self._get_state(name, fresh=True)
+        success_rate, p95 = self._stats(state)
+        return {
+            'state': state['state'],
+            'failures': state['failures'],
+            'open_until': state['open_until'],
+            'backoff': state['backoff'],
+            'success_rate': round(success_rate, 3),
+            'p95_ms': round(p95, 1),
+            'samples': len(state['samples']),
+        }
+
+    def _open(self, name, state, backoff):
+        state['state'] = self.OPEN
+        state['backoff'] = backoff
+        state['opened_at'] = time.time()
+        state['open_until'] = state['opened_at'] + backoff
+        logger.warning(f"Circuit for {name} opened for {backoff}s ({state['failures']} consecutive failures)")
+
+    def _stats(self, state):
+        # Old samples age out so a demoted provider gets another chance
+        cutoff = time.time() - self.sample_max_age
+        samples = [(ok, ms) for ts, ok, ms in state['samples'] if ts >= cutoff]
+        if not samples:
+            return 1.0, 0.0
+        success_rate = sum(1 for ok, _ in samples if ok) / len(samples)
+        latencies = sorted(ms for _, ms in samples)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return success_rate, p95
+
+    def _add_sample(self, state, ok, latency_ms):
+        state['samples'].append((time.time(), ok, round(latency_ms, 1)))
+        del state['samples'][:-self.sample_window]
+
+    def _default_state(self):
+        return {'state': self.CLOSED, 'failures': 0, 'backoff': 0, 'open_until': 0, 'samples': []}
+
+    def _get_state(self, name, fresh=False):
+        now = time.time()
+        if not fresh:
+            with self._lock:
+                memo = self._local.get(name)
+            if memo and memo[0] > now:
+                return memo[1]
+        try:
+            state = cache.get(self._key(name, 'state')) or self._default_state()
+        except Exception as e:
+            logger.warning(f"Circuit state read failed for {name}: {e}")
+            state = self._local.get(name, (0, self._default_state()))[1]
+        with self._lock:
+            self._local[name] = (now + self.local_ttl, state)
+        return state
+
+    def _save_state(self, name, state):
+        with self._lock:
+            self._local[name] = (time.time() + self.local_ttl, state)
+        try:
+            cache.set(self._key(name, 'state'), state, timeout=None)
+        except Exception as e:
+            logger.warning(f"Circuit state write failed for {name}: {e}")
+
+    def _delete_probe(self, name):
+        try:
+            cache.delete(self._key(name, 'probe'))
+        except Exception as e:
+            logger.warning(f"Circuit probe release failed for {name}: {e}")
+
+    def _key(self, name, suffix):
+        return f'{self.prefix}:{name}:{suffix}'
+
+
+# Global instance
+provider_health = ProviderHealth()
@@ -0,0 +1,165 @@
+# venex_app/services/retention_service.py
+import time
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models import PriceHistory, PriceCandle
+from .candle_service import candle_service, CANDLE_INTERVALS
+
+logger = logging.getLogger(__name__)
+
+# Days to keep each series; None keeps it forever
+DEFAULT_RETENTION = {
+    'raw': 7,
+    '1m': 2,
+    '5m': 30,
+    '1h': 365,
+    '1d': None,
+}
+
+
+class PriceRetentionService:
+    """
+    Retention and downsampling for stored prices
+
+    Raw PriceHistory rows older than their retention are compacted into the
+    finest candle interval that outlives them and then deleted; candles are
+    pruned per interval. Work is done in small batches, each in its own short
+    transaction, so the hot tables are never locked for long.
+    """
+
+    def __init__(self, policies=None, batch_size=None, pause=0):
+        self.policies = dict(DEFAULT_RETENTION, **(policies or getattr(settings, 'PRICE_HISTORY_RETENTION', {})))
+        self.batch_size = batch_size or getattr(settings, 'PRICE_HISTORY_COMPACTION_BATCH', 5000)
+        self.pause = pause
+
+    def compaction_interval(self):
+        """Finest candle interval kept longer than raw rows"""
+        raw_days = self.policies['raw']
+        for interval in CANDLE_INTERVALS:
+            days = self.policies.get(interval)
+            if days is None or raw_days is None or days > raw_days:
+                return interval
+        return None
+
+    def run(self, dry_run=False, max_batches=None):
+        """
+        Apply every retention policy
+
+        Args:
+            dry_run (bool): Only count what would be compacted or deleted
+            max_batches (int): Stop each phase after this many batches
+
+        Returns:
+            dict: Rows compacted/deleted and candles written/pruned
+        """
+        stats = {'raw_compacted': 0, 'candles_written': 0, 'candles_pruned': {}, 'batches': 0}
+        stats.update(self.compact_raw(dry_run=dry_run, max_batches=max_batches))
+        for interval in CANDLE_INTERVALS:
+            pruned, batches = self.prune_candles(interval, dry_run=dry_run, max_batches=max_batches)
+            stats['candles_pruned'][interval] = pruned
+            stats['batches'] += batches
+        logger.info(f"Price history retention finished: {stats}")
+        return stats
+
+    def compact_raw(self, dry_run=False, max_batches=None):
+        """Roll raw rows past their retention into candles, then delete them"""
+        stats = {'raw_compacted': 0, 'candles_written': 0, 'batches': 0}
+        cutoff = self._cutoff('raw')
+        if cutoff is None:
+            return stats
+
+        interval = self.compaction_interval()
+        if interval:
+            # Never split a candle bucket between this run and the next
+            cutoff = candle_service.bucket_start(cutoff, interval)
+        expired = PriceHistory.objects.filter(timestamp__lt=cutoff)
+        if dry_run:
+            stats['raw_compacted'] = expired.count()
+            return stats
+
+        while max_batches is None or stats['batches'] < max_batches:
+            rows = list(
+                expired.order_by('timestamp')
+                .values_list('id', 'cryptocurrency_id', 'timestamp', 'price', 'volume')[:self.batch_size]
+            )
+            if not rows:
+                break
+            if interval and len(rows) == self.batch_size:
+                rows = self._whole_buckets(expired, rows, interval)
+            with transaction.atomic():
+                if interval:
+                    stats['candles_written'] += candle_service.build_candles(
+                        interval,
+                        [(crypto_id, moment, price, volume) for _, crypto_id, moment, price, volume in rows]
+                    )
+                PriceHistory.objects.filter(id__in=[row[0] for row in rows]).delete()
+            stats['raw_compacted'] += len(rows)
+            stats['batches'] += 1
+            logger.info(f"Compacted {len(rows)} price history rows up to {rows[-1][2]}")
+            self._sleep()
+        return stats
+
+    def prune_candles(self, interval, dry_run=False, max_batches=None):
+        """
+        Delete candles of `interval` past their retention
+
+        Returns:
+            tuple: (candles deleted, batches run)
+        """
+        cutoff = self._cutoff(interval)
+        if cutoff is None:
+            return 0, 0
+
+        expired = PriceCandle.objects.filter(interval=interval, bucket_start__lt=cutoff)
+        if dry_run:
+            return expired.count(), 0
+
+        deleted = batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = list(expired.order_by('bucket_start').values_list('id', flat=True)[:self.batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                PriceCandle.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            batches += 1
+            self._sleep()
+        if deleted:
+            logger.info(f"Pruned {deleted} {interval} candles older than {cutoff}")
+        return deleted, batches
+
+    def _whole_buckets(self, expired, rows, interval):
+        """
+        Trim a full batch to whole `interval` buckets
+
+        build_candles leaves existing buckets alone, so a bucket split across
+        two batches would keep only the first batch's points. Rows of the last
+        (possibly partial) bucket are left for the next batch; a batch that
+        sits inside a single bucket is widened to the whole bucket instead.
+        """
+        boundary = candle_service.bucket_start(rows[-1][2], interval)
+        complete = [row for row in rows if row[2] < boundary]
+        if complete:
+            return complete
+        end = boundary + timezone.timedelta(seconds=CANDLE_INTERVALS[interval])
+        return list(
+            expired.filter(timestamp__lt=end).order_by('timestamp')
+            .values_list('id', 'cryptocurrency_id', 'timestamp', 'price', 'volume')
+        )
+
+    def _cutoff(self, series):
+        days = self.policies.get(series)
+        if days is None:
+            return None
+        return timezone.now() - timezone.timedelta(days=days)
+
+    def _sleep(self):
+        # Give replicas and concurrent writers room between batches
+        if self.pause:
+            time.sleep(self.pause)
+
+
+# Global instance
+retention_service = PriceRetentionService()
@@ -0,0 +1,170 @@
+# venex_app/services/single_flight.py
+import math
+import time
+import uuid
+import asyncio
+import logging
+from django.core.cache import cache
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Marker for "no result published yet"; None is a valid result
+_MISSING = object()
+
+
+class SingleFlight:
+    """
+    Request coalescing across processes
+
+    The first caller for a key takes a lease in the shared cache (Redis) and
+    runs the function; concurrent callers in any worker wait briefly for the
+    leader's published result instead of repeating the work. Followers that
+    run out of patience get the previous result if it is still held (results
+    are kept for the lease or wait time, whichever is longer), or `default`.
+    A crashed leader only blocks the key until its lease expires.
+    """
+
+    def __init__(self, prefix='single_flight', lease=None, wait_timeout=None, poll_interval=0.05, result_ttl=None):
+        self.prefix = prefix
+        self.lease = lease or getattr(settings, 'SINGLE_FLIGHT_LEASE', 30)
+        self.wait_timeout = wait_timeout if wait_timeout is not None else getattr(settings, 'SINGLE_FLIGHT_WAIT', 5)
+        self.poll_interval = poll_interval
+        # Results only need to outlive the callers waiting on the flight that
+        # produced them; longer-lived copies are the callers' caches' business
+        self.result_ttl = result_ttl or getattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', None) or max(
+            self.lease, math.ceil(self.wait_timeout)
+        )
+        self.stats = {'leader': 0, 'follower': 0, 'stale': 0}
+
+    def run(self, key, fn, default=None):
+        """
+        Run `fn()` once per key across all workers
+
+        Args:
+            key (str): Identifies the work, e.g. 'crypto_prices'
+            fn (callable): The work; its result must be picklable
+            default: Returned to followers when no result is available
+
+        Returns:
+            The leader's result
+        """
+        started = time.time()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            # Check for a result first so waiters don't start a second flight
+            # in the gap between the leader publishing and releasing
+            finished_at, result = self._get_result(key)
+            if finished_at is not None and finished_at >= started:
+                self.stats['follower'] += 1
+                return result
+
+            token = self._acquire(key)
+            if token:
+                self.stats['leader'] += 1
+                try:
+                    result = fn()
+                    self._publish(key, result)
+                    return result
+                finally:
+                    self._release(key, token)
+
+            if time.monotonic() >= deadline:
+                return self._previous(key, result, default)
+            time.sleep(self.poll_interval)
+
+    async def arun(self, key, fn, default=None):
+        """Async variant of run(); `fn` is a coroutine function"""
+        started = time.time()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                finished_at, result = await cache.aget(self._key(key, 'result'), (None, _MISSING))
+            except Exception as e:
+                logger.warning(f"Single-flight result read failed for {key}: {e}")
+                finished_at, result = None, _MISSING
+            if finished_at is not None and finished_at >= started:
+                self.stats['follower'] += 1
+                return result
+
+            token = await self._aacquire(key)
+            if token:
+                self.stats['leader'] += 1
+                try:
+                    result = await fn()
+                    await self._apublish(key, result)
+                    return result
+                finally:
+                    await self._arelease(key, token)
+
+            if time.monotonic() >= deadline:
+                return self._previous(key, result, default)
+            await asyncio.sleep(self.poll_interval)
+
+    def last_result(self, key, default=None):
+        """Most recent result published for a key, however old"""
+        _, result = self._get_result(key)
+        return default if result is _MISSING else result
+
+    def _previous(self, key, result, default):
+        self.stats['stale'] += 1
+        logger.warning(f"Single-flight wait for {key} timed out; serving previous result")
+        return default if result is _MISSING else result
+
+    def _acquire(self, key):
+        token = uuid.uuid4().hex
+        try:
+            return token if cache.add(self._key(key, 'lock'), token, timeout=self.lease) else None
+        except Exception as e:
+            # Without the shared cache every worker does its own work, as before
+            logger.warning(f"Single-flight lock failed for {key}: {e}")
+            return token
+
+    def _release(self, key, token):
+        try:
+            # Only drop our own lease; after expiry another leader may hold it
+            if cache.get(self._key(key, 'lock')) == token:
+                cache.delete(self._key(key, 'lock'))
+        except Exception as e:
+            logger.warning(f"Single-flight release failed for {key}: {e}")
+
+    def _publish(self, key, result):
+        try:
+            cache.set(self._key(key, 'result'), (time.time(), result), timeout=self.result_ttl)
+        except Exception as e:
+            logger.warning(f"Single-flight publish failed for {key}: {e}")
+
+    def _get_result(self, key):
+        try:
+            return cache.get(self._key(key, 'result'), (None, _MISSING))
+        except Exception as e:
+            logger.warning(f"Single-flight result read failed for {key}: {e}")
+            return None, _MISSING
+
+    async def _aacquire(self, key):
+        token = uuid.uuid4().hex
+        try:
+            return token if await cache.aadd(self._key(key, 'lock'), token, timeout=self.lease) else None
+        except Exception as e:
+            logger.warning(f"Single-flight lock failed for {key}: {e}")
+            return token
+
+    async def _arelease(self, key, token):
+        try:
+            if await cache.aget(self._key(key, 'lock')) == token:
+                await cache.adelete(self._key(key, 'lock'))
+        except Exception as e:
+            logger.warning(f"Single-flight release failed for {key}: {e}")
+
+    async def _apublish(self, key, result):
+        try:
+            await cache.aset(self._key(key, 'result'), (time.time(), result), timeout=self.result_ttl)
+        except Exception as e:
+            logger.warning(f"Single-flight publish failed for {key}: {e}")
+
+    def _key(self, key, suffix):
+        return f'{self.prefix}:{key}:{suffix}'
+
+
+# Global instance
+single_flight = SingleFlight()
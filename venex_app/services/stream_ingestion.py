@@ -0,0 +1,172 @@
+# venex_app/services/stream_ingestion.py
+import json
+import time
+import asyncio
+import logging
+import aiohttp
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from ..choices import CRYPTO_CHOICES
+from .crypto_api_service import crypto_service
+
+logger = logging.getLogger(__name__)
+
+
+class TickerStreamIngestor:
+    """
+    Streaming price ingestion from an exchange ticker WebSocket
+
+    Subscribes to the Binance combined-stream `<pair>@ticker` feed (or any
+    server speaking the same format, e.g. run_fake_ticker_feed) for every
+    symbol in CRYPTO_CHOICES. Ticks are normalised to the provider dict shape,
+    conflated per symbol and flushed to the database every `flush_interval`
+    seconds. The flush's snapshot invalidation wakes the price broadcaster,
+    which publishes the sequenced frames.
+    """
+
+    QUOTE = 'USDT'
+
+    def __init__(self, url=None, symbols=None, flush_interval=None, service=None, record_path=None):
+        self.base_url = url or getattr(settings, 'CRYPTO_STREAM_URL', 'wss://stream.binance.com:9443/stream')
+        self.symbols = symbols or [choice[0] for choice in CRYPTO_CHOICES]
+        self.flush_interval = flush_interval or getattr(settings, 'CRYPTO_STREAM_FLUSH_INTERVAL', 1.0)
+        self.service = service or crypto_service
+        self.record_path = record_path
+        self._pending = {}
+        self._stopping = asyncio.Event()
+        self.stats = {'messages': 0, 'ticks': 0, 'flushes': 0, 'rows_written': 0, 'suppressed': 0, 'reconnects': 0}
+
+    def stream_url(self):
+        """Combined-stream URL subscribing to the ticker of every tradable symbol"""
+        streams = '/'.join(
+            f'{symbol.lower()}{self.QUOTE.lower()}@ticker'
+            for symbol in self.symbols if symbol != self.QUOTE
+        )
+        separator = '&' if '?' in self.base_url else '?'
+        return f'{self.base_url}{separator}streams={streams}'
+
+    def normalize(self, message):
+        """
+        Convert a 24hr ticker event to (symbol, data) in the shape
+        `_parse_coingecko_data` produces. Fields the exchange doesn't send
+        (market cap, supply, rank) are left out so stored values are kept.
+        """
+        payload = message.get('data', message)
+        if payload.get('e') != '24hrTicker':
+            return None
+        pair = payload.get('s', '')
+        if not pair.endswith(self.QUOTE):
+            return None
+        symbol = pair[:-len(self.QUOTE)]
+        if symbol not in self.symbols:
+            return None
+        return symbol, {
+            'price': float(payload['c']),
+            'change_24h': float(payload.get('p', 0)),
+            'change_percentage_24h': float(payload.get('P', 0)),
+            'volume': float(payload.get('v', 0)),
+            'event_time': payload.get('E'),
+        }
+
+    async def run(self, duration=None, max_messages=None):
+        """
+        Consume the stream until stopped, reconnecting with backoff
+
+        Args:
+            duration (float): Stop after this many seconds
+            max_messages (int): Stop after this many messages
+        """
+        started = time.monotonic()
+        flusher = asyncio.ensure_future(self._flush_loop())
+        if duration:
+            asyncio.get_running_loop().call_later(duration, self.stop)
+        record_file = open(self.record_path, 'a', encoding='utf-8') if self.record_path else None
+        backoff = 1
+        try:
+            async with aiohttp.ClientSession() as session:
+                while not self._stopping.is_set():
+                    try:
+                        async with session.ws_connect(self.stream_url(), heartbeat=30) as ws:
+                            logger.info(f"Ticker stream connected: {self.base_url}")
+                            backoff = 1
+                            await self._consume(ws, record_file, max_messages)
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        logger.warning(f"Ticker stream connection error: {e}")
+
+                    if self._stopping.is_set():
+                        break
+                    self.stats['reconnects'] += 1
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=backoff)
+                    except asyncio.TimeoutError:
+                        pass
+                    backoff = min(backoff * 2, 60)
+        finally:
+            flusher.cancel()
+            await self.flush()
+            if record_file:
+                record_file.close()
+            elapsed = max(time.monotonic() - started, 1e-9)
+            self.stats['elapsed'] = round(elapsed, 2)
+            self.stats['messages_per_second'] = round(self.stats['messages'] / elapsed, 1)
+            logger.info(f"Ticker stream stopped: {self.stats}")
+
+    async def _consume(self, ws, record_file, max_messages):
+        stop_waiter = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while not self._stopping.is_set():
+                receive = asyncio.ensure_future(ws.receive())
+                done, _ = await asyncio.wait({receive, stop_waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if receive not in done:
+                    receive.cancel()
+                    await ws.close()
+                    return
+                msg = receive.result()
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        return
+                    continue
+
+                self.stats['messages'] += 1
+                if record_file:
+                    record_file.write(msg.data + '\n')
+                try:
+                    tick = self.normalize(json.loads(msg.data))
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Invalid ticker message: {e}")
+                    continue
+                if tick:
+                    symbol, data = tick
+                    self._pending[symbol] = data
+                    self.stats['ticks'] += 1
+
+                if max_messages and self.stats['messages'] >= max_messages:
+                    self.stop()
+        finally:
+            stop_waiter.cancel()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ticker stream flush failed: {e}")
+
+    async def flush(self):
+        """Write the latest tick per changed symbol"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        changed = await sync_to_async(self._save)(batch)
+        self.stats['flushes'] += 1
+        self.stats['rows_written'] += len(changed)
+        self.stats['suppressed'] += len(batch) - len(changed)
+
+    def _save(self, batch):
+        close_old_connections()
+        return self.service.ingest_crypto_data(batch)
+
+    def stop(self):
+        self._stopping.set()
@@ -4,6 +4,7 @@ from django.utils import timezone
 from decimal import Decimal
 import logging
 from ..models import CustomUser, Transaction, Order, Portfolio, Cryptocurrency
+from .portfolio_service import PortfolioService
 
 logger = logging.getLogger(__name__)
 
@@ -262,6 +263,7 @@ class TradingService:
                 if total_invested > 0 else Decimal('0')
             )
             portfolio.save()
+            PortfolioService.notify_holdings_changed(user.id)
             
         except Exception as e:
             logger.error(f"Portfolio update failed for {user.email}: {str(e)}")
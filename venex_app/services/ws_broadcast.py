@@ -0,0 +1,92 @@
+# venex_app/services/ws_broadcast.py
+import json
+import logging
+import msgpack
+from channels.layers import get_channel_layer
+from .ws_protocol import WIRE_FORMATS, format_group
+
+logger = logging.getLogger(__name__)
+
+# Channel-layer message type consumers forward verbatim (handled by broadcast_frame)
+FRAME_EVENT_TYPE = 'broadcast.frame'
+
+
+def encode_frame(message, binary=False):
+    """Serialize a WebSocket message once: msgpack bytes if `binary`, else compact JSON text"""
+    if binary:
+        return msgpack.packb(message, use_bin_type=True)
+    return json.dumps(message, separators=(',', ':'))
+
+
+def frame_event(message, key=None, fields=None, wire_format='json'):
+    """
+    Channel-layer message carrying a WebSocket frame pre-encoded in one wire
+    format: JSON text, or msgpack bytes (see WireProtocolMixin)
+
+    The producer pays for serialization once per broadcast and format; every
+    consumer in the group only forwards the result. `key` marks frames a slow
+    client may skip in favour of a newer one with the same key (see
+    OutboundQueue). `fields` are copied into the event as plain values for
+    consumers that act on the message instead of forwarding it, so they need
+    not decode the frame.
+    """
+    if wire_format == 'msgpack':
+        event = {'type': FRAME_EVENT_TYPE, 'bytes': encode_frame(message, binary=True)}
+    else:
+        event = {'type': FRAME_EVENT_TYPE, 'text': encode_frame(message)}
+    if key:
+        event['key'] = key
+    if fields:
+        event.update(fields)
+    return event
+
+
+def sequenced_fields(message):
+    """
+    Plain event fields for a sequenced message (symbol, seq, data, ...), so
+    consumers can apply or conflate it without decoding the frame; the
+    message type travels as 'kind' since 'type' names the event handler
+    """
+    fields = {field: value for field, value in message.items() if field != 'type'}
+    fields['kind'] = message['type']
+    return fields
+
+
+def sequenced_message(event):
+    """The message sequenced_fields() put into `event`, or None for other frames"""
+    if 'kind' not in event or 'seq' not in event:
+        return None
+    message = {'type': event['kind']}
+    message.update(
+        (field, value) for field, value in event.items()
+        if field not in ('type', 'kind', 'key', 'text', 'bytes')
+    )
+    return message
+
+
+async def broadcast(group, message, channel_layer=None, key=None, fields=None):
+    """
+    Send `message` to every socket in `group`: serialized once per wire
+    format, each encoding to that format's group (see format_group)
+    """
+    channel_layer = channel_layer or get_channel_layer()
+    if not channel_layer:
+        logger.warning(f"No channel layer configured; dropping broadcast to {group}")
+        return
+    for wire_format in WIRE_FORMATS:
+        await channel_layer.group_send(format_group(group, wire_format), frame_event(message, key, fields, wire_format))
+
+
+def frame_data(event):
+    """Keyword arguments for consumer.send(): the frame the event carries"""
+    if 'bytes' in event:
+        return {'bytes_data': event['bytes']}
+    return {'text_data': event['text']}
+
+
+class BroadcastFrameMixin:
+    """Consumer handler for frame_event() messages"""
+
+    async def broadcast_frame(self, event):
+        """Forward a pre-encoded frame without re-serializing it"""
+        await self.send(**frame_data(event))
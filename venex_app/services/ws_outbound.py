@@ -0,0 +1,180 @@
+# venex_app/services/ws_outbound.py
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict
+from django.conf import settings
+from .ws_broadcast import frame_data, sequenced_message
+from .ws_protocol import encode_message
+
+logger = logging.getLogger(__name__)
+
+# Process-wide totals across all connections of this worker
+outbound_metrics = {'sent': 0, 'merged': 0, 'dropped': 0, 'slow_connections': 0}
+
+# Sequenced message types that carry only changed fields on top of seq - 1 (or base_seq)
+DELTA_TYPES = ('price_delta',)
+
+
+def _base_seq(delta):
+    return delta.get('base_seq', delta['seq'] - 1)
+
+
+def merge_sequenced(queued, message):
+    """
+    One message standing for `queued` followed by `message` (same conflation key)
+
+    Unsequenced messages simply replace each other. A message older than the
+    queued one is dropped, and a newer snapshot replaces it. A delta is folded
+    into what is queued: into a snapshot it updates the snapshot's fields and
+    seq; into a delta it gives one delta with the union of fields, the higher
+    seq and the earlier delta's base_seq, so the client can still check it
+    follows on from the seq it holds. A delta that does not follow on from
+    the queued frame replaces it (the client resyncs).
+    """
+    if queued is None or message is None or 'seq' not in queued or 'seq' not in message:
+        return message
+    if message['seq'] < queued['seq']:
+        # Older than what is queued (e.g. the on-connect snapshot read before
+        # a broadcast that is already queued)
+        return queued
+    if message['type'] not in DELTA_TYPES:
+        return message
+    if message['seq'] == queued['seq']:
+        return queued
+    if _base_seq(message) > queued['seq']:
+        return message
+    merged = dict(queued, seq=message['seq'], data={**queued['data'], **message['data']})
+    if queued['type'] in DELTA_TYPES:
+        merged['base_seq'] = _base_seq(queued)
+    return merged
+
+
+class OutboundQueue:
+    """
+    Bounded per-connection queue of WebSocket frames
+
+    Frames with a conflation key (e.g. 'price:BTC') replace the queued frame
+    with the same key in place, so a slow reader only ever gets the latest
+    one. Sequenced frames (queued with their message) are merged instead
+    (see merge_sequenced) and the result is re-encoded in `wire_format`, so
+    a delta never discards fields of the frame it lands on. When the queue
+    is full the oldest conflatable frame is dropped to make room. Frames
+    without a key (transactional: withdrawals, balances, errors) are never
+    merged or dropped.
+    """
+
+    def __init__(self, max_size=None, wire_format='json'):
+        self.max_size = max_size or getattr(settings, 'WS_OUTBOUND_QUEUE_SIZE', 100)
+        self.wire_format = wire_format
+        self.stats = {'sent': 0, 'merged': 0, 'dropped': 0, 'peak': 0}
+        self._frames = OrderedDict()
+        self._seq = itertools.count()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put(self, frame, key=None, message=None):
+        """
+        Queue a frame; never blocks
+
+        Args:
+            frame (tuple): (text_data, bytes_data, close)
+            key (str): Conflation key, None for transactional frames
+            message (dict): The frame's message if it is sequenced (has a seq)
+        """
+        if key is not None and key in self._frames:
+            queued_frame, queued = self._frames[key]
+            merged = merge_sequenced(queued, message)
+            if merged is not message:
+                frame = queued_frame if merged is queued else self._encode(merged)
+            self._frames[key] = (frame, merged)
+            self._count('merged')
+            return
+        if len(self._frames) >= self.max_size and not self._evict():
+            if key is not None:
+                # Full of transactional frames: the price frame is the one to lose
+                self._count('dropped')
+                return
+        self._frames[key if key is not None else ('seq', next(self._seq))] = (frame, message)
+        self.stats['peak'] = max(self.stats['peak'], len(self._frames))
+        self._ready.set()
+
+    async def get(self):
+        """Oldest queued frame, waiting for one if the queue is empty"""
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        self.stats['sent'] += 1
+        outbound_metrics['sent'] += 1
+        return self._frames.popitem(last=False)[1][0]
+
+    def _evict(self):
+        for key in self._frames:
+            if isinstance(key, str):
+                del self._frames[key]
+                self._count('dropped')
+                return True
+        return False
+
+    def _encode(self, message):
+        data = encode_message(message, self.wire_format)
+        return data.get('text_data'), data.get('bytes_data'), False
+
+    def _count(self, stat):
+        if stat == 'dropped' and not self.stats['dropped']:
+            outbound_metrics['slow_connections'] += 1
+        self.stats[stat] += 1
+        outbound_metrics[stat] += 1
+
+
+class OutboundQueueMixin:
+    """
+    Decouples a consumer's handlers from the socket write
+
+    send() only queues the frame; a writer task per connection drains the
+    queue into the socket. A slow client backs up its own queue instead of
+    blocking the handler that receives from the channel layer, so group
+    messages are consumed promptly and other sockets on the worker are not
+    held up. Pass `conflate_key` for frames where only the latest matters.
+    """
+
+    outbound_queue_size = None
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        self.outbound = OutboundQueue(self.outbound_queue_size, getattr(self, 'wire_format', 'json'))
+        self.outbound_writer = asyncio.ensure_future(self._write_outbound())
+
+    async def send(self, text_data=None, bytes_data=None, close=False, conflate_key=None, message=None):
+        outbound = getattr(self, 'outbound', None)
+        if outbound is None:
+            await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+            return
+        outbound.put((text_data, bytes_data, close), None if close else conflate_key, message)
+
+    async def broadcast_frame(self, event):
+        """Queue a pre-encoded frame under the conflation key it was broadcast with"""
+        await self.send(**frame_data(event), conflate_key=event.get('key'), message=sequenced_message(event))
+
+    async def websocket_disconnect(self, message):
+        writer = getattr(self, 'outbound_writer', None)
+        if writer:
+            writer.cancel()
+            stats = self.outbound.stats
+            if stats['merged'] or stats['dropped']:
+                logger.info(
+                    f"Slow WebSocket client {self.channel_name}: {stats['merged']} frames merged, "
+                    f"{stats['dropped']} dropped, queue peak {stats['peak']}"
+                )
+        await super().websocket_disconnect(message)
+
+    async def _write_outbound(self):
+        while True:
+            text_data, bytes_data, close = await self.outbound.get()
+            try:
+                await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+            except Exception as e:
+                logger.warning(f"WebSocket write failed on {self.channel_name}: {e}")
+                return
@@ -0,0 +1,87 @@
+# venex_app/services/ws_protocol.py
+import json
+import msgpack
+from .chart_encoding import negotiate_chart_encoding
+
+# Wire formats a connection can negotiate; JSON text frames stay the default
+WIRE_FORMATS = ('json', 'msgpack')
+
+# WebSocket subprotocol -> (wire format, chart encoding)
+WIRE_SUBPROTOCOLS = {
+    'venex.msgpack': ('msgpack', 'msgpack'),
+    'venex.json': ('json', 'json'),
+}
+
+
+def format_group(group, wire_format):
+    """
+    Per-wire-format variant of a broadcast group, e.g. price.BTC.msgpack
+
+    Broadcasts send each encoding only to the sockets that negotiated it, so
+    no socket's channel receives a frame in a format it does not use.
+    """
+    return f'{group}.{wire_format}'
+
+
+def negotiate_subprotocol(subprotocols):
+    """
+    Pick the wire format from the client's offered subprotocols, in the
+    client's order of preference. The chart-only venex.chart.* subprotocols
+    keep JSON frames and only change chart payloads.
+
+    Returns:
+        tuple: (wire format, chart encoding, subprotocol to accept or None)
+    """
+    for subprotocol in subprotocols or []:
+        if subprotocol in WIRE_SUBPROTOCOLS:
+            return WIRE_SUBPROTOCOLS[subprotocol] + (subprotocol,)
+        chart_encoding, chart_subprotocol = negotiate_chart_encoding([subprotocol])
+        if chart_subprotocol:
+            return 'json', chart_encoding, chart_subprotocol
+    return 'json', 'json', None
+
+
+def encode_message(message, wire_format):
+    """Keyword arguments for consumer.send(): msgpack as a binary frame, otherwise JSON text"""
+    if wire_format == 'msgpack':
+        return {'bytes_data': msgpack.packb(message, use_bin_type=True)}
+    return {'text_data': json.dumps(message)}
+
+
+def decode_message(text_data=None, bytes_data=None):
+    """Client message from a JSON text frame or a msgpack binary frame"""
+    if text_data is not None:
+        return json.loads(text_data)
+    return msgpack.unpackb(bytes_data, raw=False)
+
+
+class WireProtocolMixin:
+    """
+    Per-connection wire format
+
+    accept() negotiates the subprotocol (venex.msgpack for binary msgpack
+    frames, venex.json or none for JSON text) and send_message() encodes
+    with it. Clients may send either JSON text or msgpack binary frames.
+
+    Compression (permessage-deflate) is a WebSocket extension the ASGI
+    server negotiates during the handshake; it applies to both formats when
+    the server has it enabled.
+    """
+
+    wire_format = 'json'
+    chart_encoding = 'json'
+
+    async def accept(self, subprotocol=None, headers=None):
+        self.wire_format, self.chart_encoding, negotiated = negotiate_subprotocol(self.scope.get('subprotocols'))
+        await super().accept(subprotocol or negotiated, headers)
+
+    async def send_message(self, message, conflate_key=None):
+        """Encode `message` in the connection's wire format and send it"""
+        await self.send(**encode_message(message, self.wire_format), conflate_key=conflate_key, message=message)
+
+    def decode_message(self, text_data=None, bytes_data=None):
+        return decode_message(text_data, bytes_data)
+
+    def format_group(self, group):
+        """The variant of a broadcast group for this connection's wire format; valid once accepted"""
+        return format_group(group, self.wire_format)
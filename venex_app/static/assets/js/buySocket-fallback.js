@@ -10,6 +10,8 @@ let buySocket = null;
 let pollingTimer = null;
 let marketData = {};
 let isConnected = false;
+let buyPriceState = {};     // symbol -> {seq, data}
+let buyResyncPending = {};
 
 // Initialize connection based on environment
 function initBuyConnection() {
@@ -34,6 +36,7 @@ function tryWebSocketConnection() {
         buySocket.onopen = function() {
             console.log('WebSocket connected successfully');
             isConnected = true;
+            buyResyncPending = {};
             sendMarketSubscribe();
             hideLoadingSpinner();
         };
@@ -45,6 +48,11 @@ function tryWebSocketConnection() {
                 updateCryptoCards(marketData);
             } else if (data.type === 'price_update') {
                 updateCryptoPrice(data.data);
+            } else if (data.type === 'price_snapshot' || data.type === 'price_delta') {
+                const priceData = applyBuyPriceFrame(buySocket, data);
+                if (priceData) {
+                    updateCryptoPrice(priceData);
+                }
             }
         };
 
@@ -70,6 +78,34 @@ function tryWebSocketConnection() {
     }
 }
 
+// Sequenced prices: a price_snapshot carries every field, a price_delta only the
+// changed ones on top of seq - 1 (base_seq when the server merged several).
+// Stale frames are ignored; a delta that does not follow on asks for a resync.
+function applyBuyPriceFrame(socket, message) {
+    const held = buyPriceState[message.symbol];
+    if (message.type === 'price_snapshot') {
+        delete buyResyncPending[message.symbol];
+    }
+    if (held && message.seq <= held.seq) {
+        return null;
+    }
+    if (message.type === 'price_delta') {
+        const base = message.base_seq !== undefined ? message.base_seq : message.seq - 1;
+        if (!held || base > held.seq) {
+            if (!buyResyncPending[message.symbol] && socket && socket.readyState === WebSocket.OPEN) {
+                buyResyncPending[message.symbol] = true;
+                socket.send(JSON.stringify({ type: 'resync', symbols: [message.symbol] }));
+            }
+            return null;
+        }
+        held.seq = message.seq;
+        Object.assign(held.data, message.data);
+        return Object.assign({ symbol: message.symbol }, held.data);
+    }
+    buyPriceState[message.symbol] = { seq: message.seq, data: Object.assign({}, message.data) };
+    return Object.assign({ symbol: message.symbol }, message.data);
+}
+
 // HTTP Polling fallback
 function startPolling() {
     // Stop WebSocket if running
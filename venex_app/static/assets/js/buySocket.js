@@ -7,6 +7,8 @@ const BUY_WS_URL = `${BUY_WS_PROTOCOL}//${window.location.host}/ws/market/`;
 
 let buySocket = null;
 let marketData = {};
+let buyPriceState = {};     // symbol -> {seq, data}
+let buyResyncPending = {};
 
 function connectBuySocket() {
     console.log('Connecting to WebSocket:', BUY_WS_URL);
@@ -14,6 +16,7 @@ function connectBuySocket() {
 
     buySocket.onopen = function() {
         console.log('✅ Buy page WebSocket connected');
+        buyResyncPending = {};
         // Subscribe to initial chart data for all cryptos
         sendMarketSubscribe();
     };
@@ -25,6 +28,11 @@ function connectBuySocket() {
             updateCryptoCards(marketData);
         } else if (data.type === 'price_update') {
             updateCryptoPrice(data.data);
+        } else if (data.type === 'price_snapshot' || data.type === 'price_delta') {
+            const priceData = applyBuyPriceFrame(buySocket, data);
+            if (priceData) {
+                updateCryptoPrice(priceData);
+            }
         } else if (data.type === 'chart_data') {
             // Optionally handle chart data for selected crypto
         }
@@ -35,6 +43,34 @@ function connectBuySocket() {
     };
 }
 
+// Sequenced prices: a price_snapshot carries every field, a price_delta only the
+// changed ones on top of seq - 1 (base_seq when the server merged several).
+// Stale frames are ignored; a delta that does not follow on asks for a resync.
+function applyBuyPriceFrame(socket, message) {
+    const held = buyPriceState[message.symbol];
+    if (message.type === 'price_snapshot') {
+        delete buyResyncPending[message.symbol];
+    }
+    if (held && message.seq <= held.seq) {
+        return null;
+    }
+    if (message.type === 'price_delta') {
+        const base = message.base_seq !== undefined ? message.base_seq : message.seq - 1;
+        if (!held || base > held.seq) {
+            if (!buyResyncPending[message.symbol] && socket && socket.readyState === WebSocket.OPEN) {
+                buyResyncPending[message.symbol] = true;
+                socket.send(JSON.stringify({ type: 'resync', symbols: [message.symbol] }));
+            }
+            return null;
+        }
+        held.seq = message.seq;
+        Object.assign(held.data, message.data);
+        return Object.assign({ symbol: message.symbol }, held.data);
+    }
+    buyPriceState[message.symbol] = { seq: message.seq, data: Object.assign({}, message.data) };
+    return Object.assign({ symbol: message.symbol }, message.data);
+}
+
 function sendMarketSubscribe() {
     if (buySocket && buySocket.readyState === WebSocket.OPEN) {
         buySocket.send(JSON.stringify({ type: 'subscribe_chart', symbol: 'BTC', timeframe: '1d' }));
@@ -11,6 +11,8 @@ class MarketPage {
         this.reconnectDelay = 3000;
         this.apiRefreshInterval = 60000; // 60 seconds
         this.cryptoData = new Map();
+        this.priceState = new Map();      // symbol -> {seq, data} from price_snapshot/price_delta
+        this.resyncPending = new Set();
         this.isConnected = false;
 
         this.init();
@@ -318,6 +320,7 @@ class MarketPage {
                 console.log('WebSocket connected to market data');
                 this.updateConnectionStatus('connected');
                 this.reconnectAttempts = 0;
+                this.resyncPending.clear();
             };
 
             this.ws.onmessage = (event) => {
@@ -352,6 +355,10 @@ class MarketPage {
                 case 'price_update':
                     this.handlePriceUpdate(data);
                     break;
+                case 'price_snapshot':
+                case 'price_delta':
+                    this.handleSequencedPrice(data);
+                    break;
                 case 'market_data':
                     this.handleMarketDataUpdate(data);
                     break;
@@ -366,6 +373,50 @@ class MarketPage {
         }
     }
 
+    /**
+     * Apply a sequenced price frame and update the page with the merged fields
+     *
+     * A price_snapshot carries every field, a price_delta only the changed
+     * ones on top of seq - 1 (base_seq when the server merged several).
+     * Frames at or below the held seq are stale; a delta that does not follow
+     * on from the held seq asks the server for a fresh snapshot (resync).
+     */
+    handleSequencedPrice(message) {
+        const { symbol, seq } = message;
+        const held = this.priceState.get(symbol);
+        if (message.type === 'price_snapshot') {
+            this.resyncPending.delete(symbol);
+        }
+        if (held && seq <= held.seq) {
+            return;
+        }
+
+        if (message.type === 'price_delta') {
+            const base = message.base_seq !== undefined ? message.base_seq : seq - 1;
+            if (!held || base > held.seq) {
+                this.requestResync(symbol);
+                return;
+            }
+            held.seq = seq;
+            Object.assign(held.data, message.data);
+        } else {
+            this.priceState.set(symbol, { seq, data: Object.assign({}, message.data) });
+        }
+
+        this.handlePriceUpdate({ symbol, data: this.priceState.get(symbol).data });
+    }
+
+    /**
+     * Ask for a fresh price_snapshot of a symbol, once until it arrives
+     */
+    requestResync(symbol) {
+        if (this.resyncPending.has(symbol) || !this.ws || this.ws.readyState !== WebSocket.OPEN) {
+            return;
+        }
+        this.resyncPending.add(symbol);
+        this.ws.send(JSON.stringify({ type: 'resync', symbols: [symbol] }));
+    }
+
     /**
      * Handle real-time price updates
      */
@@ -420,10 +471,35 @@ class MarketPage {
 
     /**
      * Handle historical data
+     *
+     * The server sends chart columns ({timestamps, prices, volumes}, timestamps
+     * in seconds, already downsampled); older servers sent a list of points.
+     * Either way the chart keeps a list of {timestamp, price, volume} points.
      */
-    handleHistoricalData(data) {
+    handleHistoricalData(message) {
+        const points = this.chartPoints(message.data);
+        this.historicalData = this.historicalData || new Map();
+        this.historicalData.set(message.symbol, points);
         // Could be used for sparkline charts
-        console.log('Historical data received:', data);
+        console.log(`Historical data received for ${message.symbol}: ${points.length} points`);
+    }
+
+    /**
+     * Chart payload (columns or legacy point list) as a list of points
+     */
+    chartPoints(data) {
+        if (Array.isArray(data)) {
+            return data;
+        }
+        if (!data || !Array.isArray(data.timestamps)) {
+            return [];
+        }
+        const volumes = data.volumes || [];
+        return data.timestamps.map((timestamp, i) => ({
+            timestamp: timestamp,
+            price: data.prices[i],
+            volume: volumes[i] || 0
+        }));
     }
 
     /**
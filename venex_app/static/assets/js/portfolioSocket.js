@@ -21,7 +21,8 @@
         pingTimer: null,
         pingTimeout: null,
         messageQueue: [],
-        lastPongTime: null
+        lastPongTime: null,
+        portfolio: null                  // Last portfolio_data with portfolio_delta merged in
     };
 
     // ===== DOM ELEMENTS =====
@@ -154,6 +155,14 @@
                     handlePortfolioUpdate(data);
                     break;
                     
+                case 'portfolio_data':
+                    handlePortfolioData(data);
+                    break;
+                    
+                case 'portfolio_delta':
+                    handlePortfolioDelta(data);
+                    break;
+                    
                 case 'balance_update':
                     handleBalanceUpdate(data);
                     break;
@@ -233,6 +242,42 @@
         showNotification('Portfolio updated', 'success');
     }
 
+    function handlePortfolioData(data) {
+        // Full valuation: portfolio totals plus a list of holdings
+        const holdings = {};
+        (data.data.holdings || []).forEach(holding => {
+            holdings[holding.symbol] = holding;
+        });
+        state.portfolio = { portfolio: data.data.portfolio || {}, holdings };
+        
+        Object.values(holdings).forEach(holding => updateHoldingValue(holding.symbol, holding));
+        dispatchPortfolio();
+    }
+
+    function handlePortfolioDelta(data) {
+        // Only the fields that changed since the last push; wait for the full data first
+        if (!state.portfolio) {
+            return;
+        }
+        const changes = data.data || {};
+        Object.assign(state.portfolio.portfolio, changes.portfolio || {});
+        Object.entries(changes.holdings || {}).forEach(([symbol, fields]) => {
+            state.portfolio.holdings[symbol] = Object.assign(state.portfolio.holdings[symbol] || { symbol }, fields);
+            updateHoldingValue(symbol, fields);
+        });
+        dispatchPortfolio();
+    }
+
+    function dispatchPortfolio() {
+        // Let the portfolio page re-render totals without polling the API
+        document.dispatchEvent(new CustomEvent('portfolio:valuation', {
+            detail: {
+                portfolio: state.portfolio.portfolio,
+                holdings: Object.values(state.portfolio.holdings)
+            }
+        }));
+    }
+
     function handleBalanceUpdate(data) {
         // Update specific balance
         if (data.cryptocurrency && data.balance) {
@@ -363,6 +408,26 @@
         });
     }
 
+    function updateHoldingValue(crypto, fields) {
+        if (fields.value_usd === undefined) {
+            return;
+        }
+        const holdingItems = document.querySelectorAll('.holding-item');
+        holdingItems.forEach(item => {
+            const symbolEl = item.querySelector('.holding-symbol');
+            if (symbolEl && symbolEl.textContent === crypto) {
+                const valueEl = item.querySelector('.holding-value');
+                if (valueEl) {
+                    valueEl.textContent = `$${formatNumber(fields.value_usd, 2)}`;
+                    
+                    // Add flash animation
+                    valueEl.classList.add('flash');
+                    setTimeout(() => valueEl.classList.remove('flash'), 1000);
+                }
+            }
+        });
+    }
+
     function updateHoldingBalance(crypto, balance) {
         const holdingItems = document.querySelectorAll('.holding-item');
         holdingItems.forEach(item => {
@@ -424,6 +489,7 @@
         disconnect,
         send,
         isConnected: () => state.isConnected,
+        getPortfolio: () => state.portfolio,
         getStatus: () => ({
             connected: state.isConnected,
             attempts: state.reconnectAttempts,
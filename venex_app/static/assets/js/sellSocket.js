@@ -16,6 +16,8 @@
 let sellSocket = null;
 let reconnectInterval = null;
 const RECONNECT_DELAY = 5000; // 5 seconds
+let sellPriceState = {};     // symbol -> {seq, data}
+let sellResyncPending = {};
 
 /**
  * Initialize WebSocket connection
@@ -33,6 +35,7 @@ function initializeSellSocket() {
         sellSocket.onopen = function(e) {
             console.log('✅ Sell page WebSocket connected');
             clearReconnectInterval();
+            sellResyncPending = {};
 
             // Request initial market data
             if (sellSocket.readyState === WebSocket.OPEN) {
@@ -52,6 +55,12 @@ function initializeSellSocket() {
                 } else if (data.type === 'price_update') {
                     // Single price update
                     updateCryptoPrice(data.data.symbol, data.data.price);
+                } else if (data.type === 'price_snapshot' || data.type === 'price_delta') {
+                    // Sequenced price update
+                    const priceData = applySellPriceFrame(sellSocket, data);
+                    if (priceData) {
+                        updateCryptoPrice(priceData.symbol, priceData.price);
+                    }
                 }
 
             } catch (error) {
@@ -79,6 +88,38 @@ function initializeSellSocket() {
     }
 }
 
+/**
+ * Apply a sequenced price frame; returns {symbol, ...fields} or null
+ *
+ * A price_snapshot carries every field, a price_delta only the changed ones
+ * on top of seq - 1 (base_seq when the server merged several). Stale frames
+ * are ignored; a delta that does not follow on asks for a resync.
+ */
+function applySellPriceFrame(socket, message) {
+    const held = sellPriceState[message.symbol];
+    if (message.type === 'price_snapshot') {
+        delete sellResyncPending[message.symbol];
+    }
+    if (held && message.seq <= held.seq) {
+        return null;
+    }
+    if (message.type === 'price_delta') {
+        const base = message.base_seq !== undefined ? message.base_seq : message.seq - 1;
+        if (!held || base > held.seq) {
+            if (!sellResyncPending[message.symbol] && socket && socket.readyState === WebSocket.OPEN) {
+                sellResyncPending[message.symbol] = true;
+                socket.send(JSON.stringify({ type: 'resync', symbols: [message.symbol] }));
+            }
+            return null;
+        }
+        held.seq = message.seq;
+        Object.assign(held.data, message.data);
+        return Object.assign({ symbol: message.symbol }, held.data);
+    }
+    sellPriceState[message.symbol] = { seq: message.seq, data: Object.assign({}, message.data) };
+    return Object.assign({ symbol: message.symbol }, message.data);
+}
+
 /**
  * Schedule WebSocket reconnection
  */
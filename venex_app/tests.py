@@ -1,3 +1,1129 @@
-from django.test import TestCase
+import os
+import json
+import uuid
+import importlib
+import asyncio
+import tempfile
+import time
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+import msgpack
+import numpy as np
+from aiohttp.test_utils import TestServer
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .consumers import PriceConsumer, MarketConsumer, PortfolioConsumer, WithdrawalConsumer
+from .models import Cryptocurrency, Portfolio, PriceCandle, PriceHistory, time_ordered_uuid
+from .services.price_broadcaster import PriceBroadcaster, broadcast_price, price_delta_message, price_snapshot_message
+from .services.market_snapshot import market_snapshot
+from .services.price_snapshot import price_snapshot
+from .services.provider_health import ProviderHealth
+from .services.single_flight import SingleFlight, single_flight
+from .services.cache_service import TwoTierCache
+from .services.backfill_service import PriceHistoryBackfill, iter_json_points
+from .services.candle_service import candle_service
+from .services.crypto_api_service import CryptoDataService
+from .services.async_crypto_api_service import AsyncCryptoDataService
+from .services.chart_encoding import encode_chart, decode_chart
+from .services.price_pipeline import PriceChangeFilter
+from .services.price_series import PriceSeries, PriceSeriesCache, lttb_indices
+from .services.retention_service import PriceRetentionService
+from .services.fake_ticker_feed import FakeTickerFeed
+from .services.stream_ingestion import TickerStreamIngestor
+from .services.ws_outbound import OutboundQueue
+from .services.ws_protocol import negotiate_subprotocol, encode_message, decode_message
 
-# Create your tests here.
+TEST_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+async def empty_history(symbol, range_key, max_points=None):
+    return {'timestamps': [], 'prices': [], 'volumes': [], 'points': 0}
+
+
+class WireProtocolTests(SimpleTestCase):
+    def test_json_is_the_default(self):
+        self.assertEqual(negotiate_subprotocol(None), ('json', 'json', None))
+        self.assertEqual(negotiate_subprotocol(['graphql-ws']), ('json', 'json', None))
+
+    def test_msgpack_subprotocol(self):
+        self.assertEqual(negotiate_subprotocol(['venex.msgpack']), ('msgpack', 'msgpack', 'venex.msgpack'))
+
+    def test_client_preference_order(self):
+        self.assertEqual(negotiate_subprotocol(['venex.json', 'venex.msgpack'])[0], 'json')
+        self.assertEqual(negotiate_subprotocol(['venex.chart.compact', 'venex.msgpack']),
+                         ('json', 'compact', 'venex.chart.compact'))
+
+    def test_round_trip(self):
+        message = {'type': 'price_delta', 'symbol': 'BTC', 'seq': 3, 'data': {'price': 67000.5}}
+        text = encode_message(message, 'json')
+        binary = encode_message(message, 'msgpack')
+        self.assertEqual(decode_message(**text), message)
+        self.assertEqual(decode_message(**binary), message)
+        self.assertLess(len(binary['bytes_data']), len(text['text_data']))
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, CACHES=TEST_CACHES)
+class ConsumerWireFormatTests(TransactionTestCase):
+    def setUp(self):
+        Cryptocurrency.objects.create(
+            symbol='BTC', name='Bitcoin', current_price=Decimal('67000'), price_change_24h=Decimal('500'),
+            price_change_percentage_24h=Decimal('0.75'), volume_24h=Decimal('1000000'), rank=1
+        )
+        self.user = get_user_model().objects.create_user(
+            email='trader@example.com', password='secret', username='trader'
+        )
+        cache.clear()
+        price_snapshot.loaded_at = None
+        history = mock.patch('venex_app.consumers.async_crypto_service.get_price_history', empty_history)
+        history.start()
+        self.addCleanup(history.stop)
+
+    async def connect(self, consumer, path, wire_format, user=None):
+        subprotocols = ['venex.msgpack'] if wire_format == 'msgpack' else []
+        communicator = WebsocketCommunicator(consumer.as_asgi(), path, subprotocols=subprotocols)
+        communicator.scope['user'] = user or AnonymousUser()
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, 'venex.msgpack' if wire_format == 'msgpack' else None)
+        return communicator
+
+    async def receive(self, communicator, wire_format):
+        """Next frame, checking it arrived as the negotiated frame type"""
+        frame = await communicator.receive_output(timeout=2)
+        if wire_format == 'msgpack':
+            self.assertIsNotNone(frame.get('bytes'))
+            return msgpack.unpackb(frame['bytes'], raw=False)
+        self.assertIsNotNone(frame.get('text'))
+        return json.loads(frame['text'])
+
+    async def receive_type(self, communicator, wire_format, message_type):
+        while True:
+            message = await self.receive(communicator, wire_format)
+            if message.get('type') == message_type:
+                return message
+
+    async def send(self, communicator, wire_format, message):
+        if wire_format == 'msgpack':
+            await communicator.send_to(bytes_data=msgpack.packb(message, use_bin_type=True))
+        else:
+            await communicator.send_to(text_data=json.dumps(message))
+
+    async def check_price_consumer(self, wire_format):
+        communicator = await self.connect(PriceConsumer, '/ws/prices/', wire_format)
+        snapshot = await self.receive_type(communicator, wire_format, 'price_snapshot')
+        self.assertEqual(snapshot['symbol'], 'BTC')
+        self.assertEqual(snapshot['data']['price'], 67000.0)
+
+        await broadcast_price(price_delta_message('BTC', 1, {'price': 67100.0}))
+        delta = await self.receive_type(communicator, wire_format, 'price_delta')
+        self.assertEqual(delta['data'], {'price': 67100.0})
+
+        await self.send(communicator, wire_format, {'type': 'ping'})
+        await self.receive_type(communicator, wire_format, 'pong')
+        await communicator.disconnect()
+
+    async def test_price_consumer_json(self):
+        await self.check_price_consumer('json')
+
+    async def test_price_consumer_msgpack(self):
+        await self.check_price_consumer('msgpack')
+
+    async def check_market_consumer(self, wire_format):
+        communicator = await self.connect(MarketConsumer, '/ws/market/', wire_format)
+        market = await self.receive_type(communicator, wire_format, 'market_data')
+        self.assertEqual([row['symbol'] for row in market['data']['cryptocurrencies']], ['BTC'])
+        self.assertEqual(market['data']['market_stats']['active_cryptocurrencies'], 1)
+        self.assertEqual(market['version'], market_snapshot.get()['version'])
+
+        await broadcast_price(price_delta_message('BTC', 1, {'price': 67100.0}))
+        delta = await self.receive_type(communicator, wire_format, 'price_delta')
+        self.assertEqual((delta['symbol'], delta['seq']), ('BTC', 1))
+
+        await self.send(communicator, wire_format, {'type': 'resync', 'symbols': ['btc']})
+        snapshot = await self.receive_type(communicator, wire_format, 'price_snapshot')
+        self.assertEqual(snapshot['symbol'], 'BTC')
+        self.assertEqual(snapshot['data']['price'], 67000.0)
+        await communicator.disconnect()
+
+    async def test_market_consumer_json(self):
+        await self.check_market_consumer('json')
+
+    async def test_market_consumer_msgpack(self):
+        await self.check_market_consumer('msgpack')
+
+    async def check_portfolio_consumer(self, wire_format):
+        await Portfolio.objects.acreate(
+            user=self.user, cryptocurrency='BTC', total_quantity=Decimal('2'),
+            average_buy_price=Decimal('60000'), total_invested=Decimal('120000')
+        )
+        communicator = await self.connect(PortfolioConsumer, '/ws/portfolio/', wire_format, self.user)
+        portfolio = await self.receive_type(communicator, wire_format, 'portfolio_data')
+        self.assertEqual(portfolio['data']['portfolio']['total_value'], 134000.0)
+        self.assertEqual(portfolio['data']['portfolio']['realized_pl'], 0.0)
+
+        await self.send(communicator, wire_format, {'type': 'ping'})
+        await self.receive_type(communicator, wire_format, 'pong')
+
+        await broadcast_price(price_delta_message('BTC', 1, {'price': 67100.0}))
+        delta = await self.receive_type(communicator, wire_format, 'portfolio_delta')
+        self.assertEqual(delta['data']['portfolio']['total_value'], 134200.0)
+        self.assertEqual(delta['data']['holdings']['BTC']['current_price'], 67100.0)
+        await communicator.disconnect()
+
+    async def test_portfolio_consumer_json(self):
+        await self.check_portfolio_consumer('json')
+
+    async def test_portfolio_consumer_msgpack(self):
+        await self.check_portfolio_consumer('msgpack')
+
+    async def check_withdrawal_consumer(self, wire_format):
+        communicator = await self.connect(WithdrawalConsumer, '/ws/withdrawals/', wire_format, self.user)
+        await self.receive_type(communicator, wire_format, 'connection_established')
+        await self.send(communicator, wire_format, {'type': 'get_recent_withdrawals'})
+        withdrawals = await self.receive_type(communicator, wire_format, 'recent_withdrawals')
+        self.assertEqual(withdrawals['withdrawals'], [])
+
+        await get_channel_layer().group_send(f'withdrawals_{self.user.id}', {
+            'type': 'withdrawal_status_update', 'withdrawal_id': 'w-1', 'status': 'COMPLETED',
+            'message': 'Withdrawal completed',
+        })
+        update = await self.receive_type(communicator, wire_format, 'withdrawal_status_update')
+        self.assertEqual(update['status'], 'COMPLETED')
+        await communicator.disconnect()
+
+    async def test_withdrawal_consumer_json(self):
+        await self.check_withdrawal_consumer('json')
+
+    async def test_withdrawal_consumer_msgpack(self):
+        await self.check_withdrawal_consumer('msgpack')
+
+    async def test_broadcast_sends_each_encoding_to_its_format_group(self):
+        layer = get_channel_layer()
+        channels = {}
+        for wire_format in ('json', 'msgpack'):
+            channels[wire_format] = await layer.new_channel()
+            await layer.group_add(f'price.BTC.{wire_format}', channels[wire_format])
+        await broadcast_price(price_delta_message('BTC', 1, {'price': 67100.0}))
+
+        text_event = await layer.receive(channels['json'])
+        binary_event = await layer.receive(channels['msgpack'])
+        self.assertNotIn('bytes', text_event)
+        self.assertNotIn('text', binary_event)
+        self.assertEqual(json.loads(text_event['text']), msgpack.unpackb(binary_event['bytes']))
+        self.assertEqual((text_event['symbol'], text_event['seq']), ('BTC', 1))
+
+    async def test_invalid_binary_frame(self):
+        communicator = await self.connect(WithdrawalConsumer, '/ws/withdrawals/', 'msgpack', self.user)
+        await self.receive_type(communicator, 'msgpack', 'connection_established')
+        await communicator.send_to(bytes_data=b'\xc1')
+        error = await self.receive_type(communicator, 'msgpack', 'error')
+        self.assertEqual(error['message'], 'Invalid message format')
+        await communicator.disconnect()
+
+
+@override_settings(CACHES=TEST_CACHES, CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class PriceBroadcasterTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.btc = Cryptocurrency.objects.create(symbol='BTC', name='Bitcoin', current_price=Decimal('67000'))
+        self.sent = []
+
+        async def record(message, channel_layer=None):
+            self.sent.append(message)
+
+        patcher = mock.patch('venex_app.services.price_broadcaster.broadcast_price', record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def move_price(self, price):
+        Cryptocurrency.objects.filter(pk=self.btc.pk).update(current_price=Decimal(price), last_updated=timezone.now())
+
+    async def test_lease_keeps_one_leader(self):
+        leader, standby = PriceBroadcaster(), PriceBroadcaster()
+        self.assertTrue(await leader.is_leader())
+        self.assertFalse(await standby.is_leader())
+        self.assertTrue(await leader.is_leader())  # renewal
+        await leader.release()
+        self.assertTrue(await standby.is_leader())
+        self.assertFalse(await leader.is_leader())
+
+    async def test_snapshot_then_deltas_and_takeover_continues_seq(self):
+        leader = PriceBroadcaster()
+        self.assertEqual(await leader.tick(), 1)
+        self.assertEqual(await leader.tick(), 0)  # unchanged rows are not sent again
+        await sync_to_async(self.move_price)('68000')
+        await leader.tick()
+        snapshot, delta = self.sent
+        self.assertEqual((snapshot['type'], snapshot['seq']), ('price_snapshot', 1))
+        self.assertEqual((delta['type'], delta['seq']), ('price_delta', 2))
+        self.assertEqual(set(delta['data']), {'price', 'last_updated'})
+
+        # A new leader resumes from the shared state with a snapshot
+        await sync_to_async(self.move_price)('69000')
+        await PriceBroadcaster().tick()
+        takeover = self.sent[-1]
+        self.assertEqual((takeover['type'], takeover['seq']), ('price_snapshot', 3))
+        self.assertEqual(takeover['data']['price'], 69000.0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MarketSnapshotTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        for rank, (symbol, market_cap) in enumerate((('BTC', '600'), ('ETH', '400')), start=1):
+            Cryptocurrency.objects.create(
+                symbol=symbol, name=symbol, current_price=Decimal('100'), market_cap=Decimal(market_cap),
+                volume_24h=Decimal('10'), rank=rank
+            )
+
+    def test_built_once_and_shared(self):
+        snapshot = market_snapshot.get()
+        self.assertEqual(snapshot['data']['market_stats']['btc_dominance'], 60.0)
+        self.assertEqual(snapshot['data']['market_stats']['total_market_cap'], 1000.0)
+        with self.assertNumQueries(0):
+            self.assertEqual(market_snapshot.get()['version'], snapshot['version'])
+        self.client.force_login(get_user_model().objects.create_user(
+            email='viewer@example.com', password='secret', username='viewer'
+        ))
+        response = self.client.get(reverse('api_market_data'))
+        self.assertEqual(response.json()['version'], snapshot['version'])
+        self.assertEqual([row['symbol'] for row in response.json()['cryptocurrencies']], ['BTC', 'ETH'])
+
+    def test_views_keep_their_ordering_and_timestamp_format(self):
+        Cryptocurrency.objects.create(symbol='ADA', name='Cardano', current_price=Decimal('1'), rank=3)
+        self.client.force_login(get_user_model().objects.create_user(
+            email='viewer@example.com', password='secret', username='viewer'
+        ))
+        self.assertEqual([row['symbol'] for row in market_snapshot.data()['cryptocurrencies']], ['BTC', 'ETH', 'ADA'])
+        response = self.client.get(reverse('api_market_data'))
+        self.assertEqual([row['symbol'] for row in response.json()['cryptocurrencies']], ['ADA', 'BTC', 'ETH'])
+        self.assertEqual(datetime.fromisoformat(response.json()['market_stats']['timestamp']).tzinfo, dt_timezone.utc)
+
+        market_stats = json.loads(self.client.get(reverse('market_data')).context['market_stats'])
+        datetime.strptime(market_stats['timestamp'], '%Y-%m-%d %H:%M:%S')
+
+    def test_refresh_bumps_version(self):
+        before = market_snapshot.get()
+        Cryptocurrency.objects.filter(symbol='ETH').update(market_cap=Decimal('1400'))
+        market_snapshot.refresh()
+        after = market_snapshot.get()
+        self.assertGreater(after['version'], before['version'])
+        self.assertEqual(after['data']['market_stats']['btc_dominance'], 30.0)
+        self.assertEqual(json.loads(market_snapshot.frame('json')['text'])['version'], after['version'])
+        self.assertEqual(msgpack.unpackb(market_snapshot.frame('msgpack')['bytes'])['version'], after['version'])
+
+
+def http_response(status, payload=None, headers=None):
+    response = mock.Mock(status_code=status, headers=headers or {})
+    response.json.return_value = payload
+    return response
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BinanceTickerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = CryptoDataService()
+
+    def test_rate_limited_bulk_call_does_not_fall_back_per_symbol(self):
+        with mock.patch.object(self.service.session, 'get', return_value=http_response(429, headers={'Retry-After': '30'})) as get:
+            self.assertIsNone(self.service._fetch_from_binance(['BTC', 'ETH', 'SOL']))
+        self.assertEqual(get.call_count, 1)
+        self.assertFalse(self.service.provider_health.allow_request('binance'))
+
+    def test_unavailable_bulk_endpoint_falls_back_per_symbol(self):
+        ticker = {'lastPrice': '100', 'priceChange': '1', 'priceChangePercent': '1', 'volume': '5'}
+        responses = [http_response(400), http_response(200, ticker), http_response(200, ticker)]
+        with mock.patch.object(self.service.session, 'get', side_effect=responses) as get:
+            data = self.service._fetch_from_binance(['BTC', 'ETH', 'USDT'])
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(set(data), {'BTC', 'ETH', 'USDT'})
+        self.assertEqual(data['BTC']['price'], 100.0)
+
+    def test_per_symbol_loop_stops_at_rate_limit(self):
+        self.service.binance_bulk = False
+        with mock.patch.object(self.service.session, 'get', return_value=http_response(418)) as get:
+            self.assertIsNone(self.service._fetch_from_binance(['BTC', 'ETH']))
+        self.assertEqual(get.call_count, 1)
+
+
+class HedgedFetchTests(SimpleTestCase):
+    def setUp(self):
+        self.service = CryptoDataService()
+        self.service._timed_provider_call = lambda provider, symbols: provider(symbols)
+        self.calls = []
+
+    def provider(self, name, result=None, delay=0.0, error=None):
+        def fetch(symbols):
+            self.calls.append(name)
+            time.sleep(delay)
+            if error:
+                raise error
+            return result
+        fetch.__name__ = name
+        return fetch
+
+    def test_fast_primary_never_starts_fallbacks(self):
+        self.service.hedge_delay = 0.5
+        providers = [self.provider('primary', {'BTC': 1}), self.provider('secondary', {'BTC': 2})]
+        self.assertEqual(self.service._fetch_hedged(['BTC'], providers), ('primary', {'BTC': 1}))
+        self.assertEqual(self.calls, ['primary'])
+
+    def test_slow_primary_is_hedged_after_delay(self):
+        self.service.hedge_delay = 0.05
+        providers = [
+            self.provider('primary', {'BTC': 1}, delay=0.5),
+            self.provider('secondary', {'BTC': 2}),
+            self.provider('tertiary', {'BTC': 3}, delay=0.5),
+        ]
+        started = time.monotonic()
+        self.assertEqual(self.service._fetch_hedged(['BTC'], providers), ('secondary', {'BTC': 2}))
+        self.assertLess(time.monotonic() - started, 0.4)  # doesn't wait for the abandoned primary
+        self.assertEqual(self.calls, ['primary', 'secondary'])
+
+    def test_failed_provider_starts_next_without_waiting(self):
+        self.service.hedge_delay = 10
+        providers = [
+            self.provider('primary', error=RuntimeError('down')),
+            self.provider('secondary'),
+            self.provider('tertiary', {'BTC': 3}),
+        ]
+        started = time.monotonic()
+        self.assertEqual(self.service._fetch_hedged(['BTC'], providers), ('tertiary', {'BTC': 3}))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.calls, ['primary', 'secondary', 'tertiary'])
+
+    def test_all_providers_failing_returns_nothing(self):
+        self.service.hedge_delay = 0.01
+        providers = [self.provider('primary'), self.provider('secondary')]
+        self.assertEqual(self.service._fetch_hedged(['BTC'], providers), (None, None))
+
+
+class TickerStreamTests(SimpleTestCase):
+    def ticker_line(self, pair, price, event='24hrTicker'):
+        data = {'e': event, 'E': 1700000000000, 's': pair, 'p': '1', 'P': '0.1', 'c': str(price), 'v': '10'}
+        return json.dumps({'stream': f'{pair.lower()}@ticker', 'data': data})
+
+    async def test_fake_feed_ticks_conflate_per_symbol(self):
+        lines = [
+            self.ticker_line('BTCUSDT', 100),
+            self.ticker_line('ETHUSDT', 10),
+            self.ticker_line('BTCUSDT', 101),
+            self.ticker_line('BTCUSDT', 0, event='kline'),
+            self.ticker_line('BTCUSDT', 102),
+        ]
+        replay_path = os.path.join(tempfile.mkdtemp(), 'capture.jsonl')
+        with open(replay_path, 'w') as handle:
+            handle.write('\n'.join(lines) + '\n')
+
+        feed = FakeTickerFeed(rate=0, replay_path=replay_path, loop_replay=False)
+        service = mock.Mock()
+        service.ingest_crypto_data.side_effect = lambda batch: dict(batch)
+        async with TestServer(feed.make_app()) as server:
+            ingestor = TickerStreamIngestor(
+                url=str(server.make_url('/stream')), symbols=['BTC', 'ETH'], flush_interval=60, service=service
+            )
+            await asyncio.wait_for(ingestor.run(max_messages=len(lines)), timeout=10)
+
+        [(batch,), _] = service.ingest_crypto_data.call_args
+        self.assertEqual(service.ingest_crypto_data.call_count, 1)
+        self.assertEqual({symbol: data['price'] for symbol, data in batch.items()}, {'BTC': 102.0, 'ETH': 10.0})
+        self.assertNotIn('market_cap', batch['BTC'])  # stored values are kept for fields the stream lacks
+        self.assertEqual((ingestor.stats['messages'], ingestor.stats['ticks']), (5, 4))
+        self.assertEqual((ingestor.stats['rows_written'], ingestor.stats['reconnects']), (2, 0))
+
+    def test_normalize_ignores_other_events_and_pairs(self):
+        ingestor = TickerStreamIngestor(symbols=['BTC'], service=mock.Mock())
+        self.assertIsNone(ingestor.normalize(json.loads(self.ticker_line('BTCUSDT', 1, event='kline'))))
+        self.assertIsNone(ingestor.normalize(json.loads(self.ticker_line('DOGEUSDT', 1))))
+        self.assertIsNone(ingestor.normalize(json.loads(self.ticker_line('BTCEUR', 1))))
+        symbol, data = ingestor.normalize(json.loads(self.ticker_line('BTCUSDT', 5)))
+        self.assertEqual((symbol, data['price'], data['event_time']), ('BTC', 5.0, 1700000000000))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncHistoryTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = AsyncCryptoDataService(sync_service=CryptoDataService())
+        for target, value in (('get_history', []), ('covers', False)):
+            patcher = mock.patch.object(candle_service, target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(self.service.sync_service, '_get_historical_from_database', return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_history_providers_make_one_short_attempt(self):
+        get_json = mock.AsyncMock(return_value=(503, None, {}))
+        with mock.patch.object(self.service, '_get_json', get_json):
+            self.assertEqual(async_to_sync(self.service._fetch_historical_data)('BTC', 30), [])
+        self.assertEqual(get_json.await_count, 3)
+        for call in get_json.await_args_list:
+            self.assertEqual(call.kwargs['retries'], 0)
+            self.assertEqual(call.kwargs['timeout'], self.service.sync_service.fallback_timeout)
+
+    def test_history_deadline_stops_provider_fallback(self):
+        self.service.sync_service.history_deadline = 0
+        get_json = mock.AsyncMock(return_value=(503, None, {}))
+        with mock.patch.object(self.service, '_get_json', get_json):
+            self.assertEqual(async_to_sync(self.service._fetch_historical_data)('BTC', 30), [])
+        get_json.assert_not_awaited()
+
+    def test_session_from_finished_loop_is_closed(self):
+        first = asyncio.run(self.service.get_session())
+
+        async def replace():
+            second = await self.service.get_session()
+            await self.service.close()
+            return second
+
+        second = asyncio.run(replace())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertTrue(second.closed)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProviderHealthTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        clock = mock.patch('venex_app.services.provider_health.time.time', lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.health = ProviderHealth(prefix='test_health')
+        self.health.failure_threshold = 3
+        self.health.base_backoff = 30
+        self.health.max_backoff = 600
+
+    def fail(self, probe=False, latency_ms=100):
+        self.health.record_failure('api', latency_ms, probe=probe)
+
+    def test_opens_after_consecutive_failures(self):
+        self.fail()
+        self.fail()
+        self.assertTrue(self.health.allow_request('api'))
+        self.fail()
+        self.assertEqual(self.health.get_stats('api')['state'], ProviderHealth.OPEN)
+        self.assertFalse(self.health.allow_request('api'))
+
+    def test_single_probe_after_backoff(self):
+        for _ in range(3):
+            self.fail()
+        self.now += 31
+        self.assertEqual(self.health.allow_request('api'), ProviderHealth.PROBE)
+        self.assertFalse(self.health.allow_request('api'))
+
+    def test_failed_probe_doubles_backoff(self):
+        for _ in range(3):
+            self.fail()
+        self.now += 31
+        self.assertEqual(self.health.allow_request('api'), ProviderHealth.PROBE)
+        self.fail(probe=True)
+        self.assertEqual(self.health.get_stats('api')['backoff'], 60)
+        self.now += 61
+        self.assertEqual(self.health.allow_request('api'), ProviderHealth.PROBE)
+
+    def test_successful_probe_closes(self):
+        for _ in range(3):
+            self.fail()
+        self.now += 31
+        self.health.allow_request('api')
+        self.health.record_success('api', 50)
+        stats = self.health.get_stats('api')
+        self.assertEqual((stats['state'], stats['failures'], stats['backoff']), (ProviderHealth.CLOSED, 0, 0))
+        self.assertTrue(self.health.allow_request('api'))
+
+    def test_late_failure_does_not_reopen(self):
+        for _ in range(3):
+            self.fail()
+        # A call admitted before the circuit opened fails afterwards
+        self.now += 1
+        self.fail(latency_ms=5000)
+        self.assertEqual(self.health.get_stats('api')['backoff'], 30)
+
+    def test_trip_keeps_retry_after(self):
+        self.health.trip('api', retry_after=5)
+        self.fail()
+        stats = self.health.get_stats('api')
+        self.assertEqual((stats['state'], stats['backoff']), (ProviderHealth.OPEN, 5))
+        self.assertEqual(stats['open_until'], self.now + 5)
+
+    def test_trip_during_probe_keeps_retry_after(self):
+        for _ in range(3):
+            self.fail()
+        self.now += 31
+        self.assertEqual(self.health.allow_request('api'), ProviderHealth.PROBE)
+        self.health.trip('api', retry_after=120)
+        self.fail(probe=True)
+        self.assertEqual(self.health.get_stats('api')['backoff'], 120)
+        self.now += 121
+        self.assertEqual(self.health.allow_request('api'), ProviderHealth.PROBE)
+
+    def test_rank_puts_open_circuits_last(self):
+        for _ in range(3):
+            self.health.record_failure('flaky', 100)
+        self.health.record_success('slow', 900)
+        self.health.record_success('fast', 100)
+        self.assertEqual(self.health.rank(['flaky', 'slow', 'fast']), ['fast', 'slow', 'flaky'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.flight = SingleFlight(prefix='test_flight', lease=5, wait_timeout=1, poll_interval=0.01)
+
+    def test_leader_runs_and_publishes(self):
+        self.assertEqual(self.flight.run('key', lambda: 42), 42)
+        self.assertEqual(self.flight.stats['leader'], 1)
+        self.assertEqual(self.flight.last_result('key'), 42)
+        self.assertIsNone(cache.get('test_flight:key:lock'))
+
+    def test_result_ttl_defaults_to_lease(self):
+        self.assertEqual(self.flight.result_ttl, 5)
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.flight.run('key', lambda: 42)
+        cache_set.assert_called_once_with('test_flight:key:result', mock.ANY, timeout=5)
+
+    def test_followers_reuse_leader_result(self):
+        calls = []
+
+        def slow():
+            calls.append(threading.current_thread().name)
+            time.sleep(0.2)
+            return 'loaded'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.flight.run('key', slow))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['loaded'] * 4)
+        self.assertEqual((self.flight.stats['leader'], self.flight.stats['follower']), (1, 3))
+
+    def test_timeout_serves_previous_result(self):
+        self.flight.run('key', lambda: 'old')
+        cache.set('test_flight:key:lock', 'other-worker', timeout=5)
+        self.flight.wait_timeout = 0.05
+        self.assertEqual(self.flight.run('key', lambda: 'new'), 'old')
+        self.assertEqual(self.flight.stats['stale'], 1)
+
+    def test_timeout_without_result_returns_default(self):
+        cache.set('test_flight:key:lock', 'other-worker', timeout=5)
+        self.flight.wait_timeout = 0.05
+        self.assertEqual(self.flight.run('key', lambda: 'new', default='fallback'), 'fallback')
+
+    def test_leader_failure_releases_lock(self):
+        def broken():
+            raise RuntimeError('provider down')
+
+        with self.assertRaises(RuntimeError):
+            self.flight.run('key', broken)
+        self.assertEqual(self.flight.run('key', lambda: 'recovered'), 'recovered')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = TwoTierCache('test_two_tier')
+
+    def test_miss_loads_once(self):
+        loader = mock.Mock(return_value=[1, 2])
+        self.assertEqual(self.cache.get_or_load('key', loader, ttl=60), [1, 2])
+        self.assertEqual(self.cache.get_or_load('key', loader, ttl=60), [1, 2])
+        loader.assert_called_once()
+
+    def test_shared_tier_serves_other_processes(self):
+        self.cache.get_or_load('key', lambda: 'value', ttl=60)
+        other = TwoTierCache('test_two_tier')
+        self.assertEqual(other.get_or_load('key', mock.Mock(side_effect=AssertionError), ttl=60), 'value')
+
+    def test_timed_out_follower_does_not_refresh_stale_value(self):
+        self.cache.set('key', 'old', ttl=-1, stale_ttl=60)
+        self.cache.clear_local()
+        shared_key = 'single_flight:test_two_tier:key'
+        cache.set(f'{shared_key}:result', (time.time() - 30, 'old'))
+        cache.set(f'{shared_key}:lock', 'other-worker', timeout=5)
+        with mock.patch.object(single_flight, 'wait_timeout', 0.05):
+            self.assertEqual(self.cache._load('key', lambda: 'new', ttl=60, stale_ttl=60), 'old')
+        value, fresh_until, _ = cache.get('test_two_tier:key')
+        self.assertEqual(value, 'old')
+        self.assertLess(fresh_until, time.time())
+
+
+class CandleServiceTests(TestCase):
+    def setUp(self):
+        self.btc = Cryptocurrency.objects.create(symbol='BTC', name='Bitcoin')
+        self.start = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+    def at(self, seconds):
+        return self.start + timedelta(seconds=seconds)
+
+    def candle(self, interval, bucket_start):
+        row = PriceCandle.objects.get(cryptocurrency=self.btc, interval=interval, bucket_start=bucket_start)
+        return tuple(float(value) for value in (row.open, row.high, row.low, row.close, row.volume))
+
+    def test_ticks_merge_into_every_interval(self):
+        written = candle_service.ingest_ticks([
+            (self.btc.id, self.at(10), 100, 5),
+            (self.btc.id, self.at(20), 120, 6),
+            (self.btc.id, self.at(30), 90, 7),
+            (self.btc.id, self.at(70), 110, 8),
+        ])
+        self.assertEqual(written, 5)  # two 1m candles, one each for 5m, 1h, 1d
+        self.assertEqual(self.candle('1m', self.start), (100, 120, 90, 90, 7))
+        self.assertEqual(self.candle('1m', self.at(60)), (110, 110, 110, 110, 8))
+        self.assertEqual(self.candle('5m', self.start), (100, 120, 90, 110, 8))
+        self.assertEqual(self.candle('1d', datetime(2024, 1, 1, tzinfo=dt_timezone.utc)), (100, 120, 90, 110, 8))
+
+    def test_later_batch_merges_into_stored_candle(self):
+        candle_service.ingest_ticks([(self.btc.id, self.at(10), 100, 1), (self.btc.id, self.at(20), 95, 1)])
+        candle_service.ingest_ticks([(self.btc.id, self.at(40), 130, 2)])
+        self.assertEqual(self.candle('1m', self.start), (100, 130, 95, 130, 2))
+        self.assertEqual(self.candle('1h', self.start), (100, 130, 95, 130, 2))
+
+    def test_build_candles_rolls_up_from_children(self):
+        candle_service.build_candles('1m', [
+            (self.btc.id, self.at(0), 100, 1),
+            (self.btc.id, self.at(65), 80, 1),
+            (self.btc.id, self.at(400), 150, 1),
+        ])
+        self.assertEqual(self.candle('5m', self.start), (100, 100, 80, 80, 1))
+        self.assertEqual(self.candle('5m', self.at(300)), (150, 150, 150, 150, 1))
+        self.assertEqual(self.candle('1h', self.start), (100, 150, 80, 150, 1))
+
+    def test_build_candles_skips_existing_buckets(self):
+        candle_service.ingest_ticks([(self.btc.id, self.at(10), 100, 1)])
+        self.assertEqual(candle_service.build_candles('1m', [(self.btc.id, self.at(20), 500, 1)]), 0)
+        self.assertEqual(self.candle('1m', self.start), (100, 100, 100, 100, 1))
+
+    def test_history_and_coverage(self):
+        now = datetime.now(dt_timezone.utc)
+        candle_service.ingest_ticks([
+            (self.btc.id, now - timedelta(hours=23), 100, 1),
+            (self.btc.id, now - timedelta(minutes=5), 110, 1),
+        ])
+        history = candle_service.get_history('btc', 1)
+        self.assertEqual([point['price'] for point in history], [100.0, 110.0])
+        self.assertTrue(candle_service.covers(history, 1))
+        self.assertFalse(candle_service.covers(history, 7))
+
+    def test_stale_history_is_not_covered(self):
+        now = datetime.now(dt_timezone.utc)
+        candle_service.ingest_ticks([
+            (self.btc.id, now - timedelta(hours=23), 100, 1),
+            (self.btc.id, now - timedelta(hours=2), 110, 1),
+        ])
+        history = candle_service.get_history('btc', 1)
+        self.assertEqual(len(history), 2)
+        self.assertFalse(candle_service.covers(history, 1))
+
+
+class RetentionServiceTests(TestCase):
+    def setUp(self):
+        self.btc = Cryptocurrency.objects.create(symbol='BTC', name='Bitcoin')
+        self.now = datetime.now(dt_timezone.utc)
+        self.old = candle_service.bucket_start(self.now - timedelta(days=10), '5m')
+
+    def add_history(self, moment, price):
+        PriceHistory.objects.create(cryptocurrency=self.btc, timestamp=moment, price=Decimal(price), volume=Decimal('1'))
+
+    def test_compaction_interval(self):
+        self.assertEqual(PriceRetentionService().compaction_interval(), '5m')
+        self.assertEqual(PriceRetentionService(policies={'raw': 60}).compaction_interval(), '1h')
+
+    def test_compacts_expired_rows_into_candles(self):
+        self.add_history(self.old + timedelta(seconds=10), '100')
+        self.add_history(self.old + timedelta(seconds=100), '120')
+        self.add_history(self.now - timedelta(hours=1), '130')
+        stats = PriceRetentionService().compact_raw()
+        self.assertEqual(stats['raw_compacted'], 2)
+        self.assertEqual(PriceHistory.objects.count(), 1)
+        candle = PriceCandle.objects.get(cryptocurrency=self.btc, interval='5m', bucket_start=self.old)
+        self.assertEqual((candle.open, candle.high, candle.close), (Decimal('100'), Decimal('120'), Decimal('120')))
+
+    def test_batches_never_split_a_bucket(self):
+        for offset, price in ((10, '100'), (20, '90'), (30, '150'), (310, '110')):
+            self.add_history(self.old + timedelta(seconds=offset), price)
+        stats = PriceRetentionService(batch_size=2).compact_raw()
+        self.assertEqual(stats['raw_compacted'], 4)
+        candle = PriceCandle.objects.get(cryptocurrency=self.btc, interval='5m', bucket_start=self.old)
+        self.assertEqual(
+            (candle.open, candle.high, candle.low, candle.close),
+            (Decimal('100'), Decimal('150'), Decimal('90'), Decimal('150'))
+        )
+
+    def test_dry_run_only_counts(self):
+        self.add_history(self.old, '100')
+        stats = PriceRetentionService().run(dry_run=True)
+        self.assertEqual(stats['raw_compacted'], 1)
+        self.assertEqual(PriceHistory.objects.count(), 1)
+        self.assertFalse(PriceCandle.objects.exists())
+
+    def test_prunes_candles_per_interval(self):
+        old_day = candle_service.bucket_start(self.now - timedelta(days=400), '1d')
+        for interval in ('1m', '5m', '1h', '1d'):
+            PriceCandle.objects.create(
+                cryptocurrency=self.btc, interval=interval, bucket_start=old_day,
+                open=1, high=1, low=1, close=1
+            )
+        stats = PriceRetentionService().run()
+        self.assertEqual(stats['candles_pruned'], {'1m': 1, '5m': 1, '1h': 1, '1d': 0})
+        self.assertEqual(list(PriceCandle.objects.values_list('interval', flat=True)), ['1d'])
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        self.btc = Cryptocurrency.objects.create(symbol='BTC', name='Bitcoin')
+        self.start_ms = int(datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc).timestamp() * 1000)
+        directory = tempfile.mkdtemp()
+        self.checkpoint_path = os.path.join(directory, 'checkpoint.json')
+
+    def backfill(self, **kwargs):
+        return PriceHistoryBackfill('btc', checkpoint_path=self.checkpoint_path, **kwargs)
+
+    def points(self, *offsets_and_prices):
+        return [(self.start_ms + seconds * 1000, price, 1, 0) for seconds, price in offsets_and_prices]
+
+    def test_bucket_split_across_batches_is_merged(self):
+        points = self.points((0, 100), (20, 130), (40, 90), (50, 110))
+        self.backfill(batch_size=2, candle_interval='1m').run('test', points)
+        row = PriceCandle.objects.get(cryptocurrency=self.btc, interval='1m')
+        self.assertEqual(
+            tuple(float(value) for value in (row.open, row.high, row.low, row.close)),
+            (100, 130, 90, 110)
+        )
+
+    def test_written_counts_only_new_rows(self):
+        points = self.points((0, 100), (60, 101), (120, 102))
+        self.assertEqual(self.backfill().run('test', points[:2])['written'], 2)
+        os.remove(self.checkpoint_path)
+        stats = self.backfill().run('test', points)
+        self.assertEqual((stats['read'], stats['written']), (3, 1))
+        self.assertEqual(PriceHistory.objects.filter(cryptocurrency=self.btc).count(), 3)
+
+    def test_kline_volume_is_not_stored_as_24h_volume(self):
+        path = os.path.join(os.path.dirname(self.checkpoint_path), 'klines.json')
+        with open(path, 'w') as handle:
+            json.dump([[self.start_ms, '100', '101', '99', '100.5', '12.5', self.start_ms + 59999]], handle)
+        self.backfill().run('test', iter_json_points(path))
+        self.assertEqual(PriceHistory.objects.get(cryptocurrency=self.btc).volume, 0)
+
+
+class TimeOrderedKeyTests(TestCase):
+    def test_time_ordered_uuid_layout(self):
+        moment = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        key = time_ordered_uuid(moment)
+        self.assertEqual((key.version, key.variant), (7, uuid.RFC_4122))
+        self.assertEqual(key.int >> 80, int(moment.timestamp() * 1000))
+        later = [time_ordered_uuid(moment + timedelta(milliseconds=offset)) for offset in range(1, 50)]
+        self.assertEqual(sorted([key] + later), [key] + later)
+
+    def test_seeded_uuid_is_deterministic(self):
+        moment = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(time_ordered_uuid(moment, seed=b'btc:1'), time_ordered_uuid(moment, seed=b'btc:1'))
+        self.assertNotEqual(time_ordered_uuid(moment, seed=b'btc:1'), time_ordered_uuid(moment, seed=b'btc:2'))
+
+    def test_rekey_migration_batches_and_reruns(self):
+        migration = importlib.import_module('venex_app.migrations.0013_rekey_price_history')
+        self.assertFalse(migration.Migration.atomic)  # each batch commits on its own
+        btc = Cryptocurrency.objects.create(symbol='BTC', name='Bitcoin')
+        start = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+        for minute in range(5):
+            PriceHistory.objects.create(
+                id=uuid.uuid4(), cryptocurrency=btc, price=100 + minute, volume=1, timestamp=start + timedelta(minutes=minute)
+            )
+        PriceHistory.objects.filter(price=100).update(created_at=start)
+        apps = MigrationExecutor(connection).loader.project_state(('venex_app', '0013_rekey_price_history')).apps
+        schema_editor = mock.Mock(connection=connection)
+
+        with mock.patch.object(migration, 'BATCH_SIZE', 2):
+            migration.rekey_price_history(apps, schema_editor)
+        rows = list(PriceHistory.objects.order_by('timestamp').values('id', 'price', 'timestamp', 'created_at'))
+        self.assertEqual([row['price'] for row in rows], [Decimal(100 + minute) for minute in range(5)])
+        for row in rows:
+            self.assertEqual(row['id'].version, 7)
+            self.assertEqual(row['id'].int >> 80, int(row['timestamp'].timestamp() * 1000))
+        self.assertEqual(rows[0]['created_at'], start)
+
+        migration.rekey_price_history(apps, schema_editor)
+        self.assertEqual(list(PriceHistory.objects.order_by('timestamp').values_list('id', flat=True)), [row['id'] for row in rows])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SaveCryptoDataTests(TestCase):
+    def setUp(self):
+        self.service = CryptoDataService()
+        self.btc = Cryptocurrency.objects.create(
+            symbol='BTC', name='Bitcoin', current_price=Decimal('50000'),
+            circulating_supply=Decimal('19000000'), max_supply=Decimal('21000000'), rank=1
+        )
+
+    def ticker(self, price):
+        # Binance-shaped payload: no supply, market cap or rank
+        return {'price': price, 'change_24h': 10, 'change_percentage_24h': 0.5, 'volume': 1000}
+
+    def test_upsert_updates_and_creates_keeping_missing_fields(self):
+        written = self.service.save_crypto_data({'BTC': self.ticker(51000), 'ETH': self.ticker(3000)})
+        self.assertEqual(written, 2)
+        self.btc.refresh_from_db()
+        self.assertEqual(self.btc.current_price, Decimal('51000'))
+        self.assertEqual(self.btc.volume_24h, Decimal('1000'))
+        self.assertEqual(
+            (self.btc.circulating_supply, self.btc.max_supply, self.btc.rank),
+            (Decimal('19000000'), Decimal('21000000'), 1)
+        )
+        eth = Cryptocurrency.objects.get(symbol='ETH')
+        self.assertEqual((eth.name, eth.current_price), ('Ethereum', Decimal('3000')))
+
+    def test_query_count_does_not_grow_with_symbols(self):
+        with CaptureQueriesContext(connection) as one:
+            self.service.save_crypto_data({'BTC': self.ticker(51000)})
+        PriceHistory.objects.all().delete()
+        payload = {symbol: self.ticker(100) for symbol in ('BTC', 'ETH', 'LTC', 'TRX')}
+        with CaptureQueriesContext(connection) as many:
+            self.service.save_crypto_data(payload)
+        self.assertEqual(len(many), len(one))
+
+    def test_history_sampled_hourly_including_unchanged_symbols(self):
+        self.service.save_crypto_data({'BTC': self.ticker(51000)})
+        self.service.save_crypto_data({'BTC': self.ticker(52000)})
+        self.assertEqual(PriceHistory.objects.filter(cryptocurrency=self.btc).count(), 1)
+
+        PriceHistory.objects.update(timestamp=timezone.now() - timedelta(hours=2))
+        self.assertEqual(self.service.save_crypto_data({'BTC': self.ticker(53000)}, changed=set()), 0)
+        self.btc.refresh_from_db()
+        self.assertEqual(self.btc.current_price, Decimal('52000'))
+        self.assertEqual(
+            list(PriceHistory.objects.filter(cryptocurrency=self.btc).order_by('timestamp').values_list('price', flat=True)),
+            [Decimal('51000'), Decimal('53000')]
+        )
+
+
+class PriceChangeFilterTests(TestCase):
+    def setUp(self):
+        Cryptocurrency.objects.create(
+            symbol='BTC', name='Bitcoin', current_price=Decimal('50000'), price_change_percentage_24h=Decimal('1.5')
+        )
+        self.filter = PriceChangeFilter()
+
+    def test_moves_below_epsilon_are_suppressed(self):
+        changed = self.filter.detect({'BTC': {'price': 50000.4, 'change_percentage_24h': 1.505}})
+        self.assertEqual(changed, {})
+        self.assertEqual(self.filter.last_stats, {'received': 1, 'changed': 0, 'suppressed': 1})
+
+    def test_moves_above_epsilon_pass(self):
+        changed = self.filter.detect({'BTC': {'price': 50001}, 'ETH': {'price': 3000}})
+        self.assertEqual(set(changed), {'BTC', 'ETH'})  # ETH is not in the snapshot yet
+
+    def test_fields_outside_the_map_are_ignored(self):
+        self.assertEqual(self.filter.detect({'BTC': {'price': 50000, 'source': 'binance'}}), {})
+
+    def test_snapshot_advances_only_on_commit(self):
+        tick = {'BTC': {'price': 50100}}
+        self.assertEqual(self.filter.detect(tick), tick)
+        self.assertEqual(self.filter.detect(tick), tick)
+        self.filter.commit(tick)
+        self.assertEqual(self.filter.detect(tick), {})
+
+
+class PriceSeriesTests(SimpleTestCase):
+    def series(self, count, start=0.0):
+        timestamps = start + np.arange(count, dtype=np.float64) * 60
+        prices = 100 + np.sin(np.arange(count) / 5.0)
+        return PriceSeries(timestamps, prices, np.ones(count))
+
+    def test_lttb_keeps_endpoints_and_threshold(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.random.RandomState(1).rand(1000)
+        keep = lttb_indices(x, y, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_lttb_keeps_spike(self):
+        y = np.zeros(300)
+        y[137] = 10
+        self.assertIn(137, lttb_indices(np.arange(300, dtype=np.float64), y, 20))
+
+    def test_lttb_below_threshold_keeps_everything(self):
+        x = np.arange(10, dtype=np.float64)
+        self.assertEqual(list(lttb_indices(x, x, 20)), list(range(10)))
+        self.assertEqual(list(lttb_indices(x, x, 2)), list(range(10)))
+
+    def test_from_points_sorts_by_time(self):
+        series = PriceSeries.from_points([
+            {'timestamp': 120, 'price': 3}, {'timestamp': 0, 'price': 1, 'volume': 5}, {'timestamp': 60, 'price': 2},
+        ])
+        self.assertEqual(series.timestamps.tolist(), [0, 60, 120])
+        self.assertEqual(series.prices.tolist(), [1, 2, 3])
+        self.assertEqual(series.volumes.tolist(), [5, 0, 0])
+
+    def test_slice_and_price_at(self):
+        series = self.series(10)
+        view = series.slice(120, 300)
+        self.assertEqual(view.timestamps.tolist(), [120, 180, 240])
+        self.assertEqual(series.price_at(150), series.prices[2])
+        self.assertEqual(series.price_at(-1), series.prices[0])
+
+    def test_chart_payload_is_columnar_and_downsampled(self):
+        series = self.series(2000, start=time.time() - 2000 * 60)
+        payload = series.chart_payload(days=1, max_points=100)
+        self.assertEqual(payload['points'], 100)
+        self.assertEqual(len(payload['timestamps']), len(payload['prices']))
+        self.assertEqual(len(payload['prices']), len(payload['volumes']))
+        self.assertEqual(payload['current_price'], series.prices[-1])
+        self.assertEqual(payload['timestamps'][-1], series.timestamps[-1])
+
+    def test_series_cache_follows_loader_entry(self):
+        series_cache = PriceSeriesCache()
+        entry = [{'timestamp': 0, 'price': 1}, {'timestamp': 60, 'price': 2}]
+        loader = mock.Mock(side_effect=lambda symbol, days: entry)
+        first = series_cache.get('BTC', 1, loader)
+        self.assertIs(series_cache.get('BTC', 1, loader), first)
+        self.assertEqual(loader.call_count, 2)  # freshness is the loader's (historical_cache) call
+        entry = [{'timestamp': 0, 'price': 1}, {'timestamp': 60, 'price': 3}]
+        refreshed = series_cache.get('BTC', 1, loader)
+        self.assertIsNot(refreshed, first)
+        self.assertEqual(refreshed.prices.tolist(), [1, 3])
+
+
+class ChartEncodingTests(SimpleTestCase):
+    def test_round_trip(self):
+        payload = {
+            'timestamps': [1700000000, 1700000060, 1700000120],
+            'prices': [43210.12, 43215.5, 43199.99],
+            'volumes': [1234567.5, 1300000.25, 1290000.0],
+            'points': 3, 'current_price': 43199.99,
+        }
+        decoded = decode_chart(encode_chart(payload))
+        self.assertEqual(decoded['timestamps'], payload['timestamps'])
+        for key in ('prices', 'volumes'):
+            for got, want in zip(decoded[key], payload[key]):
+                self.assertAlmostEqual(got, want, delta=want * 1e-7)  # ~8 significant digits
+        self.assertEqual(decoded['current_price'], 43199.99)
+
+    def test_volumes_below_one_survive(self):
+        volumes = [0.0042, 0.75, 0.000815]
+        decoded = decode_chart(encode_chart({'timestamps': [1, 2, 3], 'prices': [0.5, 0.51, 0.52], 'volumes': volumes}))
+        for got, want in zip(decoded['volumes'], volumes):
+            self.assertAlmostEqual(got, want, delta=want * 1e-6)
+
+    def test_empty_payload(self):
+        decoded = decode_chart(encode_chart({'timestamps': [], 'prices': [], 'volumes': []}))
+        self.assertEqual((decoded['timestamps'], decoded['prices'], decoded['volumes']), ([], [], []))
+
+
+class OutboundQueueTests(SimpleTestCase):
+    def drain(self, queue):
+        async def drain():
+            return [await queue.get() for _ in range(len(queue))]
+        return async_to_sync(drain)()
+
+    def test_keyed_frames_conflate_in_place(self):
+        queue = OutboundQueue(max_size=10)
+        queue.put('btc-1', key='price:BTC')
+        queue.put('order-1')
+        queue.put('btc-2', key='price:BTC')
+        self.assertEqual(self.drain(queue), ['btc-2', 'order-1'])
+        self.assertEqual(queue.stats['merged'], 1)
+
+    def test_full_queue_evicts_oldest_keyed_frame(self):
+        queue = OutboundQueue(max_size=3)
+        queue.put('order-1')
+        queue.put('btc', key='price:BTC')
+        queue.put('eth', key='price:ETH')
+        queue.put('sol', key='price:SOL')
+        self.assertEqual(self.drain(queue), ['order-1', 'eth', 'sol'])
+        self.assertEqual(queue.stats['dropped'], 1)
+
+    def test_transactional_frames_are_never_dropped(self):
+        queue = OutboundQueue(max_size=2)
+        for number in range(4):
+            queue.put(f'order-{number}')
+        self.assertEqual(self.drain(queue), ['order-0', 'order-1', 'order-2', 'order-3'])
+        self.assertEqual(queue.stats['dropped'], 0)
+
+    def test_keyed_frame_dropped_when_full_of_transactional_frames(self):
+        queue = OutboundQueue(max_size=2)
+        queue.put('order-1')
+        queue.put('order-2')
+        queue.put('btc', key='price:BTC')
+        self.assertEqual(self.drain(queue), ['order-1', 'order-2'])
+        self.assertEqual(queue.stats['dropped'], 1)
+
+
+class OutboundQueueMergeTests(SimpleTestCase):
+    def put(self, queue, message):
+        data = encode_message(message, queue.wire_format)
+        queue.put((data.get('text_data'), data.get('bytes_data'), False), f"price:{message['symbol']}", message)
+
+    def drain(self, queue):
+        async def drain():
+            frames = [await queue.get() for _ in range(len(queue))]
+            return [decode_message(text_data, bytes_data) for text_data, bytes_data, _ in frames]
+        return async_to_sync(drain)()
+
+    def test_deltas_merge_into_one_covering_delta(self):
+        queue = OutboundQueue(max_size=10)
+        self.put(queue, price_delta_message('BTC', 5, {'price': 1.0, 'volume': 10.0}))
+        self.put(queue, price_delta_message('BTC', 6, {'price': 2.0}))
+        self.put(queue, price_delta_message('BTC', 7, {'change_24h': 3.0}))
+        [merged] = self.drain(queue)
+        self.assertEqual(merged['type'], 'price_delta')
+        self.assertEqual((merged['seq'], merged['base_seq']), (7, 4))
+        self.assertEqual(merged['data'], {'price': 2.0, 'volume': 10.0, 'change_24h': 3.0})
+
+    def test_delta_merges_into_queued_snapshot(self):
+        queue = OutboundQueue(max_size=10, wire_format='msgpack')
+        self.put(queue, price_snapshot_message('BTC', 5, {'price': 1.0, 'volume': 10.0}, timestamp='t'))
+        self.put(queue, price_delta_message('BTC', 6, {'price': 2.0}))
+        [merged] = self.drain(queue)
+        self.assertEqual(merged['type'], 'price_snapshot')
+        self.assertEqual(merged['seq'], 6)
+        self.assertNotIn('base_seq', merged)
+        self.assertEqual(merged['data'], {'price': 2.0, 'volume': 10.0})
+
+    def test_stale_delta_keeps_queued_frame(self):
+        queue = OutboundQueue(max_size=10)
+        self.put(queue, price_snapshot_message('BTC', 8, {'price': 1.0}, timestamp='t'))
+        self.put(queue, price_delta_message('BTC', 7, {'price': 0.5}))
+        [queued] = self.drain(queue)
+        self.assertEqual((queued['type'], queued['seq'], queued['data']), ('price_snapshot', 8, {'price': 1.0}))
+
+    def test_older_snapshot_keeps_queued_delta(self):
+        queue = OutboundQueue(max_size=10)
+        self.put(queue, price_delta_message('BTC', 7, {'price': 2.0}))
+        self.put(queue, price_snapshot_message('BTC', 5, {'price': 1.0, 'volume': 10.0}, timestamp='t'))
+        [queued] = self.drain(queue)
+        self.assertEqual((queued['type'], queued['seq'], queued['data']), ('price_delta', 7, {'price': 2.0}))
+
+    def test_snapshot_and_gapped_delta_replace(self):
+        queue = OutboundQueue(max_size=10)
+        self.put(queue, price_delta_message('BTC', 5, {'price': 1.0}))
+        self.put(queue, price_snapshot_message('BTC', 6, {'price': 2.0}, timestamp='t'))
+        self.put(queue, price_delta_message('ETH', 3, {'price': 1.0}))
+        self.put(queue, price_delta_message('ETH', 9, {'price': 4.0}))
+        snapshot, delta = self.drain(queue)
+        self.assertEqual((snapshot['type'], snapshot['data']), ('price_snapshot', {'price': 2.0}))
+        self.assertEqual((delta['seq'], delta['data']), (9, {'price': 4.0}))
+        self.assertNotIn('base_seq', delta)
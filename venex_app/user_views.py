@@ -5,11 +5,12 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.db.models import Sum, Q
 from decimal import Decimal
+from datetime import datetime
 import logging
 from django.utils import timezone
 from .models import CustomUser, Transaction, Order, Portfolio, Cryptocurrency
 from .services.dashboard_service import DashboardService
-from .services.crypto_api_service import crypto_service
+from .services.market_snapshot import market_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +29,13 @@ def dashboard(request):
     latest_crypto = None
     
     try:
-        # Update cryptocurrency data if it's stale (older than 5 minutes)
+        # Prices are refreshed by the ingestion worker (run_price_ingestion);
+        # the request path only reads the stored snapshot
         latest_crypto = Cryptocurrency.objects.order_by('-last_updated').first()
         if not latest_crypto or (timezone.now() - latest_crypto.last_updated).total_seconds() > 300:
-            crypto_service.update_cryptocurrency_data()
-            logger.info("Cryptocurrency data updated successfully")
-            latest_crypto = Cryptocurrency.objects.order_by('-last_updated').first()
+            logger.warning("Cryptocurrency prices are stale; is the price ingestion worker running?")
     except Exception as e:
-        logger.error(f"Failed to update crypto data: {e}")
+        logger.error(f"Failed to read crypto data: {e}")
     
     # Get portfolio data from service
     portfolio_data = DashboardService.get_user_portfolio_value(user)
@@ -202,52 +202,32 @@ def market_data_view(request):
     Enhanced market data and prices page with real-time updates
     """
     try:
-        # Get all active cryptocurrencies
-        cryptocurrencies = Cryptocurrency.objects.filter(is_active=True).order_by('rank')
-        
-        # Calculate market statistics
-        total_market_cap = sum(float(crypto.market_cap) for crypto in cryptocurrencies if crypto.market_cap)
-        total_volume = sum(float(crypto.volume_24h) for crypto in cryptocurrencies if crypto.volume_24h)
-        
-        # Calculate Bitcoin dominance
-        btc = cryptocurrencies.filter(symbol='BTC').first()
-        btc_dominance = (float(btc.market_cap) / total_market_cap * 100) if btc and btc.market_cap and total_market_cap > 0 else 0
+        # Shared market snapshot (crypto list + market stats) rebuilt by the ingestion worker
+        market = market_snapshot.data()
+        cryptocurrencies = market['cryptocurrencies']
         
         # Get top gainers and losers
-        top_gainers = cryptocurrencies.filter(price_change_percentage_24h__gt=0).order_by('-price_change_percentage_24h')[:5]
-        top_losers = cryptocurrencies.filter(price_change_percentage_24h__lt=0).order_by('price_change_percentage_24h')[:5]
-        
-        # Prepare market stats matching market.js expectations
-        market_stats = {
-            'total_market_cap': float(total_market_cap),  # Ensure float for JS
-            'total_volume_24h': float(total_volume),  # Ensure float for JS
-            'btc_dominance': float(round(btc_dominance, 2)),  # Ensure float for JS
-            'active_cryptocurrencies': cryptocurrencies.count(),
-            'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        change = lambda crypto: float(crypto['price_change_percentage_24h'] or 0)
+        top_gainers = sorted((crypto for crypto in cryptocurrencies if change(crypto) > 0), key=change, reverse=True)[:5]
+        top_losers = sorted((crypto for crypto in cryptocurrencies if change(crypto) < 0), key=change)[:5]
         
-        # Prepare cryptocurrency data for JSON serialization
-        crypto_list = [{
-            'symbol': crypto.symbol,
-            'name': crypto.name,
-            'rank': crypto.rank,
-            'current_price': float(crypto.current_price),
-            'price_change_percentage_24h': float(crypto.price_change_percentage_24h) if crypto.price_change_percentage_24h else 0,
-            'market_cap': float(crypto.market_cap) if crypto.market_cap else 0,
-            'volume_24h': float(crypto.volume_24h) if crypto.volume_24h else 0
-        } for crypto in cryptocurrencies]
-
         # Convert data to JSON strings for template
         from django.core.serializers.json import DjangoJSONEncoder
         import json
         
+        # The page has always shown a plain date and time, not ISO 8601
+        market_stats = dict(
+            market['market_stats'],
+            timestamp=datetime.fromisoformat(market['market_stats']['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        )
+        
         context = {
-            'cryptocurrencies': json.dumps(crypto_list, cls=DjangoJSONEncoder),
+            'cryptocurrencies': json.dumps(cryptocurrencies, cls=DjangoJSONEncoder),
             'market_stats': json.dumps(market_stats, cls=DjangoJSONEncoder),
             'top_gainers': top_gainers,
             'top_losers': top_losers,
             'current_prices': json.dumps({
-                crypto.symbol: {'price': float(crypto.current_price)} 
+                crypto['symbol']: {'price': float(crypto['current_price'])} 
                 for crypto in cryptocurrencies
             }, cls=DjangoJSONEncoder),
         }
@@ -133,6 +133,10 @@ DATABASES = {
 }
 
 
+# Covering-index columns (Index.include) are only used on PostgreSQL; MySQL
+# builds the same index without them
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 # Custom User Model
 AUTH_USER_MODEL = 'venex_app.CustomUser'
 
@@ -306,14 +310,100 @@ LOGOUT_REDIRECT_URL = '/'
 
 
 #  API Configuration
-# from requests.adapters import HTTPAdapter
-# from urllib3.util.retry import Retry
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', default='') # type: ignore
 COINGECKO_API_KEY = os.getenv('COINGECKO_API_KEY')
 CRYPTOCOMPARE_API_KEY = os.getenv('CRYPTOCOMPARE_API_KEY')
 API_TOKEN = os.getenv('API_TOKEN', default='c4108202488206bedec033be85b047342c106f12')
 
+# Crypto data providers
+# Hedged fetch starts the next provider after this many seconds without a
+# response from the previous one, instead of waiting for its full timeout
+CRYPTO_PROVIDER_HEDGING = env.bool('CRYPTO_PROVIDER_HEDGING', default=True) # type: ignore
+CRYPTO_PROVIDER_HEDGE_DELAY = env.float('CRYPTO_PROVIDER_HEDGE_DELAY', default=1.5) # type: ignore
+# Keep-alive connection pool shared by all provider requests
+CRYPTO_HTTP_POOL_SIZE = env.int('CRYPTO_HTTP_POOL_SIZE', default=10) # type: ignore
+CRYPTO_HTTP_RETRIES = env.int('CRYPTO_HTTP_RETRIES', default=2) # type: ignore
+# Fallback chains (history providers, last-resort price provider) don't retry:
+# per-request timeout and overall budget for one history lookup, in seconds
+CRYPTO_HTTP_FALLBACK_TIMEOUT = env.float('CRYPTO_HTTP_FALLBACK_TIMEOUT', default=5.0) # type: ignore
+CRYPTO_HISTORY_DEADLINE = env.float('CRYPTO_HISTORY_DEADLINE', default=10.0) # type: ignore
+# Fetch every Binance ticker in one request instead of one request per symbol
+CRYPTO_BINANCE_BULK_TICKER = env.bool('CRYPTO_BINANCE_BULK_TICKER', default=True) # type: ignore
+# Historical chart cache: in-process LRU in front of the Redis cache.
+# Fresh TTL in seconds keyed by the largest day range it applies to;
+# stale entries are served for TTL * STALE_FACTOR while refreshing in background
+CRYPTO_HISTORY_CACHE_SIZE = env.int('CRYPTO_HISTORY_CACHE_SIZE', default=256) # type: ignore
+CRYPTO_HISTORY_CACHE_TTLS = {1: 60, 7: 300, 30: 900, 90: 1800}
+CRYPTO_HISTORY_CACHE_MAX_TTL = 3600
+CRYPTO_HISTORY_STALE_FACTOR = 4
+# Provider circuit breaker: open after N consecutive failures, back off
+# exponentially between half-open probes; health keeps the last N call samples
+CRYPTO_CIRCUIT_FAILURE_THRESHOLD = env.int('CRYPTO_CIRCUIT_FAILURE_THRESHOLD', default=3) # type: ignore
+CRYPTO_CIRCUIT_BASE_BACKOFF = env.int('CRYPTO_CIRCUIT_BASE_BACKOFF', default=30) # type: ignore
+CRYPTO_CIRCUIT_MAX_BACKOFF = env.int('CRYPTO_CIRCUIT_MAX_BACKOFF', default=600) # type: ignore
+CRYPTO_CIRCUIT_SAMPLE_WINDOW = 50
+CRYPTO_CIRCUIT_SAMPLE_MAX_AGE = 600
+CRYPTO_CIRCUIT_PROBE_TIMEOUT = 30
+# Seconds between refreshes of the price ingestion worker
+# (python manage.py run_price_ingestion); request handlers never call providers
+CRYPTO_INGESTION_INTERVAL = env.int('CRYPTO_INGESTION_INTERVAL', default=30) # type: ignore
+# Streaming ingestion (python manage.py run_price_stream): exchange ticker
+# WebSocket and how often conflated ticks are flushed to the DB/channel layer
+CRYPTO_STREAM_URL = env('CRYPTO_STREAM_URL', default='wss://stream.binance.com:9443/stream') # type: ignore
+CRYPTO_STREAM_FLUSH_INTERVAL = env.float('CRYPTO_STREAM_FLUSH_INTERVAL', default=1.0) # type: ignore
+# Minimum move per field before a tick is written/published: changed if
+# |new - old| > max(absolute, relative * |old|)
+CRYPTO_CHANGE_EPSILON = {
+    'price': {'relative': 0.00001},
+    'change_24h': {'relative': 0.001},
+    'change_percentage_24h': {'absolute': 0.01},
+    'market_cap': {'relative': 0.0001},
+    'volume': {'relative': 0.001},
+}
+# Single-flight refreshes: lease held by the worker doing the work, and how
+# long other workers wait for its result before serving the previous one.
+# Published results are kept for the longer of the two (SINGLE_FLIGHT_RESULT_TTL
+# overrides); cached data lives in the callers' caches, not here
+SINGLE_FLIGHT_LEASE = env.int('SINGLE_FLIGHT_LEASE', default=30) # type: ignore
+SINGLE_FLIGHT_WAIT = env.float('SINGLE_FLIGHT_WAIT', default=5.0) # type: ignore
+# OHLCV candles (1m/5m/1h/1d) built from ingested ticks: candle interval served
+# per chart range in days, and the share of a range candles must cover before
+# charts are served from them instead of the providers
+CANDLE_RANGE_INTERVALS = {1: '5m', 7: '1h', 30: '1h', 90: '1h'}
+CANDLE_MIN_COVERAGE = 0.9
+# Retention in days per series (None = forever), applied by
+# python manage.py compact_price_history: raw price_history rows are compacted
+# into candles before deletion, candles are pruned per interval
+PRICE_HISTORY_RETENTION = {
+    'raw': 7,
+    '1m': 2,
+    '5m': 30,
+    '1h': 365,
+    '1d': None,
+}
+PRICE_HISTORY_COMPACTION_BATCH = env.int('PRICE_HISTORY_COMPACTION_BATCH', default=5000) # type: ignore
+# Chart series: points per chart after LTTB downsampling (callers may ask for
+# up to CHART_MAX_POINTS_LIMIT via ?points=) and how many series built from
+# the historical cache each process keeps
+CHART_MAX_POINTS = 500
+CHART_MAX_POINTS_LIMIT = 5000
+PRICE_SERIES_CACHE_SIZE = 64
+# Central price broadcaster (run_price_broadcaster, or run_price_ingestion
+# --broadcast): seconds between snapshot reads and the leader lease length
+PRICE_BROADCAST_INTERVAL = env.float('PRICE_BROADCAST_INTERVAL', default=2.0) # type: ignore
+PRICE_BROADCAST_LEASE = env.int('PRICE_BROADCAST_LEASE', default=15) # type: ignore
+# Process-local price snapshot read by consumers: reloaded on ingestion's
+# channel-layer invalidation, or when older than this many seconds
+PRICE_SNAPSHOT_MAX_AGE = env.int('PRICE_SNAPSHOT_MAX_AGE', default=60) # type: ignore
+# PortfolioConsumer coalesces price ticks for this many seconds before revaluing
+PORTFOLIO_REVALUE_DEBOUNCE = env.float('PORTFOLIO_REVALUE_DEBOUNCE', default=0.5) # type: ignore
+# Frames queued per WebSocket before a slow client's oldest price frames are dropped
+WS_OUTBOUND_QUEUE_SIZE = env.int('WS_OUTBOUND_QUEUE_SIZE', default=100) # type: ignore
+# Shared market snapshot (MarketConsumer, market API/page): rebuilt per ingestion
+# tick; rebuilt from the database on read once it is this many seconds old
+MARKET_SNAPSHOT_TTL = env.int('MARKET_SNAPSHOT_TTL', default=300) # type: ignore
+
 
 
 # Session Configuration